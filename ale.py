@@ -0,0 +1,174 @@
+# ale.py
+
+import numpy as np
+import pandas as pd
+
+from artifact_store import fingerprint
+from batch_inference import score_batch
+from shap_service import model_fingerprint
+from tpot_connector import _tpot_cache
+
+ALE_BINS = 20
+ALE_BINS_2D = 10
+SAMPLE_ROWS = 1000
+
+
+def numeric_features(X):
+    return [c for c in X.columns if pd.api.types.is_numeric_dtype(X[c]) and not pd.api.types.is_bool_dtype(X[c])]
+
+
+def quantile_edges(values, bins):
+    """
+    Unique observed quantiles used as bin edges, and each value's bin (0-based; the
+    first bin also holds the minimum). Missing values get bin -1.
+    """
+    observed = values[~np.isnan(values)]
+    edges = np.unique(np.quantile(observed, np.linspace(0, 1, bins + 1), method="nearest"))
+    if len(edges) < 2:
+        edges = np.r_[edges, edges]
+    idx = np.clip(np.searchsorted(edges, values, side="left") - 1, 0, len(edges) - 2)
+    return edges, np.where(np.isnan(values), -1, idx)
+
+
+def _sample(X, sample_rows, seed=0):
+    return X.sample(n=sample_rows, random_state=seed) if len(X) > sample_rows else X
+
+
+def _stack(sample, copies):
+    """
+    len(copies) copies of `sample` in one frame; each copy is a dict col -> replacement values.
+    """
+    data = {}
+    for col in sample.columns:
+        base = sample[col].to_numpy()
+        data[col] = np.concatenate([copy.get(col, base) for copy in copies])
+    frame = pd.DataFrame(data, columns=sample.columns)
+    for col in sample.columns:
+        if frame[col].dtype != sample[col].dtype:
+            try:
+                frame[col] = frame[col].astype(sample[col].dtype)
+            except (TypeError, ValueError):
+                pass
+    return frame
+
+
+def _outputs(model, batch):
+    proba, labels = score_batch(model, batch)
+    if proba is None:
+        return np.asarray(labels, dtype=float)[:, None], None
+    return proba, np.asarray(getattr(model, "classes_", np.arange(proba.shape[1])))
+
+
+def ale_1d(model, X, features=None, bins=ALE_BINS, sample_rows=SAMPLE_ROWS):
+    """
+    First-order ALE for each numeric feature. Quantile bins are built once per feature,
+    every row's lower- and upper-edge copy for every feature goes into one batch, and
+    the batch is scored with a single inference.
+    Returns {feature: {"edges", "ale" (edges x outputs), "counts"}} and the class labels
+    (None for models without predict_proba).
+    """
+    features = [f for f in (features or numeric_features(X)) if f in numeric_features(X)]
+    sample = _sample(X, sample_rows)
+    rows = sample.reset_index(drop=True)
+    n = len(rows)
+
+    binned, copies = {}, []
+    for f in features:
+        values = rows[f].to_numpy(dtype=float, na_value=np.nan)
+        edges, idx = quantile_edges(values, bins)
+        keep = idx >= 0
+        lower = np.where(keep, edges[np.maximum(idx, 0)], values)
+        upper = np.where(keep, edges[np.maximum(idx, 0) + 1], values)
+        binned[f] = (edges, idx, keep)
+        copies += [{f: lower}, {f: upper}]
+    if not features:
+        return {}, None
+
+    out, classes = _outputs(model, _stack(rows, copies))
+    out = out.reshape(len(copies), n, -1)
+
+    results = {}
+    for i, f in enumerate(features):
+        edges, idx, keep = binned[f]
+        diff = (out[2 * i + 1] - out[2 * i])[keep]
+        k = len(edges) - 1
+        counts = np.bincount(idx[keep], minlength=k)
+        sums = np.stack([np.bincount(idx[keep], weights=diff[:, c], minlength=k) for c in range(diff.shape[1])], axis=1)
+        local = sums / np.maximum(counts, 1)[:, None]
+        ale = np.vstack([np.zeros((1, local.shape[1])), np.cumsum(local, axis=0)])
+        # Centre so the count-weighted mean effect over the data is zero
+        mids = (ale[:-1] + ale[1:]) / 2
+        ale -= (counts[:, None] * mids).sum(axis=0) / max(counts.sum(), 1)
+        results[f] = {"edges": edges, "ale": ale, "counts": counts}
+    return results, classes
+
+
+def ale_2d(model, X, f1, f2, bins=ALE_BINS_2D, sample_rows=SAMPLE_ROWS):
+    """
+    Second-order (interaction-only) ALE for two numeric features: the four cell-corner
+    copies of every row are scored in one inference, the mixed differences accumulated
+    over both axes, and both first-order effects removed.
+    Returns {"edges": (edges1, edges2), "ale" (edges1 x edges2 x outputs), "counts"}, classes.
+    """
+    rows = _sample(X, sample_rows).reset_index(drop=True)
+    v1 = rows[f1].to_numpy(dtype=float, na_value=np.nan)
+    v2 = rows[f2].to_numpy(dtype=float, na_value=np.nan)
+    e1, i1 = quantile_edges(v1, bins)
+    e2, i2 = quantile_edges(v2, bins)
+    keep = (i1 >= 0) & (i2 >= 0)
+    rows, i1, i2 = rows[keep], i1[keep], i2[keep]
+    n, k1, k2 = len(rows), len(e1) - 1, len(e2) - 1
+
+    corners = [(a, b) for a in (0, 1) for b in (0, 1)]
+    copies = [{f1: e1[i1 + a], f2: e2[i2 + b]} for a, b in corners]
+    out, classes = _outputs(model, _stack(rows, copies))
+    out = out.reshape(4, n, -1)
+    # f(1,1) - f(1,0) - f(0,1) + f(0,0)
+    diff = out[3] - out[2] - out[1] + out[0]
+
+    cell = i1 * k2 + i2
+    counts = np.bincount(cell, minlength=k1 * k2).reshape(k1, k2)
+    sums = np.stack([np.bincount(cell, weights=diff[:, c], minlength=k1 * k2) for c in range(diff.shape[1])], axis=1)
+    # Empty cells contribute no local effect
+    local = (sums / np.maximum(counts.reshape(-1), 1)[:, None]).reshape(k1, k2, -1)
+
+    acc = np.zeros((k1 + 1, k2 + 1, local.shape[2]))
+    acc[1:, 1:] = np.cumsum(np.cumsum(local, axis=0), axis=1)
+
+    # Remove what is left of each first-order effect (count-weighted over the other axis)
+    w = counts[:, :, None]
+    step1 = ((acc[1:, :-1] + acc[1:, 1:]) - (acc[:-1, :-1] + acc[:-1, 1:])) / 2
+    step2 = ((acc[:-1, 1:] + acc[1:, 1:]) - (acc[:-1, :-1] + acc[1:, :-1])) / 2
+    main1 = np.vstack([np.zeros((1, acc.shape[2])), np.cumsum((w * step1).sum(1) / np.maximum(w.sum(1), 1), axis=0)])
+    main2 = np.vstack([np.zeros((1, acc.shape[2])), np.cumsum((w * step2).sum(0) / np.maximum(w.sum(0), 1), axis=0)])
+    acc -= main1[:, None, :] + main2[None, :, :]
+
+    mids = (acc[:-1, :-1] + acc[1:, :-1] + acc[:-1, 1:] + acc[1:, 1:]) / 4
+    acc -= (w * mids).sum(axis=(0, 1)) / max(counts.sum(), 1)
+    return {"edges": (e1, e2), "ale": acc, "counts": counts}, classes
+
+
+def _version(model, X, key, *parts):
+    digest = _tpot_cache.hash_of(key) if key is not None and key in _tpot_cache else None
+    return "-".join([model_fingerprint(model)[:12], (digest or fingerprint(X))[:8], *map(str, parts)])
+
+
+def get_ale(model, X, bins=ALE_BINS, sample_rows=SAMPLE_ROWS, key=None):
+    """
+    First-order ALE for every numeric feature, computed once per model and data.
+    Pass the store key of X (e.g. "X_train") to reuse its known hash.
+    """
+    return _tpot_cache.get_or_compute(
+        "ale_1d", lambda: ale_1d(model, X, bins=bins, sample_rows=sample_rows),
+        version=_version(model, X, key, f"b{bins}", f"n{sample_rows}"),
+    )
+
+
+def get_ale_2d(model, X, f1, f2, bins=ALE_BINS_2D, sample_rows=SAMPLE_ROWS, key=None):
+    """
+    Cached second-order ALE for one feature pair.
+    """
+    return _tpot_cache.get_or_compute(
+        f"ale_2d:{f1}|{f2}", lambda: ale_2d(model, X, f1, f2, bins=bins, sample_rows=sample_rows),
+        version=_version(model, X, key, f"b{bins}", f"n{sample_rows}"),
+    )
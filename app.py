@@ -1,6 +1,6 @@
 import streamlit as st
-import importlib
 from config.tabs_config import TITANIC_MODULE_GROUPS, DAIVID_TABS
+from tab_loader import load_tab, get_import_times
 
 # -- Safe session state init --
 if "app_state" not in st.session_state:
@@ -54,21 +54,22 @@ st.session_state.app_state["active_tab"] = selected_tab
 # -- Dynamic Import + Run --
 try:
     modname = DAIVID_TABS[selected_tab]
+    module, entry_point = load_tab(modname)
 
-    # Manually import the 'catreg_switcher' to test if it exists
-    if modname == "catreg_switcher":
-        import catreg_switcher  # This is the manual import check
-        st.success("✅ Successfully imported catreg_switcher manually!")
-    
-    module = importlib.import_module(modname)
-
-    if hasattr(module, "run"):
-        module.run()
+    if entry_point is not None:
+        entry_point()
     else:
         st.warning(f"⚠️ `{modname}` found but missing a `run()` function.")
 except Exception as e:
     st.error(f"❌ Failed to load `{selected_tab}` → `{DAIVID_TABS.get(selected_tab)}`")
     st.exception(e)
 
+# -- Cold-start import cost per tab --
+import_times = get_import_times()
+if import_times:
+    with st.sidebar.expander("⏱️ Tab Import Times"):
+        for name, seconds in import_times.items():
+            st.write(f"`{name}`: {seconds * 1000:.0f} ms")
+
 st.markdown("---")
 st.markdown("🧠 Powered by DAIVID – Dynamic AI for Insight, Validation, Interpretation & Discovery")
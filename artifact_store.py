@@ -0,0 +1,318 @@
+# artifact_store.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+import joblib
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = os.environ.get("DAIVID_CACHE_DIR", ".daivid_cache")
+DEFAULT_MAX_DISK_BYTES = 2 * 1024 ** 3
+DEFAULT_MAX_MEMORY_ITEMS = 64
+
+# Names panels have used for the same artifact; all resolve to one canonical key
+KEY_ALIASES = {
+    "latest_X_train": "X_train",
+    "latest_y_train": "y_train",
+    "latest_X_test": "X_test",
+    "latest_y_test": "y_test",
+}
+
+# Artifacts worth keeping across restarts; everything else is per-process scratch
+PERSISTENT_KEYS = {
+    "model", "best_model", "best_model_source", "all_models",
+    "latest_tpot_model", "latest_rf_model", "latest_ensemble_model",
+    "X_train", "y_train", "X_test", "y_test",
+    "y_pred", "y_pred_proba", "last_hpo_config",
+}
+
+_MANIFEST = "manifest.json"
+
+
+def fingerprint(obj):
+    """
+    Content hash of a frame, array or any picklable object.
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        h = hashlib.sha1(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+        names = obj.columns if isinstance(obj, pd.DataFrame) else [obj.name]
+        h.update(repr(list(names)).encode())
+        h.update(repr(list(obj.dtypes) if isinstance(obj, pd.DataFrame) else [obj.dtype]).encode())
+        return h.hexdigest()
+    if isinstance(obj, np.ndarray) and obj.dtype != object:
+        h = hashlib.sha1(np.ascontiguousarray(obj).tobytes())
+        h.update(f"{obj.shape}{obj.dtype}".encode())
+        return h.hexdigest()
+    return joblib.hash(obj)
+
+
+def _safe_name(key):
+    return "".join(c if c.isalnum() or c in "-_.@" else "_" for c in key)
+
+
+class ArtifactStore(MutableMapping):
+    """
+    Two-tier key/value store for models, splits and derived matrices.
+
+    The memory tier holds live objects (so in-place mutation of dict values keeps
+    working like the old module dict); persistent keys are also written to disk
+    (npz for arrays, joblib otherwise) with their content hash, and reloaded on
+    first access in a later session. Both tiers evict least-recently-used entries:
+    persisted values are re-saved before leaving memory, versioned scratch values
+    are recomputed on the next miss, and plain scratch keys are never evicted.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, max_disk_bytes=DEFAULT_MAX_DISK_BYTES,
+                 max_memory_items=DEFAULT_MAX_MEMORY_ITEMS, persistent_keys=PERSISTENT_KEYS):
+        self.root = root
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_items = max_memory_items
+        self.persistent_keys = set(persistent_keys)
+        self._memory = OrderedDict()
+        self._hashes = {}
+        self._lock = threading.RLock()
+        self._disk_enabled = True
+        self._manifest = self._read_manifest()
+
+    # -- key handling --
+    @staticmethod
+    def canonical(key):
+        return KEY_ALIASES.get(key, key)
+
+    @staticmethod
+    def versioned(key, version):
+        return f"{key}@{version}" if version else key
+
+    def _is_persistent(self, key):
+        return key.split("@", 1)[0] in self.persistent_keys or "@" in key
+
+    # -- MutableMapping protocol --
+    def __getitem__(self, key):
+        key = self.canonical(key)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._touch(key)
+                return self._memory[key]
+            if key in self._manifest:
+                try:
+                    value = self._load(key)
+                except (OSError, ValueError, EOFError):
+                    # File deleted or truncated behind our back: forget it and report a miss
+                    self._manifest.pop(key, None)
+                    self._hashes.pop(key, None)
+                    self._write_manifest_quietly()
+                    raise KeyError(key) from None
+                self._memory[key] = value
+                self._evict_memory()
+                return value
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __delitem__(self, key):
+        key = self.canonical(key)
+        with self._lock:
+            found = self._memory.pop(key, _MISSING) is not _MISSING
+            self._hashes.pop(key, None)
+            if key in self._manifest:
+                self._remove_file(key)
+                found = True
+        if not found:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        key = self.canonical(key)
+        return key in self._memory or key in self._manifest
+
+    def __iter__(self):
+        return iter(list(dict.fromkeys(list(self._memory) + list(self._manifest))))
+
+    def __len__(self):
+        return len(set(self._memory) | set(self._manifest))
+
+    # -- artifact API --
+    def put(self, key, value, persist=None, version=None):
+        """
+        Store an artifact and return its content hash (None for non-persistent scratch values).
+        """
+        key = self.versioned(self.canonical(key), version)
+        persist = self._is_persistent(key) if persist is None else persist
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            self._hashes.pop(key, None)
+            if not persist:
+                self._evict_memory()
+                return None
+            if value is None:
+                if key in self._manifest:
+                    self._remove_file(key)
+                return None
+            digest = fingerprint(value)
+            self._hashes[key] = digest
+            self._save(key, value, digest)
+            self._evict_memory()
+            return digest
+
+    def get_or_compute(self, key, compute, version=None, persist=True):
+        """
+        Return the artifact stored under (key, version), computing and storing it on a miss.
+        """
+        full_key = self.versioned(self.canonical(key), version)
+        try:
+            return self[full_key]
+        except KeyError:
+            pass
+        value = compute()
+        self.put(full_key, value, persist=persist)
+        return value
+
+    def hash_of(self, key):
+        key = self.canonical(key)
+        if key in self._hashes:
+            return self._hashes[key]
+        if key in self._manifest:
+            return self._manifest[key]["hash"]
+        value = self.get(key)
+        if value is None:
+            return None
+        digest = fingerprint(value)
+        self._hashes[key] = digest
+        return digest
+
+    def dataset_version(self):
+        """
+        Short id of the current training data, used to key everything derived from it.
+        """
+        parts = [self.hash_of("X_train"), self.hash_of("y_train")]
+        if parts[0] is None:
+            return None
+        return hashlib.sha1("|".join(p or "" for p in parts).encode()).hexdigest()[:16]
+
+    def info(self):
+        """
+        One row per disk artifact for display.
+        """
+        return [
+            {"Key": k, "Hash": m["hash"][:12], "Size (KB)": round(m["bytes"] / 1024, 1),
+             "In Memory": k in self._memory}
+            for k, m in sorted(self._manifest.items(), key=lambda kv: kv[1]["last_access"], reverse=True)
+        ]
+
+    # -- disk tier --
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _read_manifest(self):
+        try:
+            with open(self._path(_MANIFEST), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            return {k: m for k, m in manifest.items() if os.path.exists(self._path(m["file"]))}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        tmp = self._path(_MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp, self._path(_MANIFEST))
+
+    def _save(self, key, value, digest):
+        if not self._disk_enabled:
+            return
+        entry = self._manifest.get(key)
+        if entry is not None and entry["hash"] == digest:
+            self._touch(key)
+            return
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            if entry is not None:
+                self._remove_file(key, write=False)
+            if isinstance(value, np.ndarray) and value.dtype != object:
+                fname = f"{_safe_name(key)}-{digest[:12]}.npz"
+                np.savez(self._path(fname), value=value)
+            else:
+                fname = f"{_safe_name(key)}-{digest[:12]}.joblib"
+                joblib.dump(value, self._path(fname))
+            self._manifest[key] = {
+                "file": fname,
+                "hash": digest,
+                "bytes": os.path.getsize(self._path(fname)),
+                "last_access": time.time(),
+            }
+            self._evict_disk()
+            self._write_manifest()
+        except Exception:
+            # Read-only or unpicklable: keep serving from memory only
+            self._manifest.pop(key, None)
+            self._disk_enabled = os.access(self.root, os.W_OK) if os.path.isdir(self.root) else False
+
+    def _load(self, key):
+        entry = self._manifest[key]
+        path = self._path(entry["file"])
+        self._touch(key)
+        if path.endswith(".npz"):
+            with np.load(path, allow_pickle=False) as data:
+                return data["value"]
+        return joblib.load(path)
+
+    def _touch(self, key):
+        if key in self._manifest:
+            self._manifest[key]["last_access"] = time.time()
+
+    def _remove_file(self, key, write=True):
+        entry = self._manifest.pop(key, None)
+        if entry is None:
+            return
+        try:
+            os.remove(self._path(entry["file"]))
+            if write:
+                self._write_manifest()
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        total = sum(m["bytes"] for m in self._manifest.values())
+        for key, entry in sorted(self._manifest.items(), key=lambda kv: kv[1]["last_access"]):
+            if total <= self.max_disk_bytes:
+                break
+            total -= entry["bytes"]
+            self._remove_file(key, write=False)
+            self._memory.pop(key, None)
+
+    def _write_manifest_quietly(self):
+        try:
+            self._write_manifest()
+        except OSError:
+            pass
+
+    def _evict_memory(self):
+        # Plain scratch keys (app state) stay; persisted keys are re-saved first so in-place
+        # edits survive, and versioned derived artifacts are simply recomputed on the next miss
+        excess = len(self._memory) - self.max_memory_items
+        for key in list(self._memory):
+            if excess <= 0:
+                break
+            if key in self._manifest:
+                value = self._memory[key]
+                digest = fingerprint(value)
+                if digest != self._manifest[key]["hash"]:
+                    self._save(key, value, digest)
+                if self._manifest.get(key, {}).get("hash") != digest:
+                    continue  # could not be written; keep the live object
+            elif "@" not in key:
+                continue
+            del self._memory[key]
+            self._hashes.pop(key, None)
+            excess -= 1
+
+
+_MISSING = object()
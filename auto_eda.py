@@ -1,8 +1,10 @@
 import streamlit as st 
 import pandas as pd
 import numpy as np
-from tpot_connector import __dict__ as _tpot_cache
-import shap
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from tpot_connector import _tpot_cache
+from dataset_profile import get_profile
+from shap_service import get_explanation, plot_beeswarm
 
 def run():
     st.title("📊 Auto EDA Dashboard (Safe Mode)")
@@ -30,6 +32,7 @@ def run():
     if df is None or y is None:
         st.stop()
 
+    profile = get_profile(df, key="X_train")
     df = df.copy()
     df["target"] = y
 
@@ -37,7 +40,10 @@ def run():
 
     # AI Insights: Show basic statistical insights about the data
     st.subheader("📊 Basic Statistical Insights")
-    st.write(df.describe())
+    st.write(profile.describe())
+    st.caption(f"{profile.shape[0]} rows · {profile.shape[1]} features · {profile.missing_total} missing values")
+    with st.expander("📑 Missingness, Cardinality & Normality"):
+        st.dataframe(profile.summary())
 
     # Feature importance (if a model exists)
     if model:
@@ -47,11 +53,10 @@ def run():
             st.subheader("🔍 Feature Importance")
             st.bar_chart(dict(zip(feature_names, importances)))
 
-        elif isinstance(model, TPOTClassifier):  # If TPOT model is available
+        elif hasattr(model, "fitted_pipeline_"):  # If a fitted TPOT model is available
             st.subheader("🔍 SHAP Feature Importance")
-            explainer = shap.TreeExplainer(model.fitted_pipeline_)
-            shap_values = explainer.shap_values(df)
-            shap.summary_plot(shap_values, df)
+            shap_values = get_explanation(model.fitted_pipeline_, df.drop(columns=["target"]))
+            st.pyplot(plot_beeswarm(shap_values))
 
     # Placeholder for switching tabs
     eda_tab = st.selectbox("📌 Choose a Chart to Render", [
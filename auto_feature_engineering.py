@@ -1,7 +1,6 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import statsmodels.api as sm
 from sklearn.preprocessing import PolynomialFeatures
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import roc_auc_score, accuracy_score, confusion_matrix
@@ -9,8 +8,11 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import pickle
 from tpot_connector import _tpot_cache
-from autofeat import AutoFeatRegressor
-import featuretools as ft
+from utils import lazy_import
+
+sm = lazy_import("statsmodels.api")
+autofeat = lazy_import("autofeat")
+ft = lazy_import("featuretools")
 
 def show_autofe_playground():
     st.title("🧪 Feature Engineering Playground")
@@ -44,7 +46,7 @@ def show_autofe_playground():
 
         elif method == "Autofeat (Polynomial/Interaction Features)":
             df_num = df.select_dtypes(include=np.number).drop(columns=["PassengerId", "Survived"], errors='ignore')
-            model = AutoFeatRegressor(verbose=0)
+            model = autofeat.AutoFeatRegressor(verbose=0)
             X_transformed = model.fit_transform(df_num.values, df_num.columns)
             fe_df = pd.DataFrame(X_transformed, columns=model.new_feature_names_)
             st.success("Autofeat features generated.")
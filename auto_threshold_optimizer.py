@@ -1,8 +1,8 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-from sklearn.metrics import precision_score, recall_score, f1_score, accuracy_score
-from tpot_connector import __dict__ as _tpot_cache
+from threshold_engine import ThresholdCurve
+from tpot_connector import _tpot_cache
 import matplotlib.pyplot as plt
 
 def run():
@@ -29,24 +29,22 @@ def run():
         st.error(f"❌ Could not compute probabilities: {e}")
         return
 
-    thresholds = np.linspace(0.0, 1.0, 101)
-    metrics = []
+    with st.expander("💰 Cost-Weighted Utility (payoff per prediction outcome)"):
+        c1, c2, c3, c4 = st.columns(4)
+        payoffs = {
+            "tp": c1.number_input("True Positive", value=1.0),
+            "tn": c2.number_input("True Negative", value=1.0),
+            "fp": c3.number_input("False Positive", value=0.0),
+            "fn": c4.number_input("False Negative", value=0.0),
+        }
 
-    for t in thresholds:
-        preds = (probs >= t).astype(int)
-        metrics.append({
-            "Threshold": t,
-            "Precision": precision_score(y_test, preds, zero_division=0),
-            "Recall": recall_score(y_test, preds, zero_division=0),
-            "F1 Score": f1_score(y_test, preds, zero_division=0),
-            "Accuracy": accuracy_score(y_test, preds),
-        })
+    # Exact sweep over every distinct predicted probability
+    curve = ThresholdCurve(y_test, probs, payoffs=payoffs)
+    df = curve.to_frame()
 
-    df = pd.DataFrame(metrics)
-
-    metric_to_optimize = st.selectbox("Optimize for:", ["F1 Score", "Precision", "Recall", "Accuracy"])
+    metric_to_optimize = st.selectbox("Optimize for:", ["F1 Score", "Precision", "Recall", "Accuracy", "Utility"])
     best_row = df.loc[df[metric_to_optimize].idxmax()]
-    st.success(f"Best {metric_to_optimize}: {best_row[metric_to_optimize]:.3f} at threshold = {best_row['Threshold']:.2f}")
+    st.success(f"Best {metric_to_optimize}: {best_row[metric_to_optimize]:.3f} at threshold = {best_row['Threshold']:.3f}")
 
     fig, ax = plt.subplots()
     for m in ["F1 Score", "Precision", "Recall", "Accuracy"]:
@@ -58,15 +56,16 @@ def run():
     st.pyplot(fig)
 
     # Interactive slider to explore
-    slider_val = st.slider("Manual Threshold", 0.0, 1.0, float(best_row["Threshold"]), 0.01)
-    pred_slider = (probs >= slider_val).astype(int)
+    slider_val = st.slider("Manual Threshold", 0.0, 1.0, float(np.clip(round(best_row["Threshold"], 2), 0.0, 1.0)), 0.01)
+    at_slider = curve.at(slider_val)
 
     st.markdown("### 🧪 Classification Report at Selected Threshold")
     st.write({
-        "Precision": precision_score(y_test, pred_slider, zero_division=0),
-        "Recall": recall_score(y_test, pred_slider, zero_division=0),
-        "F1 Score": f1_score(y_test, pred_slider, zero_division=0),
-        "Accuracy": accuracy_score(y_test, pred_slider)
+        "Precision": at_slider["precision"],
+        "Recall": at_slider["recall"],
+        "F1 Score": at_slider["f1"],
+        "Accuracy": at_slider["accuracy"],
+        "Utility": at_slider["utility"]
     })
 
     _tpot_cache["selected_threshold"] = slider_val
@@ -5,7 +5,6 @@ import pandas as pd
 import random
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
-from tpot import TPOTClassifier
 import inspect
 from sklearn.linear_model import LinearRegression, LogisticRegression, Ridge, Lasso
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, RandomForestRegressor, GradientBoostingRegressor
@@ -14,9 +13,12 @@ from sklearn.neighbors import KNeighborsClassifier, KNeighborsRegressor
 from sklearn.naive_bayes import GaussianNB
 from sklearn.svm import SVC, SVR
 from sklearn.neural_network import MLPClassifier, MLPRegressor
-from xgboost import XGBClassifier, XGBRegressor
-from lightgbm import LGBMClassifier, LGBMRegressor
 from tpot_connector import _tpot_cache
+from utils import lazy_import
+
+tpot = lazy_import("tpot")
+xgboost = lazy_import("xgboost")
+lightgbm = lazy_import("lightgbm")
 
 
 # Helper function to get hyperparameters
@@ -74,8 +76,8 @@ def run():
             "SVC (SVM Classifier)": SVC,
             "GaussianNB": GaussianNB,
             "MLPClassifier": MLPClassifier,
-            "XGBClassifier": XGBClassifier,
-            "LGBMClassifier": LGBMClassifier
+            "XGBClassifier": xgboost.XGBClassifier,
+            "LGBMClassifier": lightgbm.LGBMClassifier
         }
     else:
         models = {
@@ -87,8 +89,8 @@ def run():
             "KNeighborsRegressor": KNeighborsRegressor,
             "SVR": SVR,
             "MLPRegressor": MLPRegressor,
-            "XGBRegressor": XGBRegressor,
-            "LGBMRegressor": LGBMRegressor
+            "XGBRegressor": xgboost.XGBRegressor,
+            "LGBMRegressor": lightgbm.LGBMRegressor
         }
 
     model_name = st.selectbox("Choose a model", list(models.keys()))
@@ -124,16 +126,16 @@ def run():
     st.info("Running a real TPOT model on the Titanic dataset...")
     X_train, X_test, y_train, y_test = load_titanic_data()
 
-    tpot = TPOTClassifier(generations=5, population_size=20, verbosity=2, max_time_mins=2, random_state=42)
+    tpot_model = tpot.TPOTClassifier(generations=5, population_size=20, verbosity=2, max_time_mins=2, random_state=42)
     with st.spinner("⏳ TPOT is optimizing models..."):
-        tpot.fit(X_train, y_train)
+        tpot_model.fit(X_train, y_train)
 
-    y_pred = tpot.predict(X_test)
+    y_pred = tpot_model.predict(X_test)
     acc = accuracy_score(y_test, y_pred)
 
     st.success(f"✅ TPOT Finished. Accuracy on Test Set: **{acc:.3f}**")
     st.markdown("### 📜 Best Pipeline Code")
-    st.code(tpot.export(), language="python")
+    st.code(tpot_model.export(), language="python")
 
     st.markdown("### 🧪 Predictions Sample")
     sample = pd.DataFrame({"Actual": y_test.values[:10], "Predicted": y_pred[:10]})
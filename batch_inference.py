@@ -0,0 +1,128 @@
+# batch_inference.py
+
+import numpy as np
+import pandas as pd
+
+# Quantile levels used as numeric what-if candidates (observed values, so dtypes are kept)
+CANDIDATE_QUANTILES = (0.0, 0.25, 0.5, 0.75, 1.0)
+MAX_CATEGORIES = 10
+MISSING = "🚫 Missing"
+
+
+def candidate_values(X, col, quantiles=CANDIDATE_QUANTILES, max_categories=MAX_CATEGORIES):
+    """
+    (values, labels) to try for one feature: zero plus observed quantiles for numeric
+    columns, missing plus the most frequent categories otherwise. The first candidate
+    is always the zero/missing probe.
+    """
+    series = X[col]
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        observed = series.dropna().to_numpy()
+        if len(observed) == 0:
+            return [0], ["0 (zeroed)"]
+        points = np.quantile(observed, quantiles, method="nearest")
+        values, labels = [0], ["0 (zeroed)"]
+        for q, v in zip(quantiles, points):
+            if v not in values:
+                values.append(v)
+                labels.append(f"q{int(q * 100)} = {v:.4g}")
+        return values, labels
+    values = list(series.value_counts(dropna=True).index[:max_categories])
+    return [None] + values, [MISSING] + [str(v) for v in values]
+
+
+def perturbation_batch(instances, candidates):
+    """
+    Every instance repeated once unchanged and once per (feature, candidate value), as a
+    single frame of len(instances) * (1 + n_variants) rows, instance-major.
+    `candidates` maps feature -> list of values. Returns (batch, variants) where
+    `variants` describes the variant columns in order (baseline excluded).
+    """
+    variants = [(col, j, v) for col, values in candidates.items() for j, v in enumerate(values)]
+    width = 1 + len(variants)
+    batch = {}
+    start = 1
+    offsets = {}
+    for col, values in candidates.items():
+        offsets[col] = (start, start + len(values))
+        start += len(values)
+    for col in instances.columns:
+        base = instances[col].to_numpy()
+        if col not in candidates:
+            batch[col] = np.repeat(base, width)
+            continue
+        s, e = offsets[col]
+        values = candidates[col]
+        dtype = np.result_type(base.dtype, np.asarray(values).dtype) if None not in values else object
+        grid = np.repeat(base.astype(dtype, copy=False)[:, None], width, axis=1)
+        grid[:, s:e] = np.asarray(values, dtype=dtype)
+        batch[col] = grid.ravel()
+    frame = pd.DataFrame(batch, columns=instances.columns)
+    for col in instances.columns:
+        # Keep the training dtypes where the candidates allow it (int/category columns)
+        target = instances[col].dtype
+        if col in candidates and frame[col].dtype != target and not pd.api.types.is_bool_dtype(target):
+            try:
+                frame[col] = frame[col].astype(target)
+            except (TypeError, ValueError):
+                pass
+    variants = pd.DataFrame(variants, columns=["Feature", "Candidate", "Value"])
+    return frame, variants
+
+
+def score_batch(model, batch):
+    """
+    One inference over the whole batch. Returns (proba or None, labels); labels come
+    from the probabilities when the model has predict_proba, so it is called once.
+    """
+    if hasattr(model, "predict_proba"):
+        proba = np.asarray(model.predict_proba(batch))
+        classes = np.asarray(getattr(model, "classes_", np.arange(proba.shape[1])))
+        return proba, classes[proba.argmax(axis=1)]
+    return None, np.asarray(model.predict(batch))
+
+
+def what_if_grid(model, instances, candidates):
+    """
+    Score every perturbed variant of every instance with one batched call.
+    Returns (variants, impact, flipped, labels):
+    impact/flipped are (n_instances, n_variants) arrays of the summed absolute
+    probability change (or label change without probabilities) and label flips;
+    labels is (n_instances, 1 + n_variants) with the baseline in column 0.
+    """
+    batch, variants = perturbation_batch(instances, candidates)
+    m, width = len(instances), 1 + len(variants)
+    proba, labels = score_batch(model, batch)
+    labels = labels.reshape(m, width)
+    flipped = labels[:, 1:] != labels[:, :1]
+    if proba is not None:
+        proba = proba.reshape(m, width, -1)
+        impact = np.abs(proba[:, 1:] - proba[:, :1]).sum(axis=2)
+    else:
+        impact = flipped.astype(float)
+    return variants, impact, flipped, labels
+
+
+def what_if_grid_by_feature(model, instances, candidates):
+    """
+    what_if_grid, falling back to one call per feature when the batched call fails, so a
+    feature the model cannot score (e.g. a missing probe without NaN support) only loses
+    its own variants. Returns what_if_grid's tuple plus {feature: error message}.
+    """
+    try:
+        return (*what_if_grid(model, instances, candidates), {})
+    except Exception:
+        pass
+    parts, errors = [], {}
+    for col, values in candidates.items():
+        try:
+            parts.append(what_if_grid(model, instances, {col: values}))
+        except Exception as e:
+            errors[col] = f"{type(e).__name__}: {e}"
+    if not parts:
+        raise ValueError(f"no feature could be scored ({next(iter(errors.values()), 'no candidates')})")
+    variants = pd.concat([p[0] for p in parts], ignore_index=True)
+    impact = np.hstack([p[1] for p in parts])
+    flipped = np.hstack([p[2] for p in parts])
+    labels = np.hstack([parts[0][3][:, :1]] + [p[3][:, 1:] for p in parts])
+    return variants, impact, flipped, labels, errors
@@ -1,13 +1,69 @@
+import time
 import streamlit as st
 import pandas as pd
-import optuna
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, roc_auc_score
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.neural_network import MLPClassifier
-from xgboost import XGBClassifier
 from tpot_connector import _tpot_cache
+from split_registry import holdout
+from preprocessing import build_pipeline, final_estimator, fit_transformers, needs_preprocessing, transform
+from utils import lazy_import
+
+xgboost = lazy_import("xgboost")
+lightgbm = lazy_import("lightgbm")
+
+# Early stopping: generous iteration caps, stopped by the validation loss
+MAX_BOOSTING_ROUNDS = 1000
+EARLY_STOPPING_ROUNDS = 20
+MAX_MLP_EPOCHS = 300
+VALIDATION_FRACTION = 0.15
+
+
+def fit_with_early_stopping(model_name, model, X_train, y_train, X_val, y_val):
+    """
+    Fit with validation-set early stopping where the model supports it.
+    Returns {"best_iteration" (1-based), "iterations_run", "max_iterations", "configured_iterations",
+    "seconds", "seconds_saved"}, or None when the model was fitted normally. Savings are measured
+    against the iteration count the model was configured with, not the early-stopping cap.
+    """
+    params = model.get_params()
+    if model_name in ("XGBoost", "LightGBM"):
+        # XGBoost leaves n_estimators as None for its default of 100
+        configured = int(params.get("n_estimators") or 100)
+    elif model_name == "Neural Network":
+        configured = int(params["max_iter"])
+    start = time.perf_counter()
+    if model_name == "XGBoost":
+        model.set_params(n_estimators=MAX_BOOSTING_ROUNDS, early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+        model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+        best = int(model.best_iteration) + 1
+        run = len(next(iter(model.evals_result()["validation_0"].values())))
+        max_iterations = MAX_BOOSTING_ROUNDS
+    elif model_name == "LightGBM":
+        model.set_params(n_estimators=MAX_BOOSTING_ROUNDS)
+        model.fit(X_train, y_train, eval_set=[(X_val, y_val)],
+                  callbacks=[lightgbm.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)])
+        best = int(model.best_iteration_ or MAX_BOOSTING_ROUNDS)
+        run = len(next(iter(model.evals_result_["valid_0"].values())))
+        max_iterations = MAX_BOOSTING_ROUNDS
+    elif model_name == "Neural Network":
+        # MLP holds out its own validation fraction of the training rows
+        model.set_params(early_stopping=True, validation_fraction=VALIDATION_FRACTION, max_iter=MAX_MLP_EPOCHS)
+        model.fit(X_train, y_train)
+        run = int(model.n_iter_)
+        scores = list(model.validation_scores_)
+        best = scores.index(max(scores)) + 1
+        max_iterations = MAX_MLP_EPOCHS
+    else:
+        return None
+    seconds = time.perf_counter() - start
+    # Cost of the configured iterations that were skipped (negative if more were run),
+    # at the observed per-iteration rate
+    saved = seconds / max(run, 1) * (configured - run)
+    return {"best_iteration": best, "iterations_run": run, "max_iterations": max_iterations,
+            "configured_iterations": configured, "seconds": seconds, "seconds_saved": saved}
+
 
 def run_daivid_hpo_engine():
     st.title("⚙️ DAIVID HPO Engine")
@@ -32,7 +88,7 @@ def run_daivid_hpo_engine():
 
     model_name = config["model"]
     test_size = config["test_size"] / 100
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
+    X_train, X_test, y_train, y_test = holdout(X, y, test_size=test_size, random_state=42).frames()
 
     # Model selection based on config
     if model_name == "Random Forest":
@@ -45,22 +101,53 @@ def run_daivid_hpo_engine():
         model = MLPClassifier(hidden_layer_sizes=(64, 32), max_iter=300)
         st.markdown("### Model: Neural Network")
     elif model_name == "XGBoost":
-        model = XGBClassifier(use_label_encoder=False, eval_metric="logloss")
+        model = xgboost.XGBClassifier(eval_metric="logloss")
         st.markdown("### Model: XGBoost")
+    elif model_name == "LightGBM":
+        model = lightgbm.LGBMClassifier(random_state=42, verbose=-1)
+        st.markdown("### Model: LightGBM")
     else:
         st.error(f"Unsupported model: {model_name}")
         return
 
+    # Smart HPO preprocessing (scaling, power transform, binning, encoding, PCA) ahead of the estimator
+    if needs_preprocessing(config, X_train):
+        model = build_pipeline(config, model, X_train)
+        st.caption("Preprocessing: " + " → ".join(name for name, _ in model.steps[:-1]))
+
     # Hyperparameter tuning - Display the tuned parameters if available
     st.markdown("### 🔧 HPO Parameters Used")
     st.write(config.get("hyperparameters", "No hyperparameters provided"))
 
     # Training the model
+    early_stopping = config.get("early_stopping", False) and model_name in ("XGBoost", "LightGBM", "Neural Network")
+    stopping_info = None
     with st.spinner("Training model..."):
-        model.fit(X_train, y_train)
+        if early_stopping and model_name != "Neural Network":
+            # Boosters stop on a validation slice carved from the training rows, never the test set
+            X_fit, X_val, y_fit, y_val = holdout(X_train, y_train, test_size=VALIDATION_FRACTION, random_state=42).frames()
+            Xt_fit = fit_transformers(model, X_fit, y_fit)
+            stopping_info = fit_with_early_stopping(model_name, final_estimator(model), Xt_fit, y_fit,
+                                                    transform(model, X_val), y_val)
+        elif early_stopping:
+            Xt_train = fit_transformers(model, X_train, y_train)
+            stopping_info = fit_with_early_stopping(model_name, final_estimator(model), Xt_train, y_train, None, None)
+        else:
+            model.fit(X_train, y_train)
         preds = model.predict(X_test)
         proba = model.predict_proba(X_test)[:, 1] if hasattr(model, "predict_proba") else None
 
+    if stopping_info:
+        st.markdown("### ⏹️ Early Stopping")
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Best Iteration", stopping_info["best_iteration"])
+        c2.metric("Iterations Run", f"{stopping_info['iterations_run']} / {stopping_info['max_iterations']}")
+        c3.metric("Est. Time Saved", f"{stopping_info['seconds_saved']:.2f}s",
+                  help=f"(Configured {stopping_info['configured_iterations']} − iterations run) × observed "
+                       "seconds per iteration; negative when early stopping ran past the configured count.")
+    elif config.get("early_stopping"):
+        st.caption(f"Early stopping is not available for {model_name}; trained normally.")
+
     # Evaluation metrics
     acc = accuracy_score(y_test, preds)
     st.success(f"✅ Accuracy: {acc:.4f}")
@@ -84,6 +171,8 @@ def run_daivid_hpo_engine():
         st.write("Logistic Regression is a simple model and works best when the relationship between features is linear. It is often used for classification problems.")
     elif model_name == "Neural Network":
         st.write("Neural Networks can model highly complex relationships in the data, but they require careful tuning to avoid overfitting, especially with small datasets.")
+    elif model_name == "LightGBM":
+        st.write("LightGBM grows trees leaf-wise on histogram bins, so it trains quickly on large datasets. Keep num_leaves and min_child_samples in check on small data to avoid overfitting.")
     elif model_name == "XGBoost":
         st.write("XGBoost is a powerful model that performs well on a variety of tasks, especially with large datasets. It is prone to overfitting if not carefully tuned.")
 
@@ -1,13 +1,98 @@
+import os
+import numpy as np
 import streamlit as st
-import optuna
 import pandas as pd
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import roc_auc_score, accuracy_score, f1_score, make_scorer
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score, accuracy_score, f1_score
 from tpot_connector import _tpot_cache
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-from xgboost import XGBClassifier
-from sklearn.neural_network import MLPClassifier
+from hpo_storage import (
+    PRUNERS, study_name, load_or_create_study, delete_study, completed_trials, pruned_trials,
+    make_pruner,
+)
+from hpo_executor import BACKENDS, TrialExecutor, render_executor_status
+from split_registry import kfold
+from preprocessing import build_pipeline, final_estimator, needs_preprocessing
+from search_space import build_model, describe, get_space, space_id, suggest
+from utils import lazy_import
+
+optuna = lazy_import("optuna")
+
+# Metric name -> (scorer, needs probability scores)
+SCORING_MAP = {
+    "AUC": (roc_auc_score, True),
+    "Accuracy": (accuracy_score, False),
+    "F1": (f1_score, False),
+}
+
+
+def get_model(model_name, trial, config=None, X=None):
+    """
+    Estimator for one trial; wrapped in the cached Smart HPO preprocessing pipeline
+    when `X` (for column types) is given and the config asks for preprocessing.
+    """
+    config = config or {}
+    model = build_model(model_name, suggest(trial, get_space(model_name, config.get("vc_dim"))), config)
+    if X is not None and needs_preprocessing(config, X):
+        model = build_pipeline(config, model, X)
+    return model
+
+
+# Fidelity knob -> what the rung fraction scales
+FIDELITIES = ["Data subsample", "Estimators / boosting rounds"]
+DEFAULT_RUNGS = (0.25, 0.5, 1.0)
+
+
+class TrainerObjective:
+    """
+    Stratified k-fold objective for one model family, evaluated rung by rung (cheap
+    fidelity first) and reported after every fold so the pruner can stop it early.
+    A plain class so worker processes can unpickle it.
+    """
+
+    def __init__(self, X, y, config, scoring_label, n_folds=3, rungs=DEFAULT_RUNGS, fidelity="Data subsample"):
+        self.config = config
+        self.scoring_label = scoring_label
+        self.n_folds = n_folds
+        self.rungs = tuple(rungs)
+        self.fidelity = fidelity
+        # Training sets are views with rows shuffled within each fold, so each rung's
+        # subsample is a prefix view that contains the previous rung's rows
+        self.folds = kfold(X, y, n_splits=n_folds, random_state=42)
+        # Column names/dtypes only, for building the preprocessing pipeline per trial
+        self.schema = X.iloc[:0] if isinstance(X, pd.DataFrame) else X[:0]
+
+    @property
+    def n_steps(self):
+        return len(self.rungs) * self.n_folds
+
+    def _fit_score(self, model, fold, fraction):
+        score_func, needs_proba = SCORING_MAP[self.scoring_label]
+        X_train, y_train = self.folds.train(fold)
+        X_val, y_val = self.folds.val(fold)
+        if self.fidelity == "Data subsample" and fraction < 1.0:
+            keep = max(int(len(y_train) * fraction), 2 * self.n_folds)
+            X_train, y_train = X_train[:keep], y_train[:keep]
+        elif fraction < 1.0 and "n_estimators" in final_estimator(model).get_params():
+            estimator = final_estimator(model)
+            estimator.set_params(n_estimators=max(int(estimator.get_params()["n_estimators"] * fraction), 1))
+        model.fit(X_train, y_train)
+        if needs_proba and hasattr(model, "predict_proba"):
+            return score_func(y_val, model.predict_proba(X_val)[:, 1])
+        return score_func(y_val, model.predict(X_val))
+
+    def __call__(self, trial):
+        base = get_model(self.config["model"], trial, self.config, self.schema)
+        step = 0
+        for fraction in self.rungs:
+            scores = []
+            for fold in range(self.n_folds):
+                scores.append(self._fit_score(clone(base), fold, fraction))
+                trial.report(float(np.mean(scores)), step)
+                step += 1
+                if trial.should_prune():
+                    raise optuna.TrialPruned()
+        return float(np.mean(scores))
+
 
 def run_daivid_hpo_trainer():
     try:
@@ -17,7 +102,7 @@ def run_daivid_hpo_trainer():
 
         Hyperparameter optimization (HPO) tunes the model by selecting the best hyperparameters to maximize performance. Optuna is used to evaluate various configurations and select the best-performing one.
 
-        The purpose of this tool is to improve the accuracy and robustness of the model by optimizing parameters.
+        Trials are stored on disk per dataset and model family, so every run resumes the same study instead of starting over.
         """)
 
         config = _tpot_cache.get("last_hpo_config")
@@ -31,104 +116,84 @@ def run_daivid_hpo_trainer():
         st.markdown("### 🔍 Configuration Summary")
         st.json(config)
 
-        model_choice = config["model"]
-
-        def objective(trial):
-            # Based on the chosen model, hyperparameters are tuned.
-            if model_choice == "Random Forest":
-                n_estimators = trial.suggest_int("n_estimators", 50, 300)
-                max_depth = trial.suggest_int("max_depth", 3, 20)
-                clf = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth)
-            elif model_choice == "XGBoost":
-                n_estimators = trial.suggest_int("n_estimators", 50, 300)
-                learning_rate = trial.suggest_float("learning_rate", 0.01, 0.3)
-                max_depth = trial.suggest_int("max_depth", 3, 10)
-                clf = XGBClassifier(n_estimators=n_estimators, learning_rate=learning_rate, max_depth=max_depth)
-            elif model_choice == "Logistic Regression":
-                C = trial.suggest_float("C", 0.01, 10.0, log=True)
-                clf = LogisticRegression(C=C, max_iter=1000)
+        # Allow user to select scoring metric
+        scoring_label = st.selectbox("Evaluation Metric", list(SCORING_MAP.keys()), index=0)
+
+        st.markdown("### ✂️ Pruning & Fidelity")
+        p1, p2, p3 = st.columns(3)
+        pruner_name = p1.selectbox("Pruner", PRUNERS, index=0)
+        n_folds = p2.slider("CV folds", 2, 10, 3)
+        fidelity = p3.selectbox("Fidelity knob", FIDELITIES, index=0)
+        rungs = st.multiselect("Fidelity rungs (fraction of full budget)", [0.1, 0.25, 0.5, 0.75], default=[0.25, 0.5])
+        rungs = tuple(sorted(rungs)) + (1.0,)
+        st.caption("Each trial is scored on every fold at each rung in turn; unpromising trials are pruned before reaching the full budget.")
+
+        if config.get("vc_dim"):
+            st.caption(f"🧮 Search space limited to VC dimension {config['vc_dim']}: "
+                       f"{describe(get_space(config['model'], config['vc_dim']))}")
+
+        rung_tag = "r" + "-".join(str(int(r * 100)) for r in rungs)
+        name = study_name("trainer", config["model"], scoring_label, f"cv{n_folds}", rung_tag,
+                          space_id(get_space(config["model"], config.get("vc_dim"))))
+        pruner = make_pruner(pruner_name, len(rungs) * n_folds)
+        study = load_or_create_study(name, direction="maximize", pruner=pruner)
+        done = completed_trials(study)
+
+        st.markdown("### 💾 Persistent Study")
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Study", name)
+        c2.metric("Completed Trials", len(done))
+        c3.metric("Pruned Trials", len(pruned_trials(study)))
+
+        cpu_count = os.cpu_count() or 1
+        parallel = bool(config.get("parallel"))
+        col1, col2, col3 = st.columns(3)
+        n_trials = col1.number_input("Trials to add", 1, 1000, int(config.get("max_models", 10)))
+        n_workers = int(col2.number_input("Parallel workers", min_value=1, max_value=cpu_count,
+                                          value=cpu_count if parallel else 1, step=1))
+        backend = col3.selectbox("Executor", BACKENDS, index=0)
+
+        b1, b2 = st.columns(2)
+        run_clicked = b1.button("🚀 Run Optuna Trials")
+        if b2.button("🗑️ Reset Study"):
+            delete_study(name)
+            st.info("Study cleared.")
+            return
+
+        if run_clicked:
+            objective = TrainerObjective(X, y, config, scoring_label, n_folds=n_folds, rungs=rungs, fidelity=fidelity)
+            if n_workers > 1:
+                executor = TrialExecutor(study, objective, n_workers=n_workers, backend=backend, pruner=pruner)
+                status = st.empty()
+                executor.run(int(n_trials), on_update=lambda ex: render_executor_status(status, ex))
             else:
-                raise ValueError(f"Unsupported model: {model_choice}")
+                with st.spinner("🔄 Optimizing model using Optuna..."):
+                    study.optimize(objective, n_trials=int(n_trials))
+            study = load_or_create_study(name, direction="maximize", pruner=pruner)
+            done = completed_trials(study)
+            st.success(f"✅ Optimization Complete — {len(done)} completed, {len(pruned_trials(study))} pruned")
+
+        if not done:
+            st.info("No completed trials yet. Click 'Run Optuna Trials' to start the study.")
+            return
 
-            return cross_val_score(clf, X, y, scoring="accuracy", cv=3).mean()
+        st.write("Best Parameters:")
+        st.json(study.best_params)
+        st.metric("Best Score", f"{study.best_value:.4f} ({scoring_label})")
 
-        st.info("🔍 Running Optuna study...")
-        study = optuna.create_study(direction="maximize")
-        study.optimize(objective, n_trials=config.get("max_models", 10))
+        with st.expander("📜 Trial History"):
+            st.dataframe(study.trials_dataframe(attrs=("number", "value", "params", "state", "duration")))
 
-        st.success("✅ HPO Completed")
-        st.write("Best Score:", study.best_value)
-        st.write("Best Parameters:", study.best_params)
+        # Refit best model on full data unless the cached one already comes from this study's best trial
+        source = f"{name}#{study.best_trial.number}"
+        if run_clicked or _tpot_cache.get("best_model") is None or _tpot_cache.get("best_model_source") != source:
+            final_model = get_model(config["model"], study.best_trial, config, X)
+            final_model.fit(X, y)
+            _tpot_cache["best_model"] = final_model
+            _tpot_cache["best_model_source"] = source
+            st.success("📦 Best model saved to cache. Ready for SHAP, Thresholding, or PDF Export.")
 
     except Exception as e:
         import traceback
         st.error(f"❌ DAIVID HPO Trainer failed to run: {type(e).__name__}: {e}")
         st.code(traceback.format_exc())
-
-    # Allow user to select scoring metric
-    scoring_map = {
-        "AUC": (roc_auc_score, "roc_auc"),
-        "Accuracy": (accuracy_score, "accuracy"),
-        "F1": (f1_score, "f1")
-    }
-    scoring_label = st.selectbox("Evaluation Metric", list(scoring_map.keys()), index=0)
-    score_func, score_name = scoring_map[scoring_label]
-
-    def get_model(model_name, trial):
-        if model_name == "Random Forest":
-            return RandomForestClassifier(
-                n_estimators=trial.suggest_int("n_estimators", 10, 300),
-                max_depth=trial.suggest_int("max_depth", 2, 20),
-                max_features=trial.suggest_categorical("max_features", ["sqrt", "log2"]),
-                random_state=42
-            )
-        elif model_name == "Logistic Regression":
-            return LogisticRegression(
-                C=trial.suggest_loguniform("C", 1e-4, 10),
-                solver=trial.suggest_categorical("solver", ["liblinear", "lbfgs"]),
-                max_iter=500,
-                random_state=42
-            )
-        elif model_name == "XGBoost":
-            return XGBClassifier(
-                n_estimators=trial.suggest_int("n_estimators", 50, 300),
-                max_depth=trial.suggest_int("max_depth", 2, 10),
-                learning_rate=trial.suggest_float("learning_rate", 0.01, 0.3),
-                use_label_encoder=False,
-                eval_metric="logloss",
-                random_state=42
-            )
-        elif model_name == "Neural Network":
-            return MLPClassifier(
-                hidden_layer_sizes=trial.suggest_categorical("hidden_layer_sizes", [(64,), (128,), (64, 32), (128, 64)]),
-                alpha=trial.suggest_loguniform("alpha", 1e-5, 1e-1),
-                learning_rate_init=trial.suggest_float("learning_rate_init", 1e-4, 1e-1),
-                max_iter=300,
-                early_stopping=config.get("early_stopping", True),
-                random_state=42
-            )
-        else:
-            raise ValueError("Unknown model")
-
-    def objective(trial):
-        model = get_model(config["model"], trial)
-        X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.25, stratify=y, random_state=42)
-        model.fit(X_train, y_train)
-        preds = model.predict_proba(X_val)[:, 1] if hasattr(model, "predict_proba") else model.predict(X_val)
-        preds_label = (preds > 0.5).astype(int) if preds.ndim > 1 else preds
-        return score_func(y_val, preds_label)
-
-    with st.spinner("🔄 Optimizing model using Optuna..."):
-        study = optuna.create_study(direction="maximize")
-        study.optimize(objective, n_trials=config.get("max_models", 10))
-
-    st.success("✅ Optimization Complete")
-    st.write("Best Parameters:")
-    st.json(study.best_params)
-    st.metric("Best Score", f"{study.best_value:.4f} ({scoring_label})")
-
-    # Refit best model on full data
-    final_model = get_model(config["model"], study.best_trial)
-    final_model.fit(X, y)
-    _tpot_cache["best_model"] = final_model
-    st.success("📦 Best model saved to cache. Ready for SHAP, Thresholding, or PDF Export.")
@@ -0,0 +1,140 @@
+# dataset_profile.py
+
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn.preprocessing import PowerTransformer
+
+from artifact_store import fingerprint
+from tpot_connector import _tpot_cache
+
+# normaltest needs at least this many non-missing values
+MIN_NORMALTEST_ROWS = 8
+
+
+class DatasetProfile:
+    """
+    Per-column statistics computed in one vectorised pass over the numeric block:
+    missingness, cardinality, moments, quantiles, D'Agostino normality test and
+    Yeo-Johnson lambdas.
+    """
+
+    def __init__(self, df, version=None):
+        self.version = version
+        self.shape = df.shape
+        self.columns = list(df.columns)
+        numeric = df.select_dtypes(include="number")
+        self.numeric_columns = list(numeric.columns)
+        self.categorical_columns = [c for c in self.columns if c not in set(self.numeric_columns)]
+        self.dtypes = df.dtypes.astype(str)
+        self.missing = df.isna().sum()
+        self.cardinality = df.nunique(dropna=True)
+
+        block = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+        self.stats = self._moments(block, self.numeric_columns)
+        self.lambdas, self._yj_scale = self._yeo_johnson(block, self.stats)
+
+    @staticmethod
+    def _moments(block, columns):
+        frame = pd.DataFrame(index=columns)
+        if not columns:
+            return frame
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            count = np.sum(~np.isnan(block), axis=0)
+            mean = np.nanmean(block, axis=0)
+            centered = block - mean
+            m2 = np.nanmean(centered ** 2, axis=0)
+            m3 = np.nanmean(centered ** 3, axis=0)
+            m4 = np.nanmean(centered ** 4, axis=0)
+            q = np.nanpercentile(block, [0, 25, 50, 75, 100], axis=0)
+            frame["count"] = count
+            frame["mean"] = mean
+            frame["std"] = np.sqrt(m2 * count / np.maximum(count - 1, 1))
+            frame["min"], frame["25%"], frame["50%"], frame["75%"], frame["max"] = q
+            frame["skew"] = np.where(m2 > 0, m3 / m2 ** 1.5, 0.0)
+            frame["kurtosis"] = np.where(m2 > 0, m4 / m2 ** 2 - 3.0, 0.0)
+
+            testable = (count >= MIN_NORMALTEST_ROWS) & (m2 > 0)
+            stat = np.full(len(columns), np.nan)
+            p = np.full(len(columns), np.nan)
+            if testable.any():
+                res = stats.normaltest(block[:, testable], axis=0, nan_policy="omit")
+                stat[testable] = np.ma.filled(res.statistic, np.nan)
+                p[testable] = np.ma.filled(res.pvalue, np.nan)
+            frame["normal_stat"] = stat
+            frame["normal_p"] = p
+        return frame
+
+    @staticmethod
+    def _yeo_johnson(block, frame):
+        lambdas = pd.Series(np.nan, index=frame.index)
+        scale = {}
+        fittable = [i for i, c in enumerate(frame.index) if frame["std"].iloc[i] > 0 and frame["count"].iloc[i] > 1]
+        if not fittable:
+            return lambdas, scale
+        try:
+            pt = PowerTransformer(method="yeo-johnson", standardize=False).fit(block[:, fittable])
+        except Exception:
+            return lambdas, scale
+        transformed = pt.transform(block[:, fittable])
+        for j, i in enumerate(fittable):
+            col = frame.index[i]
+            lambdas[col] = pt.lambdas_[j]
+            scale[col] = (np.nanmean(transformed[:, j]), np.nanstd(transformed[:, j]) or 1.0)
+        return lambdas, scale
+
+    # -- views --
+    @property
+    def missing_total(self):
+        return int(self.missing.sum())
+
+    def non_normal(self, alpha=0.05):
+        p = self.stats.get("normal_p", pd.Series(dtype=float))
+        return [c for c in self.numeric_columns if pd.notna(p.get(c)) and p[c] < alpha]
+
+    def describe(self):
+        """
+        Same layout as DataFrame.describe() for the numeric columns.
+        """
+        return self.stats[["count", "mean", "std", "min", "25%", "50%", "75%", "max"]].T
+
+    def summary(self):
+        """
+        One row per column: dtype, missingness, cardinality and the numeric statistics.
+        """
+        frame = pd.DataFrame({
+            "dtype": self.dtypes,
+            "missing": self.missing,
+            "missing %": (self.missing / max(self.shape[0], 1) * 100).round(2),
+            "unique": self.cardinality,
+        })
+        extra = self.stats[["mean", "std", "skew", "kurtosis", "normal_p"]].assign(yeo_johnson_lambda=self.lambdas)
+        return frame.join(extra)
+
+    def yeo_johnson_preview(self, df, columns, rows=5):
+        """
+        Standardised Yeo-Johnson transform of the first `rows` rows using the profiled lambdas.
+        """
+        out = {}
+        for col in columns:
+            if col not in self._yj_scale:
+                continue
+            mean, std = self._yj_scale[col]
+            values = df[col].head(rows).to_numpy(dtype=np.float64, na_value=np.nan)
+            out[col] = (stats.yeojohnson(values, lmbda=self.lambdas[col]) - mean) / std
+        return pd.DataFrame(out)
+
+
+def get_profile(df, key=None):
+    """
+    Profile of `df`, computed once per data fingerprint and kept in the artifact store.
+    Pass the store key (e.g. "X_train") to reuse its already-known hash.
+    """
+    if df is None:
+        return None
+    digest = _tpot_cache.hash_of(key) if key is not None and key in _tpot_cache else None
+    version = (digest or fingerprint(df))[:16]
+    return _tpot_cache.get_or_compute("dataset_profile", lambda: DatasetProfile(df, version), version=version)
@@ -5,6 +5,7 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 from tpot_connector import _tpot_cache
+from dataset_profile import get_profile
 
 def best_fit_distribution(data):
     DISTRIBUTIONS = [
@@ -28,6 +29,22 @@ def best_fit_distribution(data):
             continue
     return best_fit_name, best_p, best_stat
 
+def fit_distributions(df, profile):
+    distribution_summary = []
+    for col in profile.numeric_columns:
+        if profile.stats.at[col, "count"] < 10:
+            continue
+        best_fit, p_val, ks = best_fit_distribution(df[col].dropna())
+        distribution_summary.append({
+            "Feature": col,
+            "Best Fit Distribution": best_fit,
+            "KS p-value": round(p_val, 4),
+            "KS Statistic": round(ks, 4),
+            "Normality p-value": round(profile.stats.at[col, "normal_p"], 4),
+            "Skew": round(profile.stats.at[col, "skew"], 3),
+        })
+    return pd.DataFrame(distribution_summary)
+
 def run_distribution_auditor():
     st.title("📈 Feature Distribution Auditor + KS Test")
     st.markdown("This module tests each numeric feature against multiple known distributions to find the best fit.")
@@ -38,22 +55,11 @@ def run_distribution_auditor():
         return
 
     st.markdown("### 🔍 Analyzing Feature Distributions...")
-    numeric_cols = df.select_dtypes(include='number').columns
-    distribution_summary = []
-
-    for col in numeric_cols:
-        series = df[col].dropna()
-        if len(series) < 10:
-            continue
-        best_fit, p_val, ks = best_fit_distribution(series)
-        distribution_summary.append({
-            "Feature": col,
-            "Best Fit Distribution": best_fit,
-            "KS p-value": round(p_val, 4),
-            "KS Statistic": round(ks, 4)
-        })
-
-    results_df = pd.DataFrame(distribution_summary)
+    profile = get_profile(df, key="X_train")
+    # Fitting ten distributions per column is the slow part; keep it per dataset version too
+    results_df = _tpot_cache.get_or_compute(
+        "distribution_fits", lambda: fit_distributions(df, profile), version=profile.version
+    )
     st.dataframe(results_df)
 
     st.markdown("---")
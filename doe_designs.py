@@ -0,0 +1,213 @@
+# doe_designs.py
+
+import itertools
+import string
+
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+from batch_inference import score_batch
+
+DESIGNS = ["Full Factorial", "Fractional Factorial", "Latin Hypercube", "Central Composite"]
+# Standard minimum-aberration generators for 2^(k-p) designs (Montgomery, Table 8.14);
+# letters index the base factors of the 2^(k-p) full factorial
+FRACTIONAL_GENERATORS = {
+    (3, 1): ["AB"],
+    (4, 1): ["ABC"],
+    (5, 1): ["ABCD"],
+    (5, 2): ["AB", "AC"],
+    (6, 1): ["ABCDE"],
+    (6, 2): ["ABC", "BCD"],
+    (6, 3): ["AB", "AC", "BC"],
+    (7, 1): ["ABCDEF"],
+    (7, 2): ["ABCD", "ABDE"],
+    (7, 3): ["ABC", "BCD", "ACD"],
+    (7, 4): ["AB", "AC", "BC", "ABC"],
+    (8, 2): ["ABCD", "ABEF"],
+    (8, 3): ["ABC", "ABD", "BCDE"],
+    (8, 4): ["BCD", "ACD", "ABC", "ABD"],
+    (9, 2): ["ACDFG", "BCEFG"],
+    (9, 3): ["ABCD", "ACEF", "CDEF"],
+    (9, 4): ["BCDE", "ACDE", "ABDE", "ABCE"],
+    (10, 3): ["ABCG", "BCDE", "ACDF"],
+    (10, 4): ["BCDF", "ACDF", "ABDE", "ABCE"],
+}
+LOW_QUANTILE, HIGH_QUANTILE = 0.1, 0.9
+
+
+def full_factorial(k):
+    """
+    2^k two-level design in coded units (-1/+1), standard order.
+    """
+    return np.array(list(itertools.product([-1.0, 1.0], repeat=k)))[:, ::-1]
+
+
+def fractional_options(k):
+    return sorted(p for kk, p in FRACTIONAL_GENERATORS if kk == k)
+
+
+def fractional_factorial(k, p):
+    """
+    2^(k-p) design: a full factorial in the first k-p factors, the rest from the
+    standard generators. Returns (design, generator strings like "E = ABC").
+    """
+    if (k, p) not in FRACTIONAL_GENERATORS:
+        raise ValueError(f"No 2^({k}-{p}) generators available; choose p from {fractional_options(k)}.")
+    base = full_factorial(k - p)
+    letters = string.ascii_uppercase
+    extra, generators = [], []
+    for j, word in enumerate(FRACTIONAL_GENERATORS[(k, p)]):
+        extra.append(np.prod(base[:, [letters.index(c) for c in word]], axis=1))
+        generators.append(f"{letters[k - p + j]} = {word}")
+    return np.column_stack([base] + extra), generators
+
+
+def latin_hypercube(k, n, seed=42):
+    return qmc.LatinHypercube(d=k, seed=seed).random(n) * 2 - 1
+
+
+def central_composite(k, alpha="rotatable", center=4):
+    """
+    Factorial corners, 2k axial points at +-alpha and `center` centre runs.
+    alpha is (2^k)^(1/4) for a rotatable design, 1 for face-centred.
+    """
+    corners = full_factorial(k)
+    a = len(corners) ** 0.25 if alpha == "rotatable" else 1.0
+    axial = np.vstack([np.eye(k) * a, -np.eye(k) * a])
+    return np.vstack([corners, axial, np.zeros((center, k))])
+
+
+def factor_levels(X, factors):
+    """
+    Coded -> real mapping per factor: numeric factors span their 10th-90th percentile
+    (clipped to the observed range); other factors take their two most frequent values.
+    """
+    levels = {}
+    for f in factors:
+        col = X[f]
+        if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col) and col.nunique() > 2:
+            low, high = col.quantile([LOW_QUANTILE, HIGH_QUANTILE])
+            if low == high:
+                low, high = col.min(), col.max()
+            levels[f] = {"kind": "numeric", "low": float(low), "high": float(high),
+                         "min": float(col.min()), "max": float(col.max())}
+        else:
+            top = list(col.value_counts(dropna=True).index[:2])
+            levels[f] = {"kind": "categorical", "low": top[0], "high": top[-1]}
+    return levels
+
+
+def decode(coded, factors, levels, dtypes=None):
+    """
+    Design in coded units -> frame of real factor settings. Categorical factors take
+    their high level for coded values > 0 and low otherwise.
+    """
+    out = {}
+    for j, f in enumerate(factors):
+        lv, x = levels[f], coded[:, j]
+        if lv["kind"] == "numeric":
+            mid, half = (lv["high"] + lv["low"]) / 2, (lv["high"] - lv["low"]) / 2
+            values = np.clip(mid + x * half, lv["min"], lv["max"])
+            if dtypes is not None and pd.api.types.is_integer_dtype(dtypes[f]):
+                values = np.round(values).astype(dtypes[f])
+            out[f] = values
+        else:
+            out[f] = np.where(x > 0, lv["high"], lv["low"])
+    return pd.DataFrame(out, columns=factors)
+
+
+def effective_coded(settings, factors, levels):
+    """
+    Real settings -> coded units again, so rounding/clipping is reflected in the fit.
+    """
+    cols = []
+    for f in factors:
+        lv = levels[f]
+        if lv["kind"] == "numeric":
+            half = (lv["high"] - lv["low"]) / 2 or 1.0
+            cols.append((settings[f].to_numpy(dtype=float) - (lv["high"] + lv["low"]) / 2) / half)
+        else:
+            cols.append(np.where(settings[f].to_numpy() == lv["high"], 1.0, -1.0))
+    return np.column_stack(cols)
+
+
+def score_design(model, settings, background, output=-1):
+    """
+    Mean model response at every design point over the background rows: all
+    points x rows go through one batched inference.
+    """
+    m, n = len(settings), len(background)
+    batch = {}
+    for col in background.columns:
+        if col in settings.columns:
+            batch[col] = np.repeat(settings[col].to_numpy(), n)
+        else:
+            batch[col] = np.tile(background[col].to_numpy(), m)
+    frame = pd.DataFrame(batch, columns=background.columns)
+    for col in settings.columns:
+        if frame[col].dtype != background[col].dtype:
+            try:
+                frame[col] = frame[col].astype(background[col].dtype)
+            except (TypeError, ValueError):
+                pass
+    proba, labels = score_batch(model, frame)
+    response = proba[:, output] if proba is not None else np.asarray(labels, dtype=float)
+    return response.reshape(m, n).mean(axis=1)
+
+
+def model_matrix(coded, factors, interactions=True, quadratic=False):
+    """
+    Intercept, main effects, two-factor interactions and (optionally) squared terms.
+    """
+    columns, names = [np.ones(len(coded))], ["Intercept"]
+    for j, f in enumerate(factors):
+        columns.append(coded[:, j])
+        names.append(f)
+    if interactions:
+        for a, b in itertools.combinations(range(len(factors)), 2):
+            columns.append(coded[:, a] * coded[:, b])
+            names.append(f"{factors[a]} × {factors[b]}")
+    if quadratic:
+        for j, f in enumerate(factors):
+            columns.append(coded[:, j] ** 2)
+            names.append(f"{f}²")
+    return np.column_stack(columns), names
+
+
+def fit_effects(coded, response, factors, interactions=True, quadratic=False):
+    """
+    Least-squares fit of the effects model in one vectorised solve. Terms that are
+    constant or identical (up to sign) to an earlier term are aliased, not estimated.
+    Effect is the classic high-minus-low difference (2 x coefficient).
+    """
+    M, names = model_matrix(coded, factors, interactions, quadratic)
+    keep, alias = [], {}
+    for j in range(M.shape[1]):
+        col = M[:, j]
+        match = None
+        if j > 0 and np.ptp(col) == 0:
+            match = "Intercept"
+        for i in keep:
+            if match is None and (np.allclose(col, M[:, i]) or np.allclose(col, -M[:, i])):
+                match = names[i]
+        if match is None:
+            keep.append(j)
+        else:
+            alias[names[j]] = match
+    coef, *_ = np.linalg.lstsq(M[:, keep], response, rcond=None)
+    fitted = M[:, keep] @ coef
+    ss_res = float(((response - fitted) ** 2).sum())
+    ss_tot = float(((response - response.mean()) ** 2).sum())
+
+    effects = pd.DataFrame({
+        "Term": [names[j] for j in keep],
+        "Coefficient": coef,
+        "Effect": 2 * coef,
+    })
+    effects["Type"] = ["Intercept"] + [
+        "Quadratic" if t.endswith("²") else "Interaction" if " × " in t else "Main" for t in effects["Term"][1:]
+    ]
+    aliased = pd.DataFrame({"Term": list(alias), "Aliased With": list(alias.values())})
+    r2 = 1 - ss_res / ss_tot if ss_tot > 0 else 1.0
+    return effects, aliased, r2
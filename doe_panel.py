@@ -1,10 +1,19 @@
 # doe_panel.py
+import time
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import shap
 from sklearn.preprocessing import LabelEncoder
+from ale import get_ale, get_ale_2d, numeric_features
+from doe_designs import (
+    DESIGNS, central_composite, decode, effective_coded, factor_levels, fit_effects, fractional_factorial,
+    fractional_options, full_factorial, latin_hypercube, score_design,
+)
+from shap_service import get_explanation, mean_abs_shap, render_interaction_ranking
+from tpot_connector import _tpot_cache
 
 def run_doe_panel(df=None, model=None):
     st.markdown("""
@@ -13,30 +22,40 @@ def run_doe_panel(df=None, model=None):
     Explore how key drivers affect survival predictions and uncover key interactions.
     """)
 
+    # Fall back to the latest AutoML model and its training data when nothing is passed in
+    target = 'Survived'
+    if model is None:
+        model = _tpot_cache.get("latest_tpot_model")
+    if df is None:
+        X_train, y_train = _tpot_cache.get("latest_X_train"), _tpot_cache.get("latest_y_train")
+        if isinstance(X_train, pd.DataFrame) and y_train is not None:
+            target = getattr(y_train, "name", None) or target
+            df = X_train.assign(**{target: np.asarray(y_train)})
+            encode = False
+    else:
+        encode = True
+
     if df is None or model is None:
-        st.warning("Missing dataset or model. Please ensure both are passed into DOE panel.")
+        st.warning("Missing dataset or model. Please run AutoML first or pass both into the DOE panel.")
         return
 
     df = df.copy()
-    if 'Survived' not in df.columns:
-        st.error("This DOE panel expects a 'Survived' target column.")
+    if target not in df.columns:
+        st.error(f"This DOE panel expects a '{target}' target column.")
         return
 
-    # Encode categoricals
-    for col in df.select_dtypes(include='object').columns:
-        le = LabelEncoder()
-        df[col] = le.fit_transform(df[col].astype(str))
+    # Encode categoricals (the cached training data is already in the model's input format)
+    if encode:
+        for col in df.select_dtypes(include='object').columns:
+            le = LabelEncoder()
+            df[col] = le.fit_transform(df[col].astype(str))
 
-    X = df.drop(columns=['Survived'])
-    y = df['Survived']
+    X = df.drop(columns=[target])
+    y = df[target]
 
     # SHAP ranking of features
     try:
-        explainer = shap.Explainer(model, X)
-        shap_values = explainer(X)
-        shap_df = pd.DataFrame(shap_values.values, columns=X.columns)
-        mean_abs_shap = shap_df.abs().mean().sort_values(ascending=False)
-        top_features = mean_abs_shap.head(8).index.tolist()
+        top_features = mean_abs_shap(get_explanation(model, X)).head(8).index.tolist()
     except Exception as e:
         st.error(f"SHAP computation failed: {e}")
         top_features = X.columns[:8].tolist()
@@ -50,28 +69,176 @@ def run_doe_panel(df=None, model=None):
         st.info("Select at least two factors for interaction exploration.")
         return
 
+    # Designed experiment against the model: every run is scored in one batched call
+    st.markdown("### 🧮 Model-Based Designed Experiment")
+    k = len(selected_factors)
+    design_type = st.selectbox("📐 Design", DESIGNS)
+    c1, c2 = st.columns(2)
+    n_background = c1.slider("Background rows per run", 10, min(500, len(X)), min(100, len(X)),
+                             help="Non-design features are taken from these sampled rows and the response averaged.")
+    generators, quadratic = [], False
+    try:
+        if design_type == "Full Factorial":
+            coded = full_factorial(k)
+        elif design_type == "Fractional Factorial":
+            options = fractional_options(k)
+            if not options:
+                st.info(f"No standard fraction for {k} factors; using the full factorial.")
+                coded = full_factorial(k)
+            else:
+                p = c2.selectbox("Fraction p in 2^(k-p)", options, index=len(options) - 1)
+                coded, generators = fractional_factorial(k, p)
+        elif design_type == "Latin Hypercube":
+            n_runs = c2.slider("Runs", 2 * k + 1, 20 * k, 10 * k)
+            coded = latin_hypercube(k, n_runs)
+        else:
+            alpha = c2.selectbox("Axial distance", ["rotatable", "face-centred"])
+            coded = central_composite(k, alpha=alpha)
+            quadratic = True
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return
+
+    levels = factor_levels(X, selected_factors)
+    with st.expander("🎚️ Factor Levels (coded −1 / +1)"):
+        st.dataframe(pd.DataFrame({f: {"Low (−1)": lv["low"], "High (+1)": lv["high"], "Kind": lv["kind"]}
+                                   for f, lv in levels.items()}).T)
+        if generators:
+            st.write("Generators: " + ", ".join(generators))
+
+    settings = decode(coded, selected_factors, levels, X.dtypes)
+    background = X.sample(n=n_background, random_state=42) if n_background < len(X) else X
+    start = time.perf_counter()
+    try:
+        response = score_design(model, settings, background)
+    except Exception as e:
+        st.error(f"❌ Scoring the design failed: {type(e).__name__}: {e}")
+        return
+    coded = effective_coded(settings, selected_factors, levels)
+    effects, aliased, r2 = fit_effects(coded, response, selected_factors, quadratic=quadratic)
+    elapsed = time.perf_counter() - start
+    st.caption(f"⚡ {len(settings)} runs × {len(background)} rows = {len(settings) * len(background):,} "
+               f"predictions in one batch; effects fitted by least squares in {elapsed:.2f}s (R² = {r2:.3f}).")
+
+    # Pareto of effects
+    st.markdown("### 📈 Effects Pareto")
+    terms = effects[effects["Type"] != "Intercept"].assign(Abs=lambda d: d["Effect"].abs())
+    top = terms.sort_values("Abs", ascending=False).head(15)
+    palette = {"Main": "tab:blue", "Interaction": "tab:orange", "Quadratic": "tab:green"}
+    fig, ax = plt.subplots(figsize=(6, 0.35 * len(top) + 1))
+    ax.barh(top["Term"][::-1], top["Effect"][::-1], color=[palette[t] for t in top["Type"][::-1]])
+    ax.axvline(0, color="grey", linewidth=0.8)
+    ax.set_xlabel(f"Effect on predicted {target} (high − low)")
+    st.pyplot(fig)
+    st.dataframe(terms.drop(columns="Abs").sort_values("Effect", key=abs, ascending=False).round(4),
+                 use_container_width=True)
+    if len(aliased):
+        with st.expander(f"🔗 Aliased Terms ({len(aliased)})"):
+            st.dataframe(aliased, use_container_width=True)
+
     # Main Effects
     st.markdown("### 📈 Main Effects Plot")
-    for factor in selected_factors:
-        fig, ax = plt.subplots()
-        sns.barplot(x=factor, y='Survived', data=df, estimator='mean', ci=None, ax=ax)
-        ax.set_title(f"Main Effect: {factor} vs Survival")
+    cols = min(k, 4)
+    rows = int(np.ceil(k / cols))
+    fig, axes = plt.subplots(rows, cols, figsize=(3 * cols, 2.5 * rows), squeeze=False, sharey=True)
+    for j, (ax, factor) in enumerate(zip(axes.ravel(), selected_factors)):
+        lo, hi = response[coded[:, j] < 0].mean(), response[coded[:, j] > 0].mean()
+        ax.plot([-1, 1], [lo, hi], marker="o")
+        ax.set_xticks([-1, 1])
+        ax.set_xticklabels([str(levels[factor]["low"])[:8], str(levels[factor]["high"])[:8]])
+        ax.set_title(factor)
+    for ax in axes.ravel()[k:]:
+        ax.axis("off")
+    fig.tight_layout()
+    st.pyplot(fig)
+
+    if st.checkbox("📊 Show raw survival means per factor", value=False):
+        for factor in selected_factors:
+            fig, ax = plt.subplots()
+            sns.barplot(x=factor, y=target, data=df, estimator='mean', errorbar=None, ax=ax)
+            ax.set_title(f"Main Effect: {factor} vs Survival")
+            st.pyplot(fig)
+
+    # Model-based main effects: ALE stays within the data, so correlated factors (Pclass/Fare) don't leak
+    st.markdown("### 📏 Model Main Effects (ALE)")
+    numeric_factors = [f for f in selected_factors if f in numeric_features(X)]
+    try:
+        ale, classes = get_ale(model, X)
+    except Exception as e:
+        ale, classes = {}, None
+        st.warning(f"⚠️ ALE computation failed: {type(e).__name__}: {e}")
+    output = len(classes) - 1 if classes is not None else 0
+    shown = [f for f in numeric_factors if f in ale]
+    if shown:
+        cols = min(len(shown), 3)
+        rows = int(np.ceil(len(shown) / cols))
+        fig, axes = plt.subplots(rows, cols, figsize=(4 * cols, 3 * rows), squeeze=False)
+        for ax, factor in zip(axes.ravel(), shown):
+            ax.plot(ale[factor]["edges"], ale[factor]["ale"][:, output], marker="o", markersize=3)
+            ax.axhline(0, color="grey", linewidth=0.8)
+            ax.set_title(factor)
+        for ax in axes.ravel()[len(shown):]:
+            ax.axis("off")
+        fig.tight_layout()
         st.pyplot(fig)
 
     # Interaction
     st.markdown("### 🔄 Interaction Explorer")
-    f1 = st.selectbox("Factor 1:", selected_factors)
-    f2 = st.selectbox("Factor 2:", [f for f in selected_factors if f != f1])
+    # Rank candidate pairs by cached SHAP interaction strength (tree models) or the fitted design effects
+    pairs = render_interaction_ranking(model, X, selected_factors)
+    if pairs is not None and len(pairs):
+        best_pair = [pairs["Factor 1"].iloc[0], pairs["Factor 2"].iloc[0]]
+    else:
+        ranked = terms[terms["Type"] == "Interaction"].sort_values("Abs", ascending=False)
+        best_pair = ranked["Term"].iloc[0].split(" × ") if len(ranked) else selected_factors[:2]
+    f1 = st.selectbox("Factor 1:", selected_factors, index=selected_factors.index(best_pair[0]))
+    others = [f for f in selected_factors if f != f1]
+    f2 = st.selectbox("Factor 2:", others, index=others.index(best_pair[1]) if best_pair[1] in others else 0)
+    j1, j2 = selected_factors.index(f1), selected_factors.index(f2)
     fig, ax = plt.subplots()
-    sns.pointplot(x=f1, y='Survived', hue=f2, data=df, ax=ax)
-    ax.set_title(f"Interaction: {f1} × {f2} on Survival")
+    for sign, label in ((-1, levels[f2]["low"]), (1, levels[f2]["high"])):
+        means = [response[(np.sign(coded[:, j1]) == a) & (np.sign(coded[:, j2]) == sign)].mean() for a in (-1, 1)]
+        ax.plot([-1, 1], means, marker="o", label=f"{f2} = {label}")
+    ax.set_xticks([-1, 1])
+    ax.set_xticklabels([str(levels[f1]["low"]), str(levels[f1]["high"])])
+    ax.set_xlabel(f1)
+    ax.set_ylabel(f"Predicted {target}")
+    ax.legend()
+    ax.set_title(f"Interaction: {f1} × {f2} on Survival (model)")
     st.pyplot(fig)
 
+    if f1 in numeric_factors and f2 in numeric_factors:
+        try:
+            pair, _ = get_ale_2d(model, X, f1, f2)
+            e1, e2 = pair["edges"]
+            fig, ax = plt.subplots()
+            mesh = ax.pcolormesh(e2, e1, pair["ale"][:, :, output], cmap="coolwarm", shading="gouraud")
+            fig.colorbar(mesh, ax=ax, label="2-D ALE")
+            ax.set_xlabel(f2)
+            ax.set_ylabel(f1)
+            ax.set_title(f"Pure Interaction (2-D ALE): {f1} × {f2}")
+            st.pyplot(fig)
+        except Exception as e:
+            st.warning(f"⚠️ 2-D ALE failed: {type(e).__name__}: {e}")
+
     # DOE Summary Table
     st.markdown("### 📊 Top Factor Combinations")
-    summary = df.groupby(selected_factors)['Survived'].mean().reset_index().sort_values(by='Survived', ascending=False)
-    st.dataframe(summary.head(20))
+    summary = settings.assign(**{f"Predicted {target}": response})
+    st.dataframe(summary.sort_values(f"Predicted {target}", ascending=False).head(20), use_container_width=True)
 
     # Auto Interpretation
     st.markdown("### 🧠 Auto Interpretation")
-    st.success("Upcoming: This section will highlight statistically interesting interactions, suggest DOE refinements, and visualize marginal effects.")
+    mains = terms[terms["Type"] == "Main"].sort_values("Abs", ascending=False)
+    pairs = terms[terms["Type"] == "Interaction"].sort_values("Abs", ascending=False)
+    notes = [f"- **{r.Term}** {'raises' if r.Effect > 0 else 'lowers'} predicted {target} by {abs(r.Effect):.3f} "
+             f"from low to high." for r in mains.head(3).itertuples()]
+    if len(pairs):
+        strongest = pairs.iloc[0]
+        notes.append(f"- Strongest interaction: **{strongest['Term']}** (effect {strongest['Effect']:+.3f}).")
+    if len(aliased):
+        notes.append(f"- {len(aliased)} term(s) are aliased in this design; use a larger fraction or the full "
+                     f"factorial to separate them.")
+    if r2 < 0.8:
+        notes.append(f"- The effects model explains only {r2:.0%} of the response; consider a Central Composite "
+                     f"design to capture curvature.")
+    st.success("\n".join(notes) if notes else "No clear effects detected.")
@@ -7,7 +7,7 @@ import seaborn as sns
 import joblib
 import tempfile
 
-from tpot_connector import __dict__ as _tpot_cache
+from tpot_connector import _tpot_cache
 
 
 def run_ensemble_builder():
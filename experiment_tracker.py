@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from tpot_connector import __dict__ as _tpot_cache
+from tpot_connector import _tpot_cache
 
 def run_experiment_tracker():
     st.subheader("📊 Experiment Tracker & CSV Export")
@@ -1,13 +1,16 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
-import shap
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
-from interpret.glassbox import ExplainableBoostingClassifier
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
+from split_registry import holdout
+from utils import lazy_import
+from shap_service import get_explanation, plot_beeswarm
+
+glassbox = lazy_import("interpret.glassbox")
 
 
 def run_explainability_heatmap():
@@ -30,7 +33,7 @@ def run_explainability_heatmap():
 
     # Split data
     test_size = st.slider("Test size (for validation)", 0.1, 0.5, 0.3)
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
+    X_train, X_test, y_train, y_test = holdout(X, y, test_size=test_size, random_state=42).frames()
 
     # Select model for explainability
     model = st.selectbox("Select model for explainability", ["RandomForest", "LogisticRegression", "ExplainableBoosting"])
@@ -40,22 +43,21 @@ def run_explainability_heatmap():
     elif model == "LogisticRegression":
         model_instance = LogisticRegression(max_iter=1000)
     elif model == "ExplainableBoosting":
-        model_instance = ExplainableBoostingClassifier(random_state=42)
+        model_instance = glassbox.ExplainableBoostingClassifier(random_state=42)
 
     model_instance.fit(X_train, y_train)
     st.success(f"✅ {model} model trained!")
 
     # Use SHAP for feature importance (or model-based feature importance)
-    explainer = shap.Explainer(model_instance, X_train)
-    shap_values = explainer(X_test)
+    shap_values = get_explanation(model_instance, X_test, background=X_train)
 
     # Generate a SHAP summary plot
     st.subheader("📊 SHAP Summary Plot")
-    shap.summary_plot(shap_values, X_test)
+    st.pyplot(plot_beeswarm(shap_values))
 
     # Display Feature Importance Heatmap
     st.subheader("🔥 Feature Importance Heatmap")
-    importance = shap_values.abs.mean(axis=0).values  # Absolute SHAP value to get feature importance
+    importance = np.abs(shap_values.values).mean(axis=0)  # Absolute SHAP value to get feature importance
     importance_df = pd.DataFrame(importance, index=X.columns, columns=["Importance"])
     importance_df = importance_df.sort_values(by="Importance", ascending=False)
 
@@ -2,11 +2,13 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import shap
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
-from interpret.glassbox import ExplainableBoostingClassifier
-from interpret import show
+from split_registry import holdout
+from utils import lazy_import
+from shap_service import get_explanation, plot_dependence
+
+interpret = lazy_import("interpret")
+glassbox = lazy_import("interpret.glassbox")
 
 def run_explainable_boosting_visualizer():
     st.header("📈 Explainable Boosting Visualizer")
@@ -19,17 +21,17 @@ def run_explainable_boosting_visualizer():
     y = st.session_state.y
 
     test_size = st.slider("Test size (for validation)", 0.1, 0.5, 0.3)
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
+    X_train, X_test, y_train, y_test = holdout(X, y, test_size=test_size, random_state=42).frames()
 
     with st.spinner("Training Explainable Boosting Classifier..."):
-        ebm = ExplainableBoostingClassifier(random_state=0)
+        ebm = glassbox.ExplainableBoostingClassifier(random_state=0)
         ebm.fit(X_train, y_train)
 
     st.success("✅ EBM model trained!")
 
     st.subheader("Top Global Explanations")
     ebm_global = ebm.explain_global()
-    show(ebm_global)
+    interpret.show(ebm_global)
 
     # Generate model evaluation metrics
     y_pred = ebm.predict(X_test)
@@ -49,8 +51,7 @@ def run_explainable_boosting_visualizer():
 
     # Dynamic Insights Based on SHAP Values
     st.subheader("🔍 SHAP Value Insights")
-    explainer = shap.Explainer(ebm, X_train)
-    shap_values = explainer(X_test)
+    shap_values = get_explanation(ebm, X_test, background=X_train)
     
     # Display SHAP values for a specific feature
     feature_importances = pd.Series(ebm.feature_importances_, index=X.columns)
@@ -75,8 +76,7 @@ def run_explainable_boosting_visualizer():
     st.subheader("SHAP Dependence Plots for Top Features")
     for feature in feature_importances.index[:3]:
         st.markdown(f"#### {feature} SHAP Dependence Plot")
-        shap.dependence_plot(feature, shap_values.values, X_test)
-        st.pyplot()
+        st.pyplot(plot_dependence(shap_values, feature))
 
     # Optional PDF inclusion toggle
     st.session_state.include_ebm_pdf = st.checkbox("🧾 Include this chart in the PDF report")
@@ -3,13 +3,9 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.ensemble import RandomForestClassifier
-import shap
+from shap_service import get_explanation
 
-try:
-    from tpot_connector import latest_tpot_model, latest_X_train
-except ImportError:
-    latest_tpot_model = None
-    latest_X_train = None
+from tpot_connector import _tpot_cache
 
 
 # --- Refactored Purpose and Run Function ---
@@ -43,8 +39,7 @@ def show_feature_importance_panel():
         }).sort_values("Importance", ascending=False).reset_index(drop=True)
 
     def get_shap_importance(model, X):
-        explainer = shap.Explainer(model, X)
-        shap_values = explainer(X)
+        shap_values = get_explanation(model, X)
         mean_abs_shap = np.abs(shap_values.values).mean(axis=0)
         return pd.DataFrame({
             "Feature": X.columns,
@@ -109,8 +104,8 @@ def show_feature_importance_panel():
         st.markdown("---")
         st.subheader("📦 No Files? Compare Live TPOT Model")
 
-        model = st.session_state.get("loaded_model", latest_tpot_model)
-        X_train = latest_X_train
+        model = st.session_state.get("loaded_model", _tpot_cache.get("latest_tpot_model"))
+        X_train = _tpot_cache.get("latest_X_train")
 
         if model is not None and X_train is not None:
             st.info("Showing SHAP-based feature importance from current model")
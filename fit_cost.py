@@ -0,0 +1,106 @@
+# fit_cost.py
+
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score
+
+from search_space import SEARCH_SPACES, build_model
+from split_registry import holdout
+from tpot_connector import _tpot_cache
+
+# Probe subsample sizes as fractions of the training rows, bounded below and above
+PROBE_FRACTIONS = (0.05, 0.1, 0.2)
+MIN_PROBE_ROWS = 200
+MAX_PROBE_ROWS = 20000
+
+
+def _probe_sizes(n_train):
+    sizes = sorted({int(min(max(n_train * f, MIN_PROBE_ROWS), MAX_PROBE_ROWS, n_train)) for f in PROBE_FRACTIONS})
+    return sizes if len(sizes) > 1 else [max(n_train // 4, 2), n_train]
+
+
+def probe_model(model_name, split, sizes):
+    """
+    Fit `model_name` (default settings) on nested prefixes of the training block and
+    time fit/predict at each size. Returns one row per size.
+    """
+    rows = []
+    X_val, y_val = split.X_test, split.y_test
+    for n in sizes:
+        model = build_model(model_name, {})
+        start = time.perf_counter()
+        model.fit(split.X_train[:n], split.y_train[:n])
+        fit_s = time.perf_counter() - start
+        start = time.perf_counter()
+        preds = model.predict(X_val)
+        predict_s = (time.perf_counter() - start) / max(len(y_val), 1)
+        rows.append({
+            "Model": model_name, "Rows": n, "Fit (s)": fit_s, "Predict (s/row)": predict_s,
+            "Score": accuracy_score(y_val, preds), "Model Bytes": len(pickle.dumps(model)),
+        })
+    return pd.DataFrame(rows)
+
+
+def _loglog(sizes, values, n_full):
+    # value ~ a * n^b fitted in log space; b is clamped to [0, 3] against noisy tiny timings
+    x = np.log(np.asarray(sizes, dtype=float))
+    y = np.log(np.maximum(np.asarray(values, dtype=float), 1e-9))
+    b, a = np.polyfit(x, y, 1) if len(set(sizes)) > 1 else (1.0, y[-1] - x[-1])
+    b = float(np.clip(b, 0.0, 3.0))
+    return float(np.exp(a + b * np.log(n_full))), b
+
+
+def extrapolate(probes, n_full, n_predict, bytes_per_row):
+    """
+    Full-size estimates for one model's probe rows.
+    """
+    fit_s, exponent = _loglog(probes["Rows"], probes["Fit (s)"], n_full)
+    model_bytes, _ = _loglog(probes["Rows"], probes["Model Bytes"], n_full)
+    return {
+        "Model": probes["Model"].iloc[0],
+        "Probe Score": float(probes["Score"].iloc[-1]),
+        "Est. Fit (s)": fit_s,
+        "Fit Scaling (n^b)": round(exponent, 2),
+        "Est. Predict (s)": float(probes["Predict (s/row)"].median()) * n_predict,
+        "Est. Memory (MB)": (bytes_per_row * n_full + model_bytes) / 1024 ** 2,
+    }
+
+
+def rank_candidates(X, y, budget_s, models=None, on_progress=None):
+    """
+    Time quick probes for each candidate, extrapolate to the full data and rank by
+    expected score per second of fitting, feasible-within-budget models first.
+    Probes are cached per dataset version. Returns (ranking, errors by model).
+    """
+    models = list(models or SEARCH_SPACES)
+    split = holdout(X, y, test_size=0.2, random_state=42)
+    n_full = len(split.y_train)
+    sizes = _probe_sizes(n_full)
+    if isinstance(split.X_train, np.ndarray):
+        bytes_per_row = split.X_train[:1].nbytes
+    else:
+        bytes_per_row = X.memory_usage(deep=True).sum() / max(len(X), 1)
+
+    rows, errors = [], {}
+    for i, name in enumerate(models):
+        try:
+            probes = _tpot_cache.get_or_compute(
+                f"fit_probe:{name}", lambda: probe_model(name, split, sizes),
+                version=f"{_tpot_cache.dataset_version()}-{'-'.join(map(str, sizes))}",
+            )
+            rows.append(extrapolate(probes, n_full, len(X), bytes_per_row))
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+        if on_progress:
+            on_progress(name, i + 1, len(models))
+
+    ranking = pd.DataFrame(rows, columns=["Model", "Probe Score", "Est. Fit (s)", "Fit Scaling (n^b)",
+                                          "Est. Predict (s)", "Est. Memory (MB)"])
+    ranking["Score / s"] = ranking["Probe Score"] / ranking["Est. Fit (s)"].clip(lower=1e-3)
+    ranking["Fits in Budget"] = np.floor(budget_s / ranking["Est. Fit (s)"].clip(lower=1e-3)).astype(int)
+    ranking["Feasible"] = ranking["Fits in Budget"] >= 1
+    ranking = ranking.sort_values(["Feasible", "Score / s"], ascending=[False, False]).reset_index(drop=True)
+    return ranking, errors
@@ -1,10 +1,10 @@
 # golden_qna_shap.py
 import streamlit as st
 import pandas as pd
-import shap
 import matplotlib.pyplot as plt
 import numpy as np
 from tpot_connector import get_latest_model_and_data
+from shap_service import get_explanation, plot_waterfall, render_background_controls
 
 def run_golden_qna_shap():
     st.header("🔮 Golden Q&A: SHAP-Powered Explanations")
@@ -25,14 +25,15 @@ def run_golden_qna_shap():
         return
 
     # SHAP explainer setup
-    explainer = shap.Explainer(model.predict, X_train)
-    shap_values = explainer(X_train)
+    render_background_controls([model])
 
     st.markdown("This module provides smart answers to golden questions using SHAP explanations.")
 
     row_idx = st.number_input("Select row for SHAP explanation:", min_value=0, max_value=len(X_train)-1, value=0)
     row_data = X_train.iloc[[row_idx]]
-    shap_row = shap_values[row_idx]
+    # Explain only the selected row, against the (summarised) training background
+    shap_values = get_explanation(model, row_data, background=X_train, y=y_train)
+    shap_row = shap_values[0]
 
     # Smart SHAP-based answer
     st.subheader("🤖 Smart SHAP-Based Answer")
@@ -58,7 +59,7 @@ def run_golden_qna_shap():
 
     # Optional SHAP plot
     if st.checkbox("🔍 Show SHAP Waterfall Plot"):
-        fig = shap.plots.waterfall(shap_values[row_idx], show=False)
+        fig = plot_waterfall(shap_values, 0)
         st.pyplot(fig)
 
     # Display data row for reference
@@ -0,0 +1,129 @@
+# hpo_executor.py
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import pandas as pd
+import streamlit as st
+
+from hpo_storage import DEFAULT_JOURNAL, get_storage
+from utils import lazy_import
+
+optuna = lazy_import("optuna")
+
+BACKENDS = ["Process pool", "Thread pool"]
+
+
+def _evaluate(study_name, journal, trial_id, objective, pruner):
+    """
+    Worker side: attach to the trial the parent asked for and run the objective.
+    Intermediate reports go straight to the shared storage; the parent tells the result.
+    """
+    start = time.time()
+    worker = f"{os.getpid()}:{threading.current_thread().name}"
+    study = optuna.load_study(study_name=study_name, storage=get_storage(journal), pruner=pruner)
+    trial = optuna.trial.Trial(study, trial_id)
+    try:
+        value, state, error = objective(trial), "complete", None
+    except optuna.TrialPruned:
+        value, state, error = None, "pruned", None
+    except Exception as e:
+        value, state, error = None, "fail", f"{type(e).__name__}: {e}"
+    return {"value": value, "state": state, "error": error, "worker": worker, "start": start, "end": time.time()}
+
+
+class TrialExecutor:
+    """
+    Local scheduler for an Optuna study: the parent asks for trials and tells results,
+    keeping at most `n_workers` in flight on a process (or thread) pool so the sampler
+    always sees the latest finished trials. `objective` must be picklable for processes.
+    """
+
+    def __init__(self, study, objective, n_workers=None, backend="Process pool", pruner=None, journal=DEFAULT_JOURNAL):
+        self.study = study
+        self.objective = objective
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.backend = backend
+        self.pruner = pruner
+        self.journal = journal
+        self.stats = {"queued": 0, "running": 0, "complete": 0, "pruned": 0, "fail": 0, "errors": [], "workers": {}}
+        self._started = None
+
+    def _pool(self):
+        if self.backend == "Thread pool":
+            return ThreadPoolExecutor(max_workers=self.n_workers)
+        return ProcessPoolExecutor(max_workers=self.n_workers)
+
+    def _record(self, result):
+        self.stats[result["state"]] += 1
+        if result["error"]:
+            self.stats["errors"].append(result["error"])
+        w = self.stats["workers"].setdefault(result["worker"], {"trials": 0, "busy": 0.0})
+        w["trials"] += 1
+        w["busy"] += result["end"] - result["start"]
+
+    def run(self, n_trials, on_update=None):
+        """
+        Run `n_trials` trials; `on_update(executor)` is called after every submit/finish.
+        """
+        states = optuna.trial.TrialState
+        self._started = time.time()
+        self.stats["queued"] = n_trials
+        in_flight = {}
+        with self._pool() as pool:
+            while self.stats["queued"] or in_flight:
+                while self.stats["queued"] and len(in_flight) < self.n_workers:
+                    trial = self.study.ask()
+                    future = pool.submit(_evaluate, self.study.study_name, self.journal, trial._trial_id,
+                                         self.objective, self.pruner)
+                    in_flight[future] = trial
+                    self.stats["queued"] -= 1
+                self.stats["running"] = len(in_flight)
+                if on_update:
+                    on_update(self)
+
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    trial = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:  # worker crashed before reporting
+                        result = {"value": None, "state": "fail", "error": f"{type(e).__name__}: {e}",
+                                  "worker": "lost", "start": time.time(), "end": time.time()}
+                    if result["state"] == "complete":
+                        self.study.tell(trial, result["value"])
+                    else:
+                        self.study.tell(trial, state=states.PRUNED if result["state"] == "pruned" else states.FAIL)
+                    self._record(result)
+                self.stats["running"] = len(in_flight)
+                if on_update:
+                    on_update(self)
+        return self.stats
+
+    def utilization(self):
+        """
+        One row per worker: trials run, busy seconds and share of wall-clock spent busy.
+        """
+        elapsed = max(time.time() - (self._started or time.time()), 1e-9)
+        return pd.DataFrame([
+            {"Worker": name, "Trials": w["trials"], "Busy (s)": round(w["busy"], 2),
+             "Utilization": round(min(w["busy"] / elapsed, 1.0), 3)}
+            for name, w in sorted(self.stats["workers"].items())
+        ])
+
+
+def render_executor_status(placeholder, executor):
+    """
+    Live worker/queue panel, refreshed in place via an st.empty() placeholder.
+    """
+    with placeholder.container():
+        s = executor.stats
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Workers", executor.n_workers)
+        c2.metric("Queue Depth", s["queued"])
+        c3.metric("Running", s["running"])
+        c4.metric("Done (✅/✂️/❌)", f"{s['complete']}/{s['pruned']}/{s['fail']}")
+        if s["workers"]:
+            st.dataframe(executor.utilization())
@@ -0,0 +1,85 @@
+# hpo_storage.py
+
+import os
+
+from artifact_store import DEFAULT_ROOT
+from tpot_connector import _tpot_cache
+from utils import lazy_import
+
+optuna = lazy_import("optuna")
+
+STUDY_DIR = os.path.join(DEFAULT_ROOT, "optuna")
+DEFAULT_JOURNAL = "daivid_hpo"
+
+
+def get_storage(journal=DEFAULT_JOURNAL):
+    """
+    Local, multi-process safe Optuna storage: a journal file under the cache dir
+    (SQLite on Optuna releases that predate journal storage).
+    """
+    os.makedirs(STUDY_DIR, exist_ok=True)
+    path = os.path.join(STUDY_DIR, f"{journal}.log")
+    storages = optuna.storages
+    try:
+        from optuna.storages.journal import JournalFileBackend  # Optuna >= 4.0
+        return storages.JournalStorage(JournalFileBackend(path))
+    except ImportError:
+        pass
+    if hasattr(storages, "JournalFileStorage"):  # Optuna 3.1 - 3.6
+        return storages.JournalStorage(storages.JournalFileStorage(path))
+    return f"sqlite:///{os.path.join(STUDY_DIR, journal + '.db')}"
+
+
+def study_name(prefix, family, *parts):
+    """
+    Study id for one model family on the current dataset version, e.g. trainer-XGBoost-AUC-1a2b3c.
+    """
+    version = _tpot_cache.dataset_version() or "nodata"
+    tokens = [prefix, family, *[str(p) for p in parts if p is not None], version]
+    return "-".join(t.replace(" ", "_") for t in tokens)
+
+
+def load_or_create_study(name, direction="maximize", sampler=None, pruner=None, journal=DEFAULT_JOURNAL):
+    """
+    Resume the persisted study `name`, creating it on first use.
+    """
+    return optuna.create_study(
+        study_name=name,
+        storage=get_storage(journal),
+        direction=direction,
+        sampler=sampler,
+        pruner=pruner,
+        load_if_exists=True,
+    )
+
+
+def delete_study(name, journal=DEFAULT_JOURNAL):
+    try:
+        optuna.delete_study(study_name=name, storage=get_storage(journal))
+    except KeyError:
+        pass
+
+
+def completed_trials(study):
+    return [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+
+
+PRUNERS = ["Median", "Hyperband", "Successive Halving", "None"]
+
+
+def make_pruner(name, n_steps):
+    """
+    Pruner for objectives that report `n_steps` intermediate values (step 0 .. n_steps - 1).
+    """
+    pruners = optuna.pruners
+    if name == "Median":
+        return pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=0)
+    if name == "Hyperband":
+        return pruners.HyperbandPruner(min_resource=1, max_resource=max(n_steps, 1))
+    if name == "Successive Halving":
+        return pruners.SuccessiveHalvingPruner(min_resource=1)
+    return pruners.NopPruner()
+
+
+def pruned_trials(study):
+    return [t for t in study.trials if t.state == optuna.trial.TrialState.PRUNED]
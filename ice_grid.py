@@ -0,0 +1,110 @@
+# ice_grid.py
+
+import numpy as np
+import pandas as pd
+
+from artifact_store import fingerprint
+from batch_inference import candidate_values, perturbation_batch, score_batch
+from shap_service import model_fingerprint
+from tpot_connector import _tpot_cache
+
+GRID_POINTS = 20
+SAMPLE_ROWS = 200
+# Upper bound on rows in the single grid batch; the row sample shrinks to fit
+MAX_BATCH_ROWS = 200000
+
+
+def feature_grid(X, col, grid_points=GRID_POINTS):
+    """
+    Grid values for one feature: evenly spaced observed quantiles for numeric columns,
+    the most frequent categories plus missing otherwise.
+    """
+    series = X[col]
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        observed = series.dropna().to_numpy()
+        if len(observed) == 0:
+            return [0]
+        return list(np.unique(np.quantile(observed, np.linspace(0, 1, grid_points), method="nearest")))
+    return candidate_values(X, col)[0]
+
+
+class ICEGrid:
+    """
+    ICE curves for every feature over a row sample, scored in one batched inference.
+    `ice[col]` is (rows, grid points, outputs); outputs are class probabilities, or the
+    prediction itself for models without predict_proba. PD is the mean ICE curve.
+    """
+
+    def __init__(self, model, X, grid_points=GRID_POINTS, sample_rows=SAMPLE_ROWS, seed=0):
+        self.columns = list(X.columns)
+        self.grids = {col: feature_grid(X, col, grid_points) for col in self.columns}
+        width = 1 + sum(len(g) for g in self.grids.values())
+        n = max(min(sample_rows, len(X), MAX_BATCH_ROWS // width), 1)
+        sample = X.sample(n=n, random_state=seed) if n < len(X) else X
+        self.sample_index = sample.index
+
+        batch, _ = perturbation_batch(sample, self.grids)
+        proba, labels = score_batch(model, batch)
+        if proba is None:
+            self.classes = None
+            out = np.asarray(labels, dtype=float).reshape(n, width, 1)
+        else:
+            self.classes = np.asarray(getattr(model, "classes_", np.arange(proba.shape[1])))
+            out = proba.reshape(n, width, -1)
+
+        self.baseline = out[:, 0].mean(axis=0)
+        self.ice, self.pd = {}, {}
+        start = 1
+        for col in self.columns:
+            stop = start + len(self.grids[col])
+            self.ice[col] = out[:, start:stop]
+            self.pd[col] = self.ice[col].mean(axis=0)
+            start = stop
+
+    @property
+    def n_rows(self):
+        return len(self.sample_index)
+
+    def is_numeric(self, col):
+        return all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in self.grids[col])
+
+    def pd_at(self, col, value):
+        """
+        PD value(s) of one feature at `value`: linear interpolation on numeric grids,
+        exact lookup on categorical ones (unseen categories contribute nothing).
+        """
+        grid, curve = self.grids[col], self.pd[col]
+        if self.is_numeric(col) and value is not None:
+            x = np.asarray(grid, dtype=float)
+            return np.array([np.interp(float(value), x, curve[:, k]) for k in range(curve.shape[1])])
+        for i, g in enumerate(grid):
+            if g is value or (g is not None and value is not None and g == value):
+                return curve[i]
+        return self.baseline
+
+    def estimate(self, point):
+        """
+        Additive PD estimate for one input (dict of feature -> value): the mean
+        prediction plus each feature's PD offset. Probabilities are clipped and renormalised.
+        """
+        est = self.baseline + sum(self.pd_at(col, point.get(col)) - self.baseline for col in self.columns)
+        if self.classes is None:
+            return est
+        est = np.clip(est, 0.0, 1.0)
+        total = est.sum()
+        return est / total if total > 0 else np.full_like(est, 1.0 / len(est))
+
+    def predicted_label(self, estimate):
+        return self.classes[int(np.argmax(estimate))] if self.classes is not None else float(estimate[0])
+
+
+def get_ice_grid(model, X, grid_points=GRID_POINTS, sample_rows=SAMPLE_ROWS, key=None):
+    """
+    ICE/PD grid for this model and data, computed once and kept on disk per model
+    fingerprint. Pass the store key of X (e.g. "X_train") to reuse its known hash.
+    """
+    digest = _tpot_cache.hash_of(key) if key is not None and key in _tpot_cache else None
+    version = f"{model_fingerprint(model)[:12]}-{(digest or fingerprint(X))[:8]}-g{grid_points}-n{sample_rows}"
+    return _tpot_cache.get_or_compute(
+        "ice_grid", lambda: ICEGrid(model, X, grid_points, sample_rows), version=version,
+    )
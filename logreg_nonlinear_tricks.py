@@ -3,7 +3,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
+from split_registry import holdout
+from search_space import max_poly_degree
+from tpot_connector import _tpot_cache
 from sklearn.metrics import classification_report, ConfusionMatrixDisplay
 import matplotlib.pyplot as plt
 from sklearn.preprocessing import PolynomialFeatures
@@ -24,14 +26,23 @@ def run_logreg_nonlinear_tricks():
         return
 
     st.subheader("🔁 Polynomial Feature Expansion")
-    degree = st.slider("Select polynomial degree", 1, 5, 2)
+    # The Smart HPO VC-dimension limit caps how far the linear model may be expanded
+    vc_dim = (_tpot_cache.get("last_hpo_config") or {}).get("vc_dim")
+    max_degree = max_poly_degree(X.shape[1], vc_dim) if vc_dim else 5
+    if max_degree > 1:
+        degree = st.slider("Select polynomial degree", 1, max_degree, min(2, max_degree))
+    else:
+        degree = 1
+    if vc_dim:
+        st.caption(f"🧮 VC limit {vc_dim} allows degree ≤ {max_degree} for {X.shape[1]} features.")
     poly = PolynomialFeatures(degree=degree, include_bias=False)
     X_expanded = poly.fit_transform(X)
     feature_names = poly.get_feature_names_out(X.columns)
 
     st.write(f"Expanded features: {len(feature_names)}")
 
-    X_train, X_test, y_train, y_test = train_test_split(X_expanded, y, test_size=0.2, random_state=42)
+    split = holdout(X_expanded, y, test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = split.X_train, split.X_test, split.y_train, split.y_test
 
     model = LogisticRegression(max_iter=5000)
     model.fit(X_train, y_train)
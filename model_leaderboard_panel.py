@@ -2,11 +2,11 @@
 
 import streamlit as st
 import pandas as pd
-import shap
 import matplotlib.pyplot as plt
 from datetime import datetime
 from tpot_connector import _tpot_cache
 from automl_launcher import run_automl_launcher
+from shap_service import get_explanation, explain_models, to_explanation, plot_waterfall, render_background_controls, render_parallel_controls, units_of
 
 if "model_times" not in _tpot_cache:
     _tpot_cache["model_times"] = {}
@@ -31,24 +31,40 @@ def run_model_leaderboard_panel():
     X_test = _tpot_cache.get("X_test")
     y_test = _tpot_cache.get("y_test")
     X_train = _tpot_cache.get("X_train")
+    y_train = _tpot_cache.get("y_train")
+    render_background_controls(models.values())
+    max_workers, timeout = render_parallel_controls()
+
+    shap_records, shap_status = {}, {}
+    if X_train is not None and models:
+        progress = st.progress(0.0, text="Computing SHAP values...")
+        shap_records, shap_status = explain_models(
+            models, X_train.iloc[:100], background=X_train, y=y_train,
+            max_workers=max_workers, timeout=timeout,
+            on_progress=lambda name, state, done, total: progress.progress(done / total, text=f"{name}: {state} ({done}/{total})")
+        )
 
     rows = []
 
     for name, model in models.items():
         acc = "-"
         shap_total = "-"
+        shap_explainer = "-"
+        shap_units = "-"
+        shap_seconds = "-"
         feature_count = len(X_train.columns) if X_train is not None else "-"
         dataset_size = len(X_train) if X_train is not None else "-"
         try:
             if hasattr(model, "predict") and X_test is not None and y_test is not None:
                 acc = model.score(X_test, y_test)
-            if X_train is not None:
-                try:
-                    explainer = shap.Explainer(model.predict, X_train)
-                    shap_values = explainer(X_train[:100])
-                    shap_total = float(abs(shap_values.values).sum())
-                except:
-                    pass
+            record = shap_records.get(name)
+            if record is not None:
+                shap_total = float(abs(to_explanation(record).values).sum())
+                shap_explainer = record["explainer"]
+                shap_units = units_of(record)
+                shap_seconds = round(record["seconds"], 3)
+            elif name in shap_status:
+                shap_explainer = shap_status[name]
         except:
             pass
 
@@ -68,6 +84,9 @@ def run_model_leaderboard_panel():
             "Type": type(model).__name__,
             "Accuracy": acc,
             "SHAP Total": shap_total,
+            "SHAP Explainer": shap_explainer,
+            "SHAP Units": shap_units,
+            "SHAP Time (s)": shap_seconds,
             "Feature Count": feature_count,
             "Dataset Size": dataset_size,
             "Trained At": timestamp,
@@ -93,8 +112,11 @@ def run_model_leaderboard_panel():
         if not df_filtered.empty:
             best_accuracy = df_filtered.loc[df_filtered["Accuracy"].astype(float).idxmax()]
             st.success(f"Top Accuracy: {best_accuracy['Model Name']} ({best_accuracy['Accuracy']:.3f})")
-            best_shap = df_filtered.loc[df_filtered["SHAP Total"].astype(float).idxmax()]
-            st.info(f"Most Interpretable: {best_shap['Model Name']} (SHAP: {best_shap['SHAP Total']:.1f})")
+            # SHAP totals are only comparable within one output scale (probability vs log-odds)
+            shap_rows = df_filtered[pd.to_numeric(df_filtered["SHAP Total"], errors="coerce").notna()]
+            for units, group in shap_rows.groupby("SHAP Units"):
+                best_shap = group.loc[group["SHAP Total"].astype(float).idxmax()]
+                st.info(f"Most Interpretable ({units}): {best_shap['Model Name']} (SHAP: {best_shap['SHAP Total']:.1f})")
 
             if st.button("📌 Promote Top Accuracy to Saved Models"):
                 model_obj = models.get(best_accuracy["Model Name"].replace(" 🥇", ""))
@@ -123,10 +145,10 @@ def run_model_leaderboard_panel():
 
                 if X_train is not None:
                     try:
-                        explainer = shap.Explainer(model.predict, X_train)
-                        shap_values = explainer(X_train[:1])
+                        # Same cached matrix as the leaderboard's SHAP Total column
+                        shap_values = get_explanation(model, X_train.iloc[:100], background=X_train, y=y_train)
                         st.markdown("#### 🔍 SHAP Waterfall Plot (First Row)")
-                        fig = shap.plots.waterfall(shap_values[0], show=False)
+                        fig = plot_waterfall(shap_values, 0)
                         st.pyplot(fig)
                     except Exception as e:
                         st.warning(f"SHAP plot error: {e}")
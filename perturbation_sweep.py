@@ -0,0 +1,130 @@
+# perturbation_sweep.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+NOISE_LEVELS = tuple(range(0, 55, 5))
+# Rows per scored batch; each batch holds whole (noise level, repeat) copies of the test set
+CHUNK_ROWS = 100000
+BAND = (2.5, 97.5)
+
+
+def draw_noise(X, features, repeats, seed=0, missing_rate=0.0):
+    """
+    One independently seeded draw per repeat (SeedSequence.spawn): standard-normal
+    noise for the numeric features and a missing-value mask for all features.
+    The same draw is reused at every noise level, so curves differ only by level.
+    Returns (numeric features, noise (repeats, rows, numeric), mask (repeats, rows, features)).
+    """
+    numeric = [f for f in features if pd.api.types.is_numeric_dtype(X[f]) and not pd.api.types.is_bool_dtype(X[f])]
+    n = len(X)
+    noise = np.empty((repeats, n, len(numeric)))
+    mask = np.zeros((repeats, n, len(features)), dtype=bool)
+    for r, child in enumerate(np.random.SeedSequence(seed).spawn(repeats)):
+        rng = np.random.default_rng(child)
+        noise[r] = rng.standard_normal((n, len(numeric)))
+        if missing_rate > 0:
+            mask[r] = rng.random((n, len(features))) < missing_rate
+    return numeric, noise, mask
+
+
+def perturb(X, features, numeric, noise, mask, levels, jobs):
+    """
+    Stacked perturbed copies of X for (level index, repeat) jobs, built in one
+    vectorised pass: numeric features get multiplicative noise (x * (1 + pct * z)),
+    masked cells become missing. Rows are job-major.
+    """
+    lv = np.asarray(levels, dtype=float)[[j for j, _ in jobs]] / 100.0
+    reps = np.array([r for _, r in jobs])
+    n = len(X)
+    data = {}
+    base = X[numeric].to_numpy(dtype=float, na_value=np.nan)
+    block = base[None] * (1.0 + lv[:, None, None] * noise[reps])
+    for i, col in enumerate(numeric):
+        data[col] = block[:, :, i]
+    for col in X.columns:
+        if col not in data:
+            data[col] = np.tile(X[col].to_numpy(), (len(jobs), 1))
+    for k, col in enumerate(features):
+        hit = mask[reps, :, k]
+        if hit.any():
+            values = data[col]
+            if not np.issubdtype(values.dtype, np.floating):
+                values = values.astype(float if np.issubdtype(values.dtype, np.number) else object)
+            values[hit] = np.nan
+            data[col] = values
+    return pd.DataFrame({col: data[col].reshape(len(jobs) * n) for col in X.columns}, columns=X.columns)
+
+
+def _score_chunk(model, frame, y, y_index, n_jobs):
+    n = len(y)
+    if hasattr(model, "predict_proba"):
+        proba = np.asarray(model.predict_proba(frame)).reshape(n_jobs, n, -1)
+        proba = proba / proba.sum(axis=2, keepdims=True)
+        accuracy = (proba.argmax(axis=2) == y_index).mean(axis=1)
+        p_true = np.take_along_axis(proba, np.broadcast_to(np.maximum(y_index, 0), (n_jobs, n))[..., None], axis=2)[..., 0]
+        # Labels the model has never seen get zero probability
+        p_true = np.where(y_index >= 0, p_true, 0.0)
+        loss = -np.log(np.clip(p_true, np.finfo(proba.dtype).eps, 1.0)).mean(axis=1)
+        return accuracy, loss
+    labels = np.asarray(model.predict(frame)).reshape(n_jobs, n)
+    return (labels == y).mean(axis=1), np.full(n_jobs, np.nan)
+
+
+def sweep(model, X, y, features, levels=NOISE_LEVELS, repeats=20, seed=0, missing_rate=0.0,
+          chunk_rows=CHUNK_ROWS, n_workers=None, on_progress=None):
+    """
+    Accuracy and log loss for every noise level x seeded repeat. All copies are
+    generated in vectorised chunks of about `chunk_rows` rows and the chunks are
+    scored concurrently on a thread pool. Returns one row per (level, repeat).
+    """
+    numeric, noise, mask = draw_noise(X, features, repeats, seed, missing_rate)
+    y = np.asarray(y)
+    classes = np.asarray(getattr(model, "classes_", np.unique(y)))
+    lookup = {c: i for i, c in enumerate(classes)}
+    y_index = np.array([lookup.get(v, -1) for v in y])
+
+    jobs = [(j, r) for j in range(len(levels)) for r in range(repeats)]
+    per_chunk = max(chunk_rows // max(len(X), 1), 1)
+    chunks = [jobs[i:i + per_chunk] for i in range(0, len(jobs), per_chunk)]
+
+    def run(chunk):
+        frame = perturb(X, features, numeric, noise, mask, levels, chunk)
+        return _score_chunk(model, frame, y, y_index, len(chunk))
+
+    results = []
+    with ThreadPoolExecutor(max_workers=n_workers or os.cpu_count() or 1) as pool:
+        for i, (accuracy, loss) in enumerate(pool.map(run, chunks)):
+            results.append((accuracy, loss))
+            if on_progress:
+                on_progress(i + 1, len(chunks))
+
+    accuracy = np.concatenate([a for a, _ in results])
+    loss = np.concatenate([l for _, l in results])
+    return pd.DataFrame({
+        "Noise %": [levels[j] for j, _ in jobs],
+        "Repeat": [r for _, r in jobs],
+        "Accuracy": accuracy,
+        "Log Loss": loss,
+    })
+
+
+def summarize(results, band=BAND):
+    """
+    Per noise level: mean, standard deviation and the Monte-Carlo band (percentiles
+    over repeats) of each metric.
+    """
+    grouped = results.groupby("Noise %")
+    frames = []
+    for metric in ("Accuracy", "Log Loss"):
+        g = grouped[metric]
+        frames.append(pd.DataFrame({
+            f"{metric} Mean": g.mean(),
+            f"{metric} Std": g.std(ddof=1),
+            f"{metric} Low": g.quantile(band[0] / 100),
+            f"{metric} High": g.quantile(band[1] / 100),
+        }))
+    return pd.concat(frames, axis=1).reset_index()
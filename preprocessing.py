@@ -0,0 +1,151 @@
+# preprocessing.py
+
+import inspect
+import os
+
+import numpy as np
+import pandas as pd
+from joblib import Memory
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.compose import ColumnTransformer
+from sklearn.decomposition import PCA
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import (
+    KBinsDiscretizer, MinMaxScaler, OneHotEncoder, OrdinalEncoder, PowerTransformer, RobustScaler, StandardScaler,
+)
+
+from artifact_store import DEFAULT_ROOT
+
+PIPELINE_CACHE_DIR = os.path.join(DEFAULT_ROOT, "pipeline_cache")
+# Least recently used fitted transformers are dropped once the cache exceeds this
+PIPELINE_CACHE_BYTES = 1024 ** 3
+
+SCALERS = {"MinMax": MinMaxScaler, "Z-Score": StandardScaler, "Robust": RobustScaler}
+# sklearn has no supervised (entropy/MDL) binning; Entropy falls back to quantile edges
+BIN_STRATEGIES = {"Quantile": "quantile", "Uniform": "uniform", "Entropy": "quantile"}
+
+
+class BinaryEncoder(BaseEstimator, TransformerMixin):
+    """
+    Categorical -> binary digits of the category code (ceil(log2(k + 1)) columns per feature).
+    Unseen categories map to all zeros.
+    """
+
+    def fit(self, X, y=None):
+        self.ordinal_ = OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1).fit(X)
+        self.widths_ = [max(int(np.ceil(np.log2(len(c) + 1))), 1) for c in self.ordinal_.categories_]
+        return self
+
+    def transform(self, X):
+        codes = self.ordinal_.transform(X).astype(np.int64) + 1
+        bits = [(codes[:, [j]] >> np.arange(w)) & 1 for j, w in enumerate(self.widths_)]
+        return np.hstack(bits).astype(np.float32)
+
+
+def _encoder(encoding):
+    if encoding == "Ordinal":
+        return OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1)
+    if encoding == "Binary":
+        return BinaryEncoder()
+    return OneHotEncoder(handle_unknown="ignore")
+
+
+def _numeric_steps(config, power):
+    steps = [("impute", SimpleImputer(strategy="median"))]
+    if power:
+        steps.append(("power", PowerTransformer(method="yeo-johnson")))
+    if config.get("norm", "None") in SCALERS:
+        steps.append(("scale", SCALERS[config["norm"]]()))
+    method, count = config.get("bins", ("None", 0)) or ("None", 0)
+    if method in BIN_STRATEGIES:
+        steps.append(("bin", KBinsDiscretizer(n_bins=int(count), encode="ordinal", strategy=BIN_STRATEGIES[method])))
+    return steps
+
+
+def needs_preprocessing(config, X):
+    """
+    True when the config asks for any transform, or X has columns an estimator can't take raw.
+    """
+    method = (config.get("bins") or ("None", 0))[0]
+    has_categorical = isinstance(X, pd.DataFrame) and X.select_dtypes(exclude=["number", "bool"]).shape[1] > 0
+    return (config.get("norm", "None") in SCALERS or method in BIN_STRATEGIES or config.get("pca")
+            or bool(config.get("power_transformed_features")) or has_categorical)
+
+
+def build_preprocessor(config, X):
+    """
+    ColumnTransformer for the Smart HPO preprocessing options. Columns are addressed by
+    position, so the same transformer works on frames and on float32 split blocks.
+    """
+    if isinstance(X, pd.DataFrame):
+        columns = list(X.columns)
+        numeric = [i for i, t in enumerate(X.dtypes) if pd.api.types.is_numeric_dtype(t) or pd.api.types.is_bool_dtype(t)]
+    else:
+        columns = list(range(np.shape(X)[1]))
+        numeric = list(range(len(columns)))
+    categorical = [i for i in range(len(columns)) if i not in numeric]
+    wanted = set(config.get("power_transformed_features") or [])
+    power = [i for i in numeric if columns[i] in wanted]
+    plain = [i for i in numeric if columns[i] not in wanted]
+
+    transformers = []
+    if plain:
+        transformers.append(("num", Pipeline(_numeric_steps(config, power=False)), plain))
+    if power:
+        transformers.append(("power", Pipeline(_numeric_steps(config, power=True)), power))
+    if categorical:
+        transformers.append(("cat", Pipeline([
+            ("impute", SimpleImputer(strategy="most_frequent")),
+            ("encode", _encoder(config.get("encoding", "OneHot"))),
+        ]), categorical))
+    return ColumnTransformer(transformers, remainder="drop", sparse_threshold=0.0)
+
+
+def _pipeline_memory():
+    # joblib < 1.3 takes the size limit in the constructor, newer versions in reduce_size()
+    if "bytes_limit" in inspect.signature(Memory.reduce_size).parameters:
+        memory = Memory(PIPELINE_CACHE_DIR, verbose=0)
+        memory.reduce_size(bytes_limit=PIPELINE_CACHE_BYTES)
+    else:
+        memory = Memory(PIPELINE_CACHE_DIR, bytes_limit=PIPELINE_CACHE_BYTES, verbose=0)
+        memory.reduce_size()
+    return memory
+
+
+def build_pipeline(config, estimator, X, cache=True):
+    """
+    preprocess -> [PCA] -> estimator. Fitted transformers are memoised on disk (sklearn
+    `memory=`), so refitting the same data with a different estimator reuses them.
+    The cache is trimmed to PIPELINE_CACHE_BYTES on every build.
+    """
+    steps = [("preprocess", build_preprocessor(config, X))]
+    if config.get("pca"):
+        steps.append(("pca", PCA(n_components=config.get("pca_components") or 0.95, random_state=42)))
+    steps.append(("model", estimator))
+    memory = None
+    if cache:
+        memory = _pipeline_memory()
+    return Pipeline(steps, memory=memory)
+
+
+def final_estimator(model):
+    return model.steps[-1][1] if isinstance(model, Pipeline) else model
+
+
+def fit_transformers(pipeline, X, y):
+    """
+    Fit every step but the estimator (through the cache) and return the transformed X.
+    """
+    if not isinstance(pipeline, Pipeline):
+        return X
+    # A passthrough tail keeps every transformer a non-final, hence cached, step
+    head = Pipeline(pipeline.steps[:-1] + [("model", "passthrough")], memory=pipeline.memory)
+    Xt = head.fit_transform(X, y)
+    # Cached fitting works on clones; hand the fitted steps back to the full pipeline
+    pipeline.steps[:-1] = head.steps[:-1]
+    return Xt
+
+
+def transform(pipeline, X):
+    return pipeline[:-1].transform(X) if isinstance(pipeline, Pipeline) else X
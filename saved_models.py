@@ -2,7 +2,7 @@
 
 import streamlit as st
 import pickle
-from tpot_connector import __dict__ as _tpot_cache
+from tpot_connector import _tpot_cache
 
 
 def run_saved_models_panel():
@@ -26,4 +26,10 @@ def run_saved_models_panel():
             )
         else:
             st.markdown(f"### 📦 {name}")
-            st.info(f"{name} not yet available. Train it first in AutoML or Ensemble panel.")
\ No newline at end of file
+            st.info(f"{name} not yet available. Train it first in AutoML or Ensemble panel.")
+    with st.expander("🗄️ Cached Artifacts (disk tier)"):
+        artifacts = _tpot_cache.info()
+        if artifacts:
+            st.dataframe(artifacts, use_container_width=True)
+        else:
+            st.info("No artifacts persisted yet.")
@@ -0,0 +1,312 @@
+# search_space.py
+
+import math
+
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.neural_network import MLPClassifier
+
+from utils import lazy_import
+
+optuna = lazy_import("optuna")
+xgboost = lazy_import("xgboost")
+lightgbm = lazy_import("lightgbm")
+
+
+class IntParam:
+    def __init__(self, low, high, log=False):
+        self.low, self.high, self.log = int(low), int(high), log
+
+    def suggest(self, trial, name):
+        return trial.suggest_int(name, self.low, self.high, log=self.log)
+
+    def distribution(self):
+        return optuna.distributions.IntDistribution(self.low, self.high, log=self.log)
+
+    def contains(self, value):
+        return self.low <= value <= self.high
+
+    def zoom(self, center, shrink, limits):
+        low, high = _shrink(self.low, self.high, center, shrink, self.log, limits.low, limits.high)
+        low, high = int(math.floor(low)), int(math.ceil(high))
+        if high <= low:
+            low, high = (low, low + 1) if low < limits.high else (low - 1, low)
+        return IntParam(low, high, self.log)
+
+    def __repr__(self):
+        return f"Int({self.low}, {self.high}{', log' if self.log else ''})"
+
+
+class FloatParam:
+    def __init__(self, low, high, log=False):
+        self.low, self.high, self.log = float(low), float(high), log
+
+    def suggest(self, trial, name):
+        return trial.suggest_float(name, self.low, self.high, log=self.log)
+
+    def distribution(self):
+        return optuna.distributions.FloatDistribution(self.low, self.high, log=self.log)
+
+    def contains(self, value):
+        return self.low <= value <= self.high
+
+    def zoom(self, center, shrink, limits):
+        return FloatParam(*_shrink(self.low, self.high, center, shrink, self.log, limits.low, limits.high), log=self.log)
+
+    def __repr__(self):
+        return f"{'Log' if self.log else 'Float'}({self.low:.4g}, {self.high:.4g})"
+
+
+class CappedIntParam(IntParam):
+    """
+    Int whose upper bound shrinks per trial so that value × cost(params[depends_on])
+    stays within `budget`; `depends_on` must be suggested first.
+    """
+
+    def __init__(self, low, high, budget, depends_on, cost="linear", log=False):
+        super().__init__(low, high, log)
+        self.budget, self.depends_on, self.cost = budget, depends_on, cost
+
+    def unit(self, value):
+        return math.log2(max(value, 2)) if self.cost == "log2" else float(value)
+
+    def bound(self, params):
+        # When the capacity already leaves room for fewer than `low` values, the range
+        # drops to [cap, cap] rather than breaking the budget
+        cap = max(int(self.budget // max(self.unit(params[self.depends_on]), 1)), 1)
+        return IntParam(min(self.low, cap), max(min(self.low, cap), min(self.high, cap)), self.log)
+
+    def tighten(self, capacity):
+        """
+        `capacity` (the depends_on param) with its upper bound lowered to the highest
+        value that still affords `low` of this param.
+        """
+        high = capacity.high
+        while high > capacity.low and self.unit(high) * self.low > self.budget:
+            high -= 1
+        return IntParam(capacity.low, high, capacity.log)
+
+    def zoom(self, center, shrink, limits):
+        zoomed = super().zoom(center, shrink, limits)
+        return CappedIntParam(zoomed.low, zoomed.high, self.budget, self.depends_on, self.cost, self.log)
+
+    def __repr__(self):
+        unit = f"log2({self.depends_on})" if self.cost == "log2" else self.depends_on
+        return f"Int({self.low}, {self.high}) × {unit} ≤ {self.budget}"
+
+
+def LogParam(low, high):
+    return FloatParam(low, high, log=True)
+
+
+class CategoricalParam:
+    def __init__(self, choices):
+        self.choices = list(choices)
+
+    def suggest(self, trial, name):
+        return trial.suggest_categorical(name, self.choices)
+
+    def distribution(self):
+        return optuna.distributions.CategoricalDistribution(self.choices)
+
+    def contains(self, value):
+        return value in self.choices
+
+    def zoom(self, center, shrink, limits):
+        # No notion of distance between choices; keep them all
+        return self
+
+    def __repr__(self):
+        return f"Cat({self.choices})"
+
+
+def _shrink(low, high, center, shrink, log, floor, ceil):
+    # Width becomes 2 * shrink * current width around `center`, measured in log space for log params
+    to = math.log if log else float
+    back = math.exp if log else float
+    half = (to(high) - to(low)) * shrink
+    c = to(min(max(center, low), high))
+    return max(back(c - half), floor), min(back(c + half), ceil)
+
+
+SEARCH_SPACES = {
+    "Random Forest": {
+        "n_estimators": IntParam(10, 300),
+        "max_depth": IntParam(2, 20),
+        "min_samples_split": IntParam(2, 10),
+        "max_features": CategoricalParam(["sqrt", "log2"]),
+    },
+    "XGBoost": {
+        "n_estimators": IntParam(50, 300),
+        "max_depth": IntParam(2, 10),
+        "learning_rate": LogParam(0.01, 0.3),
+        "subsample": FloatParam(0.5, 1.0),
+    },
+    "LightGBM": {
+        "n_estimators": IntParam(50, 300),
+        "num_leaves": IntParam(8, 128, log=True),
+        "learning_rate": LogParam(0.01, 0.3),
+        "min_child_samples": IntParam(5, 100, log=True),
+    },
+    "Logistic Regression": {
+        "C": LogParam(1e-4, 10),
+        "solver": CategoricalParam(["liblinear", "lbfgs"]),
+    },
+    "Neural Network": {
+        "hidden_layer_sizes": CategoricalParam(["64", "128", "64-32", "128-64"]),
+        "alpha": LogParam(1e-5, 1e-1),
+        "learning_rate_init": LogParam(1e-4, 1e-1),
+    },
+}
+
+
+# Complexity budget per unit of the Smart HPO VC-dimension limit
+TREE_BUDGET_PER_VC = 50     # trees × depth (log2 leaves for LightGBM)
+MLP_UNITS_PER_VC = 4        # total hidden units
+# Parameter that sets per-tree capacity, and how it is counted
+TREE_CAPACITY = {
+    "Random Forest": ("max_depth", "linear"),
+    "XGBoost": ("max_depth", "linear"),
+    "LightGBM": ("num_leaves", "log2"),
+}
+
+
+def _hidden_units(choice):
+    return sum(int(h) for h in str(choice).split("-"))
+
+
+def constrain(model_name, space, vc_dim):
+    """
+    Restrict a space to configurations within the VC-dimension complexity budget:
+    trees × per-tree capacity for ensembles (capacity bounds tightened statically,
+    tree count capped per trial), total hidden units for MLPs.
+    """
+    space = dict(space)
+    if model_name in TREE_CAPACITY and "n_estimators" in space:
+        capacity, cost = TREE_CAPACITY[model_name]
+        budget = int(vc_dim * TREE_BUDGET_PER_VC)
+        trees = space.pop("n_estimators")
+        capped = CappedIntParam(trees.low, trees.high, budget, capacity, cost, trees.log)
+        # Highest capacity that still affords the minimum number of trees
+        space[capacity] = capped.tighten(space[capacity])
+        space["n_estimators"] = capped
+    elif model_name == "Neural Network" and "hidden_layer_sizes" in space:
+        limit = vc_dim * MLP_UNITS_PER_VC
+        choices = space["hidden_layer_sizes"].choices
+        allowed = [c for c in choices if _hidden_units(c) <= limit]
+        if not allowed:
+            # Every preset is too wide: fall back to single layers that fit the budget
+            allowed = sorted({str(max(limit // 2, 1)), str(max(limit, 1))}, key=int)
+        space["hidden_layer_sizes"] = CategoricalParam(allowed)
+    return space
+
+
+def max_poly_degree(n_features, vc_dim, cap=5):
+    """
+    Highest polynomial degree whose expansion keeps a linear model's VC dimension
+    (expanded features + 1) within `vc_dim`; at least 1.
+    """
+    degree = 1
+    while degree < cap and math.comb(n_features + degree + 1, degree + 1) <= vc_dim:
+        degree += 1
+    return degree
+
+
+def get_space(model_name, vc_dim=None):
+    if model_name not in SEARCH_SPACES:
+        raise ValueError(f"Unsupported model: {model_name}")
+    space = dict(SEARCH_SPACES[model_name])
+    return constrain(model_name, space, vc_dim) if vc_dim else space
+
+
+def suggest(trial, space):
+    params = {}
+    for name, param in space.items():
+        if isinstance(param, CappedIntParam):
+            param = param.bound(params)
+        params[name] = param.suggest(trial, name)
+    return params
+
+
+def distributions(space):
+    return {name: param.distribution() for name, param in space.items()}
+
+
+def contains(space, params):
+    for name, param in space.items():
+        if isinstance(param, CappedIntParam) and param.depends_on in params:
+            param = param.bound(params)
+        if name not in params or not param.contains(params[name]):
+            return False
+    return True
+
+
+def project(space, params):
+    """
+    Clip numeric values into the space (per-trial caps included); categorical values
+    must already be valid choices.
+    """
+    out = {}
+    for name, param in space.items():
+        value = params[name]
+        if isinstance(param, CappedIntParam):
+            param = param.bound(out)
+        if isinstance(param, CategoricalParam):
+            value = value if param.contains(value) else param.choices[0]
+        else:
+            value = type(param.low)(min(max(value, param.low), param.high))
+        out[name] = value
+    return out
+
+
+def zoom(space, best_params, shrink=0.25, limits=None):
+    """
+    Narrow every numeric parameter to ±`shrink` of its current width around the best value
+    (in log space for log-scaled ones), never leaving the `limits` space.
+    """
+    limits = limits or space
+    zoomed = {name: param.zoom(best_params[name], shrink, limits[name]) if name in best_params else param
+              for name, param in space.items()}
+    # A zoomed tree count can raise its minimum; re-tighten the capacity it is capped by
+    for param in zoomed.values():
+        if isinstance(param, CappedIntParam) and param.depends_on in zoomed:
+            zoomed[param.depends_on] = param.tighten(zoomed[param.depends_on])
+    return zoomed
+
+
+def space_id(space):
+    """
+    Short, stable id of a space's bounds, for naming studies.
+    """
+    return joblib.hash(repr(sorted(space.items())))[:8]
+
+
+def describe(space):
+    return {name: repr(param) for name, param in space.items()}
+
+
+def build_model(model_name, params, config=None):
+    """
+    Estimator for `model_name` with searched `params` plus its fixed settings.
+    """
+    config = config or {}
+    params = dict(params)
+    if model_name == "Random Forest":
+        return RandomForestClassifier(**params, random_state=42)
+    elif model_name == "Logistic Regression":
+        return LogisticRegression(**params, max_iter=500, random_state=42)
+    elif model_name == "XGBoost":
+        return xgboost.XGBClassifier(**params, eval_metric="logloss", random_state=42)
+    elif model_name == "LightGBM":
+        return lightgbm.LGBMClassifier(**params, random_state=42, verbose=-1)
+    elif model_name == "Neural Network":
+        hidden = params.pop("hidden_layer_sizes", "64")
+        return MLPClassifier(
+            hidden_layer_sizes=tuple(int(h) for h in str(hidden).split("-")),
+            **params,
+            max_iter=300,
+            early_stopping=config.get("early_stopping", True),
+            random_state=42
+        )
+    raise ValueError(f"Unsupported model: {model_name}")
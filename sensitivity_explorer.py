@@ -3,6 +3,9 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import matplotlib.pyplot as plt
+from ale import get_ale
+from ice_grid import get_ice_grid
 from tpot_connector import _tpot_cache
 
 
@@ -18,7 +21,8 @@ def run_sensitivity_explorer():
 
     st.markdown("""
     Adjust each feature below to simulate hypothetical inputs.
-    We'll show the model's prediction and probability (if available).
+    Predictions are interpolated from a cached partial-dependence grid, so sliders respond instantly;
+    tick **Exact model call** to score the input with the model itself.
     """)
 
     edge_case_mode = st.checkbox("🧪 Edge Case Mode", value=False)
@@ -62,17 +66,82 @@ def run_sensitivity_explorer():
     for k, v in user_input.items():
         st.session_state[f"sens_input_{k}"] = v
 
+    # Slider moves are answered from the cached ICE/PD grid; the model is only called on request
     try:
-        prediction = model.predict(input_df)[0]
-        st.success(f"🧠 Model Prediction: **{prediction}**")
-
-        if hasattr(model, "predict_proba"):
-            proba = model.predict_proba(input_df)[0]
-            st.markdown("### 📈 Prediction Probabilities")
-            proba_df = pd.DataFrame({"Class": model.classes_, "Probability": proba})
-            st.dataframe(proba_df)
+        with st.spinner("⚡ Building partial-dependence grid (once per model)..."):
+            grid = get_ice_grid(model, X_train, key="X_train")
     except Exception as e:
-        st.error(f"❌ Prediction failed: {type(e).__name__}: {e}")
+        grid = None
+        st.warning(f"⚠️ Could not build the PD grid ({type(e).__name__}: {e}); using exact predictions.")
+
+    exact = grid is None or st.checkbox("🎯 Exact model call", value=False,
+                                        help="Score the simulated input with the model instead of the PD estimate.")
+    if grid is not None:
+        estimate = grid.estimate(user_input)
+        st.info(f"⚡ Interpolated Prediction: **{grid.predicted_label(estimate)}** "
+                f"(additive PD estimate over {grid.n_rows} sampled rows)")
+        if grid.classes is not None:
+            st.dataframe(pd.DataFrame({"Class": grid.classes, "Estimated Probability": estimate}))
+
+    if exact:
+        try:
+            prediction = model.predict(input_df)[0]
+            st.success(f"🧠 Model Prediction: **{prediction}**")
+
+            if hasattr(model, "predict_proba"):
+                proba = model.predict_proba(input_df)[0]
+                st.markdown("### 📈 Prediction Probabilities")
+                proba_df = pd.DataFrame({"Class": model.classes_, "Probability": proba})
+                st.dataframe(proba_df)
+        except Exception as e:
+            st.error(f"❌ Prediction failed: {type(e).__name__}: {e}")
+
+    if grid is not None:
+        st.markdown("### 📉 Partial Dependence")
+        feature = st.selectbox("Feature", grid.columns, key="sens_pd_feature")
+        output = 0
+        if grid.classes is not None and len(grid.classes) > 1:
+            output = st.selectbox("Class probability", range(len(grid.classes)), index=len(grid.classes) - 1,
+                                  format_func=lambda k: str(grid.classes[k]), key="sens_pd_class")
+        show_ice = st.checkbox("Show ICE curves", value=False)
+        fig, ax = plt.subplots()
+        values = grid.grids[feature]
+        x = np.asarray(values, dtype=float) if grid.is_numeric(feature) else np.arange(len(values))
+        if show_ice:
+            ax.plot(x, grid.ice[feature][:50, :, output].T, color="grey", alpha=0.2, linewidth=0.8)
+        ax.plot(x, grid.pd[feature][:, output], color="tab:blue", linewidth=2, label="PD")
+        if grid.is_numeric(feature) and user_input.get(feature) is not None:
+            ax.axvline(float(user_input[feature]), color="tab:red", linestyle="--", label="Current input")
+        if not grid.is_numeric(feature):
+            ax.set_xticks(x)
+            ax.set_xticklabels(["🚫 Missing" if v is None else str(v) for v in values], rotation=45, ha="right")
+        ax.set_xlabel(feature)
+        ax.set_ylabel("Prediction" if grid.classes is None else f"P({grid.classes[output]})")
+        ax.legend()
+        st.pyplot(fig)
+
+    with st.expander("📏 Accumulated Local Effects (robust to correlated features)"):
+        try:
+            ale, classes = get_ale(model, X_train, key="X_train")
+        except Exception as e:
+            ale, classes = None, None
+            st.warning(f"⚠️ ALE computation failed: {type(e).__name__}: {e}")
+        if ale:
+            feature = st.selectbox("Feature", list(ale), key="sens_ale_feature")
+            output = len(classes) - 1 if classes is not None else 0
+            curve = ale[feature]
+            fig, ax = plt.subplots()
+            ax.plot(curve["edges"], curve["ale"][:, output], marker="o", markersize=3)
+            ax.axhline(0, color="grey", linewidth=0.8)
+            if user_input.get(feature) is not None:
+                ax.axvline(float(user_input[feature]), color="tab:red", linestyle="--")
+            ax.set_xlabel(feature)
+            ax.set_ylabel("ALE" if classes is None else f"ALE of P({classes[output]})")
+            st.pyplot(fig)
+            st.caption("ALE only moves the feature within its own quantile bins, so unlike PD it never "
+                       "scores unrealistic combinations of correlated features.")
+        elif ale is not None:
+            st.info("ALE needs at least one numeric feature.")
 
     st.markdown("---")
     st.markdown("""
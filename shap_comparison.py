@@ -1,10 +1,10 @@
 # shap_comparison.py
 import streamlit as st
 import pandas as pd
-import shap
 import matplotlib.pyplot as plt
 import numpy as np
 from tpot_connector import _tpot_cache
+from shap_service import explain_models, to_explanation, mean_abs_shap, render_background_controls, render_parallel_controls, units_of
 
 def run_shap_comparison():
     st.title("🧠 SHAP Comparison Panel")
@@ -15,35 +15,61 @@ def run_shap_comparison():
     """)
 
     X_train = _tpot_cache.get("X_train")
+    y_train = _tpot_cache.get("y_train")
     models = _tpot_cache.get("all_models", {})
 
-    if not X_train or not models:
+    if X_train is None or not models:
         st.warning("⚠️ SHAP Comparison requires multiple trained models and X_train. Run AutoML first.")
         return
 
+    render_background_controls(models.values())
+    max_workers, timeout = render_parallel_controls()
     top_features = set()
     shap_dfs = {}
     feature_ranks = {}
+    units = {}
+    timings = []
 
-    for name, model in models.items():
-        try:
-            explainer = shap.Explainer(model.predict, X_train)
-            shap_values = explainer(X_train[:100])
-            shap_df = pd.DataFrame(np.abs(shap_values.values), columns=X_train.columns)
-            mean_shap = shap_df.mean().sort_values(ascending=False)
-            shap_dfs[name] = mean_shap
-            top = mean_shap.head(5).index.tolist()
-            top_features.update(top)
-            feature_ranks[name] = top
-        except Exception as e:
-            st.error(f"SHAP failed for {name}: {e}")
+    progress = st.progress(0.0, text="Computing SHAP values...")
+
+    def on_progress(name, state, done, total):
+        progress.progress(done / total, text=f"{name}: {state} ({done}/{total})")
+
+    records, status = explain_models(
+        models, X_train.iloc[:100], background=X_train, y=y_train,
+        max_workers=max_workers, timeout=timeout, on_progress=on_progress
+    )
+
+    for name, state in status.items():
+        if name not in records:
+            st.error(f"SHAP failed for {name}: {state}")
+            continue
+        record = records[name]
+        timings.append({
+            "Model": name,
+            "Status": state,
+            "Explainer": record["explainer"],
+            "Units": units_of(record),
+            "Background": f"{record['background']['method']} ({record['background']['size']} rows)",
+            "Seconds": round(record["seconds"], 3),
+        })
+        mean_shap = mean_abs_shap(to_explanation(record))
+        shap_dfs[name] = mean_shap
+        units[name] = units_of(record)
+        top = mean_shap.head(5).index.tolist()
+        top_features.update(top)
+        feature_ranks[name] = top
+
+    if timings:
+        with st.expander("⏱️ Explainer Selection & Timing"):
+            st.dataframe(pd.DataFrame(timings), use_container_width=True)
 
     # 📈 SHAP Summary Plots
     st.markdown("### 📈 Mean Absolute SHAP by Model")
     for name, shap_series in shap_dfs.items():
         fig, ax = plt.subplots()
         shap_series.head(10).plot(kind='bar', ax=ax)
-        ax.set_title(f"{name} - Top SHAP Feature Importances")
+        ax.set_title(f"{name} - Top SHAP Feature Importances ({units[name]})")
         st.pyplot(fig)
 
     # 🧠 Smart Summary Answers
@@ -53,13 +79,20 @@ def run_shap_comparison():
             name: shap_dfs[name].head(3).sum() / shap_dfs[name].sum()
             for name in shap_dfs
         }
-        most_interpretable = max(interpretable_scores, key=interpretable_scores.get)
+        # Log-odds and probability SHAP values aren't comparable; rank each scale separately
+        scales = sorted(set(units.values()))
+        if len(scales) > 1:
+            st.caption(f"⚠️ Models were explained on different scales ({', '.join(scales)}); they are ranked separately.")
 
         consistent = set.intersection(*[set(top5) for top5 in feature_ranks.values()]) if len(feature_ranks) > 1 else set()
         all_top = pd.Series([f for ranks in feature_ranks.values() for f in ranks])
         disagreement = all_top.value_counts()[all_top.value_counts() == 1].index.tolist()
 
-        st.success(f"**Most Interpretable Model:** {most_interpretable} — top 3 features explain {interpretable_scores[most_interpretable]*100:.1f}% of total importance.")
+        for scale in scales:
+            group = {name: score for name, score in interpretable_scores.items() if units[name] == scale}
+            most_interpretable = max(group, key=group.get)
+            label = f" ({scale})" if len(scales) > 1 else ""
+            st.success(f"**Most Interpretable Model{label}:** {most_interpretable} — top 3 features explain {group[most_interpretable]*100:.1f}% of total importance.")
         st.info(f"**Consistent Features Across Models:** {', '.join(consistent) if consistent else 'None'}")
         st.warning(f"**Disagreements in Feature Influence:** {', '.join(disagreement) if disagreement else 'None'}")
     else:
@@ -1,19 +1,18 @@
 # shap_interpretability.py
 
 import streamlit as st
-import shap
 import matplotlib.pyplot as plt
+from shap_service import get_explanation, mean_abs_shap, plot_beeswarm, render_background_controls
 
-try:
-    from tpot_connector import latest_tpot_model, latest_X_train
-except ImportError:
-    latest_tpot_model = None
-    latest_X_train = None
+from tpot_connector import _tpot_cache
 
 
 def run_shap_panel():
     st.subheader("🔍 SHAP Interpretability Panel")
 
+    latest_tpot_model = _tpot_cache.get("latest_tpot_model")
+    latest_X_train = _tpot_cache.get("latest_X_train")
+
     # Use session-loaded model if available
     model = st.session_state.get("loaded_model", latest_tpot_model)
 
@@ -21,22 +20,18 @@ def run_shap_panel():
         st.warning("⚠️ No trained model or training data found. Please run AutoML or load a model.")
         return
 
+    render_background_controls([model])
     try:
         st.info("Generating SHAP summary plot (sampled 100 rows)...")
 
         X_sample = latest_X_train.sample(n=min(100, len(latest_X_train)), random_state=42)
-        explainer = shap.Explainer(model, X_sample)
-        shap_values = explainer(X_sample)
+        shap_values = get_explanation(model, X_sample)
 
         st.markdown("### 📈 SHAP Summary Plot")
-        fig, ax = plt.subplots()
-        shap.plots.beeswarm(shap_values, max_display=10, show=False)
-        st.pyplot(fig)
+        st.pyplot(plot_beeswarm(shap_values, max_display=10))
 
         st.markdown("### 💡 Top Feature Insights")
-        top_features = shap_values.abs.mean(0).values
-        sorted_indices = top_features.argsort()[::-1]
-        feature_names = latest_X_train.columns[sorted_indices[:3]]
+        feature_names = mean_abs_shap(shap_values).index[:3]
 
         st.markdown(f"**Top driver:** `{feature_names[0]}`")
         st.markdown(f"**Secondary factors:** `{feature_names[1]}`, `{feature_names[2]}`")
@@ -1,11 +1,11 @@
 import streamlit as st
-import shap
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 from sklearn.inspection import permutation_importance
 from tpot_connector import _tpot_cache
 import os
+from shap_service import get_explanation, mean_abs_shap, render_background_controls
 
 def run_shap_perm_delta():
     st.header("📉 SHAP vs Permutation Delta Viewer")
@@ -17,10 +17,9 @@ def run_shap_perm_delta():
         st.error("❌ Model or test data not found. Please train TPOT first.")
         return
 
+    render_background_controls([model])
     with st.spinner("Calculating importances..."):
-        explainer = shap.Explainer(model.predict, X)
-        shap_values = explainer(X)
-        shap_importance = np.abs(shap_values.values).mean(axis=0)
+        shap_importance = mean_abs_shap(get_explanation(model, X)).reindex(X.columns).values
 
         perm_result = permutation_importance(model, X, model.predict(X), n_repeats=10, random_state=42)
         perm_importance = perm_result.importances_mean
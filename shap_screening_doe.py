@@ -2,8 +2,8 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import shap
 from sklearn.preprocessing import LabelEncoder
+from shap_service import get_explanation, mean_abs_shap, render_interaction_ranking
 
 def run_shap_screening_doe(df=None, model=None):
     st.title("🧪 SHAP Screening Design of Experiments (DOE)")
@@ -32,11 +32,7 @@ def run_shap_screening_doe(df=None, model=None):
 
     # SHAP ranking of features
     try:
-        explainer = shap.Explainer(model, X)
-        shap_values = explainer(X)
-        shap_df = pd.DataFrame(shap_values.values, columns=X.columns)
-        mean_abs_shap = shap_df.abs().mean().sort_values(ascending=False)
-        top_features = mean_abs_shap.head(8).index.tolist()
+        top_features = mean_abs_shap(get_explanation(model, X)).head(8).index.tolist()
     except Exception as e:
         st.error(f"SHAP computation failed: {e}")
         top_features = X.columns[:8].tolist()
@@ -60,8 +56,12 @@ def run_shap_screening_doe(df=None, model=None):
 
     # Interaction Exploration
     st.markdown("### 🔄 Interaction Explorer")
-    f1 = st.selectbox("Factor 1:", selected_factors)
-    f2 = st.selectbox("Factor 2:", [f for f in selected_factors if f != f1])
+    # Strongest SHAP interaction pair (tree models) preselected
+    pairs = render_interaction_ranking(model, X, selected_factors)
+    best_pair = [pairs["Factor 1"].iloc[0], pairs["Factor 2"].iloc[0]] if pairs is not None and len(pairs) else selected_factors[:2]
+    f1 = st.selectbox("Factor 1:", selected_factors, index=selected_factors.index(best_pair[0]))
+    others = [f for f in selected_factors if f != f1]
+    f2 = st.selectbox("Factor 2:", others, index=others.index(best_pair[1]) if best_pair[1] in others else 0)
     fig, ax = plt.subplots()
     sns.pointplot(x=f1, y='Survived', hue=f2, data=df, ax=ax)
     ax.set_title(f"Interaction: {f1} × {f2} on Survival")
@@ -0,0 +1,506 @@
+# shap_service.py
+
+import os
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+
+import streamlit as st
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from artifact_store import fingerprint
+from tpot_connector import _tpot_cache
+from utils import lazy_import
+
+shap = lazy_import("shap")
+
+# Memoised model hashes so repeated panel renders don't re-pickle large pipelines
+_model_fingerprints = weakref.WeakKeyDictionary()
+
+
+def model_fingerprint(model):
+    """
+    Content hash of a fitted model, cached per live model object.
+    """
+    try:
+        return _model_fingerprints[model]
+    except (KeyError, TypeError):
+        pass
+    digest = fingerprint(model)
+    try:
+        _model_fingerprints[model] = digest
+    except TypeError:
+        pass
+    return digest
+
+
+# Column-wise preprocessing that keeps features 1:1, so the final estimator can be
+# explained directly on the transformed data under the original feature names
+COLUMNWISE_STEPS = (
+    "StandardScaler", "MinMaxScaler", "MaxAbsScaler", "RobustScaler",
+    "PowerTransformer", "QuantileTransformer", "SimpleImputer", "Binarizer",
+)
+TREE_ESTIMATORS = (
+    "DecisionTreeClassifier", "ExtraTreeClassifier", "RandomForestClassifier",
+    "ExtraTreesClassifier", "GradientBoostingClassifier",
+)
+TREE_MODULES = ("xgboost", "lightgbm", "catboost")
+BACKGROUND_METHODS = ("kmeans", "stratified", "reservoir", "none")
+DEFAULT_BACKGROUND = {"method": "kmeans", "size": 100}
+RESERVOIR_CHUNK_ROWS = 10000
+# Kernel SHAP cost is rows x nsamples x background; bound the first two explicitly
+KERNEL_MAX_ROWS = 200
+KERNEL_NSAMPLES = 500
+# Hard cap on the kernel background whatever the summariser (including "none") returns
+KERNEL_BACKGROUND_ROWS = 100
+# Output scale of each explainer's values; records on different scales must not be ranked together
+UNITS = {"tree": "probability", "linear": "log-odds", "kernel": "probability"}
+
+
+def unwrap_model(model, X):
+    """
+    Peel TPOT/sklearn pipelines down to the final estimator when every preceding
+    step is column-wise. Returns (estimator, transform) where transform maps raw
+    frames into the estimator's input space.
+    """
+    model = getattr(model, "fitted_pipeline_", model)
+    steps = getattr(model, "steps", None)
+    if not steps:
+        return model, lambda data: data
+
+    prefix = [step for _, step in steps[:-1] if step not in (None, "passthrough")]
+    if not all(type(step).__name__ in COLUMNWISE_STEPS for step in prefix):
+        return model, lambda data: data
+
+    def transform(data):
+        out = data
+        for step in prefix:
+            out = step.transform(out)
+        return pd.DataFrame(np.asarray(out), columns=data.columns, index=data.index)
+
+    try:
+        if transform(X.iloc[:1]).shape[1] != X.shape[1]:
+            return model, lambda data: data
+    except Exception:
+        return model, lambda data: data
+    return steps[-1][1], transform
+
+
+def model_family(estimator):
+    name = type(estimator).__name__
+    module = type(estimator).__module__.split(".")[0]
+    if name in TREE_ESTIMATORS or module in TREE_MODULES:
+        return "tree"
+    if hasattr(estimator, "coef_") and type(estimator).__module__.startswith("sklearn.linear_model"):
+        return "linear"
+    return "kernel"
+
+
+def _positive_class_fn(model, columns):
+    if hasattr(model, "predict_proba"):
+        return lambda data: model.predict_proba(pd.DataFrame(data, columns=columns))[:, -1]
+    return lambda data: model.predict(pd.DataFrame(data, columns=columns))
+
+
+def make_explainer(model, X, background, explainer_type="auto"):
+    """
+    Pick the fastest faithful explainer: TreeExplainer on probabilities for tree
+    ensembles, LinearExplainer for linear models (log-odds), and a kernel explainer
+    on predict_proba over a sampled background for everything else. The record's
+    "units" says which scale the values are on.
+    Returns (explainer, kind, transform).
+    """
+    estimator, transform = unwrap_model(model, X)
+    kind = model_family(estimator) if explainer_type == "auto" else explainer_type
+    bg = transform(background)
+
+    if kind == "tree":
+        try:
+            explainer = shap.TreeExplainer(
+                estimator, data=bg, model_output="probability", feature_perturbation="interventional"
+            )
+            return explainer, "tree", transform
+        except Exception:
+            kind = "kernel"
+    if kind == "linear":
+        try:
+            return shap.LinearExplainer(estimator, bg), "linear", transform
+        except Exception:
+            kind = "kernel"
+
+    # Model-agnostic fallback explains the full (unwrapped) model on raw features
+    if len(background) > KERNEL_BACKGROUND_ROWS:
+        background = shap.sample(background, KERNEL_BACKGROUND_ROWS, random_state=0)
+    explainer = shap.KernelExplainer(_positive_class_fn(model, list(X.columns)), background)
+    return explainer, "kernel", lambda data: data
+
+
+# -- Background summarisation --
+def _kmeans_background(X, size, seed):
+    from sklearn.cluster import KMeans
+
+    values = X.to_numpy(dtype=float)
+    filled = np.where(np.isnan(values), np.nanmean(values, axis=0), values)
+    centers = KMeans(n_clusters=size, n_init=3, random_state=seed).fit(filled).cluster_centers_
+    # Snap each centroid coordinate to the nearest observed value so encoded
+    # categoricals and integer features stay on their support
+    for j in range(values.shape[1]):
+        support = np.unique(filled[:, j])
+        pos = np.clip(np.searchsorted(support, centers[:, j]), 1, max(len(support) - 1, 1))
+        lower = support[pos - 1]
+        upper = support[np.minimum(pos, len(support) - 1)]
+        centers[:, j] = np.where(np.abs(centers[:, j] - lower) <= np.abs(upper - centers[:, j]), lower, upper)
+    return pd.DataFrame(centers, columns=X.columns).astype(X.dtypes.to_dict(), errors="ignore")
+
+
+def _stratified_background(X, y, size, seed):
+    if y is None or len(y) != len(X):
+        return X.sample(n=size, random_state=seed)
+    labels = pd.Series(np.asarray(y), index=X.index)
+    counts = labels.value_counts()
+    quotas = np.maximum(1, np.round(counts / counts.sum() * size)).astype(int)
+    parts = [X[labels == label].sample(n=min(q, counts[label]), random_state=seed) for label, q in quotas.items()]
+    return pd.concat(parts)
+
+
+def _reservoir_background(X, size, seed):
+    # Chunked reservoir (A-Res with uniform weights): keep the rows with the
+    # smallest random keys seen so far, one vectorised pass per chunk
+    rng = np.random.default_rng(seed)
+    best_keys = np.empty(0)
+    best_rows = np.empty(0, dtype=int)
+    for start in range(0, len(X), RESERVOIR_CHUNK_ROWS):
+        stop = min(start + RESERVOIR_CHUNK_ROWS, len(X))
+        keys = np.concatenate([best_keys, rng.random(stop - start)])
+        rows = np.concatenate([best_rows, np.arange(start, stop)])
+        keep = np.argpartition(keys, size - 1)[:size] if len(keys) > size else np.arange(len(keys))
+        best_keys, best_rows = keys[keep], rows[keep]
+    return X.iloc[np.sort(best_rows)]
+
+
+def summarize_background(X, method="kmeans", size=100, y=None, seed=0):
+    """
+    Bounded stand-in for `X` as the SHAP masker background, so explanation cost
+    no longer grows with the training set.
+    """
+    if method == "none" or len(X) <= size:
+        return X
+    if method == "kmeans":
+        try:
+            return _kmeans_background(X, size, seed)
+        except (ValueError, TypeError):
+            method = "reservoir"  # non-numeric frames can't be clustered
+    if method == "stratified":
+        return _stratified_background(X, y, size, seed)
+    if method == "reservoir":
+        return _reservoir_background(X, size, seed)
+    raise ValueError(f"Unknown background method: {method}")
+
+
+def background_config():
+    return _tpot_cache.get("shap_background_config") or dict(DEFAULT_BACKGROUND)
+
+
+def _uses_kernel(model):
+    estimator = model.steps[-1][1] if hasattr(model, "steps") else model
+    return model_family(estimator) == "kernel"
+
+
+def render_background_controls(models=None):
+    """
+    Sidebar widget for the background summariser shared by every SHAP panel. Pass the
+    models being explained so the row limit reflects the kernel explainer's cap.
+    """
+    config = background_config()
+    models = list(models or [])
+    kernel = [m for m in models if _uses_kernel(m)]
+    high = KERNEL_BACKGROUND_ROWS if models and len(kernel) == len(models) else 500
+    with st.sidebar.expander("🧮 SHAP Background Data"):
+        method = st.selectbox("Summarizer", BACKGROUND_METHODS, index=BACKGROUND_METHODS.index(config["method"]))
+        size = st.slider("Background rows", 10, high, min(int(config["size"]), high), step=10)
+        if size > KERNEL_BACKGROUND_ROWS and (kernel or not models):
+            st.caption(f"ℹ️ Models explained with the kernel explainer use a {KERNEL_BACKGROUND_ROWS}-row "
+                       "sample of this background.")
+    _tpot_cache["shap_background_config"] = {"method": method, "size": size}
+
+
+def _get_background(background, y):
+    config = background_config()
+    key = "shap-bg-{}-{}-{}".format(fingerprint(background)[:12], config["method"], config["size"])
+    summary = _tpot_cache.get_or_compute(
+        key, lambda: summarize_background(background, config["method"], config["size"], y=y), persist=False
+    )
+    return summary, {"method": config["method"], "size": len(summary)}
+
+
+def _compute(model, X, background, explainer_type, background_info=None):
+    start = time.perf_counter()
+    explainer, kind, transform = make_explainer(model, X, background, explainer_type)
+    X_model = transform(X)
+    rows = None
+    if kind == "kernel":
+        if background_info:
+            background_info = {**background_info, "size": min(background_info["size"], KERNEL_BACKGROUND_ROWS)}
+        # Explain a bounded row sample with a fixed evaluation budget per row
+        if len(X) > KERNEL_MAX_ROWS:
+            rows = np.sort(np.random.default_rng(0).choice(len(X), KERNEL_MAX_ROWS, replace=False))
+            X, X_model = X.iloc[rows], X_model.iloc[rows]
+        values = np.asarray(explainer.shap_values(X_model, nsamples=KERNEL_NSAMPLES, silent=True))
+        base_values = np.full(len(X), np.asarray(explainer.expected_value).ravel()[-1])
+    else:
+        explanation = explainer(X_model, check_additivity=False) if kind == "tree" else explainer(X_model)
+        values = np.asarray(explanation.values)
+        base_values = np.asarray(explanation.base_values)
+    return {
+        "values": values,
+        "base_values": base_values,
+        "data": np.asarray(X),
+        "feature_names": list(X.columns),
+        "explainer": kind,
+        "units": UNITS[kind] if kind != "kernel" or hasattr(model, "predict_proba") else "prediction",
+        "rows": rows,
+        "seconds": time.perf_counter() - start,
+        "background": background_info,
+    }
+
+
+def cache_key(model, X, background, explainer_type):
+    return "shap-{}-{}-{}-{}".format(
+        model_fingerprint(model)[:12], fingerprint(X)[:12], fingerprint(background)[:12], explainer_type
+    )
+
+
+def get_shap_record(model, X, background=None, explainer_type="auto", y=None):
+    """
+    SHAP values for `X` under `model`, computed once per (model, data, explainer) and
+    shared through the artifact store (memory + disk) with every other panel.
+    The background is summarised first; its method and size are kept in the record.
+    Kernel explanations cover at most KERNEL_MAX_ROWS sampled rows (positions in
+    record["rows"]), so callers needing a specific row should explain that row.
+    """
+    background, background_info = _get_background(X if background is None else background, y)
+    key = cache_key(model, X, background, explainer_type)
+    return _tpot_cache.get_or_compute(key, lambda: _compute(model, X, background, explainer_type, background_info))
+
+
+def units_of(record):
+    return record.get("units", UNITS.get(record.get("explainer"), "probability"))
+
+
+def _terminate_workers(executor):
+    # concurrent.futures has no public kill switch; stop stragglers after a timeout
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        process.terminate()
+
+
+def explain_models(models, X, background=None, explainer_type="auto", y=None,
+                   max_workers=None, timeout=None, on_progress=None):
+    """
+    SHAP records for many models at once. Cached models are served immediately;
+    the rest are fanned out over a process pool so the batch takes roughly as long
+    as the slowest model. Models still running after `timeout` seconds are dropped.
+
+    Returns (records, status): name -> record for finished models and
+    name -> "cached" | "computed" | "timeout" | "error: ..." for every model.
+    `on_progress(name, status, done, total)` is called as each model settles.
+    """
+    background, background_info = _get_background(X if background is None else background, y)
+    records, status, pending = {}, {}, {}
+    total = len(models)
+
+    def settle(name, state, record=None):
+        status[name] = state
+        if record is not None:
+            records[name] = record
+        if on_progress is not None:
+            on_progress(name, state, len(status), total)
+
+    for name, model in models.items():
+        try:
+            key = cache_key(model, X, background, explainer_type)
+        except Exception as e:
+            settle(name, f"error: {e}")
+            continue
+        if key in _tpot_cache:
+            settle(name, "cached", _tpot_cache[key])
+        else:
+            pending[name] = (key, model)
+
+    if not pending:
+        return records, status
+
+    workers = max_workers or min(len(pending), os.cpu_count() or 1)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    futures = {
+        executor.submit(_compute, model, X, background, explainer_type, background_info): (name, key)
+        for name, (key, model) in pending.items()
+    }
+
+    def collect(future):
+        name, key = futures[future]
+        try:
+            record = future.result()
+        except Exception as e:
+            settle(name, f"error: {type(e).__name__}: {e}")
+            return
+        _tpot_cache.put(key, record)
+        settle(name, "computed", record)
+
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            collect(future)
+    except TimeoutError:
+        for future, (name, _) in futures.items():
+            if name in status:
+                continue
+            if future.done():
+                # Finished inside the window but not yet yielded by as_completed
+                collect(future)
+            else:
+                future.cancel()
+                settle(name, "timeout")
+        _terminate_workers(executor)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return records, status
+
+
+def render_parallel_controls():
+    """
+    Sidebar settings for multi-model SHAP runs; returns (max_workers, timeout seconds).
+    """
+    with st.sidebar.expander("⚡ Parallel SHAP"):
+        cpu = os.cpu_count() or 1
+        workers = st.number_input("Worker processes", min_value=1, max_value=cpu, value=min(4, cpu), step=1)
+        timeout = st.number_input("Timeout (seconds, 0 = none)", min_value=0, value=120, step=10)
+    return int(workers), (timeout or None)
+
+
+def get_explanation(model, X, background=None, explainer_type="auto", y=None):
+    """
+    Cached SHAP values wrapped as a `shap.Explanation` for the standard plots.
+    """
+    return to_explanation(get_shap_record(model, X, background, explainer_type, y=y))
+
+
+def to_explanation(record):
+    values = record["values"]
+    base_values = record["base_values"]
+    # Multi-output explainers: keep the positive class
+    if values.ndim == 3:
+        values = values[..., -1]
+        base_values = base_values[..., -1] if base_values.ndim > 1 else base_values
+    return shap.Explanation(
+        values=values,
+        base_values=base_values,
+        data=record["data"],
+        feature_names=record["feature_names"],
+    )
+
+
+# -- Views served from the single cached matrix --
+def mean_abs_shap(explanation):
+    return pd.Series(
+        np.abs(explanation.values).mean(axis=0), index=explanation.feature_names
+    ).sort_values(ascending=False)
+
+
+def plot_beeswarm(explanation, max_display=10):
+    plt.figure()
+    shap.plots.beeswarm(explanation, max_display=max_display, show=False)
+    return plt.gcf()
+
+
+def plot_waterfall(explanation, row):
+    plt.figure()
+    shap.plots.waterfall(explanation[row], show=False)
+    return plt.gcf()
+
+
+def plot_dependence(explanation, feature):
+    plt.figure()
+    shap.plots.scatter(explanation[:, feature], color=explanation, show=False)
+    return plt.gcf()
+
+
+# -- Interaction strengths (tree models only) --
+INTERACTION_SAMPLE_ROWS = 200
+
+
+def _interaction_strength(model, X, sample_rows):
+    estimator, transform = unwrap_model(model, X)
+    if model_family(estimator) != "tree":
+        raise ValueError(f"SHAP interaction values need a tree model, got {type(estimator).__name__}.")
+    sample = X.sample(n=sample_rows, random_state=0) if len(X) > sample_rows else X
+    # Interaction values are only defined for the path-dependent (no background) tree algorithm
+    values = shap.TreeExplainer(estimator).shap_interaction_values(transform(sample))
+    if isinstance(values, list):
+        values = values[-1]
+    values = np.asarray(values)
+    if values.ndim == 4:
+        values = values[..., -1]
+    strength = np.abs(values).mean(axis=0).astype(np.float32)
+    return pd.DataFrame(strength, index=list(X.columns), columns=list(X.columns))
+
+
+def get_interaction_strength(model, X, sample_rows=INTERACTION_SAMPLE_ROWS):
+    """
+    Mean |SHAP interaction value| per feature pair (diagonal: main effects) from a
+    TreeExplainer on a bounded row sample, computed once per model and data.
+    Raises ValueError for non-tree models.
+    """
+    key = "shap-interactions-{}-{}-n{}".format(model_fingerprint(model)[:12], fingerprint(X)[:12], sample_rows)
+    return _tpot_cache.get_or_compute(key, lambda: _interaction_strength(model, X, sample_rows))
+
+
+def rank_pairs(strength, features=None):
+    """
+    Feature pairs ordered by interaction strength; the matrix is symmetric, so a
+    pair's total strength is twice the off-diagonal entry.
+    """
+    features = [f for f in (features if features is not None else strength.index) if f in strength.index]
+    sub = strength.loc[features, features].to_numpy()
+    i, j = np.triu_indices(len(features), k=1)
+    pairs = pd.DataFrame({
+        "Factor 1": np.asarray(features)[i],
+        "Factor 2": np.asarray(features)[j],
+        "Interaction Strength": 2 * sub[i, j],
+    })
+    return pairs.sort_values("Interaction Strength", ascending=False).reset_index(drop=True)
+
+
+def render_interaction_ranking(model, X, factors, top=10):
+    """
+    SHAP interaction ranking of the selected factors with a strength heatmap.
+    Returns the ranked pairs, or None when the model isn't a tree model.
+    """
+    try:
+        strength = get_interaction_strength(model, X)
+    except ValueError as e:
+        st.info(f"ℹ️ {e}")
+        return None
+    except Exception as e:
+        st.warning(f"⚠️ SHAP interaction values failed: {type(e).__name__}: {e}")
+        return None
+    # Only factors that reached the explainer (e.g. not dropped by preprocessing) have a row
+    factors = [f for f in factors if f in strength.index]
+    pairs = rank_pairs(strength, factors)
+    st.dataframe(pairs.head(top).round(4), use_container_width=True)
+    with st.expander("🌡️ Interaction Strength Matrix"):
+        sub = strength.loc[factors, factors]
+        fig, ax = plt.subplots(figsize=(0.6 * len(factors) + 2, 0.5 * len(factors) + 1.5))
+        off = sub.to_numpy().copy()
+        np.fill_diagonal(off, np.nan)
+        image = ax.imshow(off, cmap="viridis")
+        ax.set_xticks(range(len(factors)))
+        ax.set_xticklabels(factors, rotation=45, ha="right")
+        ax.set_yticks(range(len(factors)))
+        ax.set_yticklabels(factors)
+        fig.colorbar(image, ax=ax, label="mean |interaction SHAP|")
+        fig.tight_layout()
+        st.pyplot(fig)
+        st.caption(f"Computed once on ≤ {INTERACTION_SAMPLE_ROWS} rows; diagonal (main effects) hidden.")
+    return pairs
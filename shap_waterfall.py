@@ -2,23 +2,23 @@
 # shap_waterfall.py
 
 import streamlit as st
-import shap
 import matplotlib.pyplot as plt
+from shap_service import get_explanation, plot_waterfall, render_background_controls
 
-try:
-    from tpot_connector import latest_tpot_model, latest_X_test
-except ImportError:
-    latest_tpot_model = None
-    latest_X_test = None
+from tpot_connector import _tpot_cache
 
 
 def run_shap_waterfall():
     st.subheader("📉 SHAP Waterfall Plot (Individual Prediction)")
 
+    latest_tpot_model = _tpot_cache.get("latest_tpot_model")
+    latest_X_test = _tpot_cache.get("latest_X_test")
+
     if latest_tpot_model is None or latest_X_test is None:
         st.warning("⚠️ No trained model or test data found. Please run TPOT first.")
         return
 
+    render_background_controls()
     try:
         row_index = st.slider("Select Row Index", 0, len(latest_X_test) - 1, 0)
         row_data = latest_X_test.iloc[[row_index]]
@@ -26,11 +26,10 @@ def run_shap_waterfall():
         st.markdown("### 🧬 Selected Row Input")
         st.dataframe(row_data)
 
-        explainer = shap.Explainer(latest_tpot_model, latest_X_test)
-        shap_values = explainer(latest_X_test)
+        shap_values = get_explanation(latest_tpot_model, row_data, background=latest_X_test)
 
         st.markdown("### 🔎 SHAP Waterfall Plot")
-        fig = shap.plots.waterfall(shap_values[row_index], show=False)
+        fig = plot_waterfall(shap_values, 0)
         st.pyplot(fig, clear_figure=True)
 
         st.success("✅ Waterfall plot generated for selected prediction.")
@@ -1,9 +1,9 @@
 # smart_hpo_recommender.py
 import streamlit as st
 import pandas as pd
-from scipy.stats import normaltest
-from sklearn.preprocessing import PowerTransformer
 from tpot_connector import _tpot_cache
+from dataset_profile import get_profile
+from fit_cost import rank_candidates
 
 def run_smart_hpo_recommender():
     st.title("\U0001F9E0 Smart Algorithm Recommender + HPO Launcher")
@@ -22,24 +22,30 @@ def run_smart_hpo_recommender():
     st.markdown("### 📋 Dataset Snapshot")
     st.dataframe(df.head())
 
-    # Basic Profiling
+    # Basic Profiling (computed once per dataset version)
+    profile = get_profile(df, key="X_train")
     st.markdown("### 🧬 Dataset Diagnostics")
-    st.write(f"Shape: {df.shape}")
-    st.write(f"Missing Values: {df.isnull().sum().sum()}")
-    st.write(f"Numeric Features: {df.select_dtypes(include='number').shape[1]}")
-    st.write(f"Categorical Features: {df.select_dtypes(exclude='number').shape[1]}")
+    st.write(f"Shape: {profile.shape}")
+    st.write(f"Missing Values: {profile.missing_total}")
+    st.write(f"Numeric Features: {len(profile.numeric_columns)}")
+    st.write(f"Categorical Features: {len(profile.categorical_columns)}")
+    with st.expander("📑 Column Profile"):
+        st.dataframe(profile.summary())
 
     # Auto Normality Test
     st.markdown("### 📈 Feature Normality Check & Power Transformation")
-    normality_results = []
     transformed_features = []
-    all_numeric_cols = df.select_dtypes(include='number').columns.tolist()
+    all_numeric_cols = profile.numeric_columns
 
     manual_selection = st.multiselect("Select features to power transform (overrides auto-detect):", all_numeric_cols)
 
     for col in all_numeric_cols:
-        stat, p = normaltest(df[col].dropna())
-        if p < 0.05 or col in manual_selection:
+        p = profile.stats.at[col, "normal_p"]
+        if pd.isna(p):
+            st.info(f"{col}: ➖ Too few distinct values to test normality")
+            if col in manual_selection:
+                transformed_features.append(col)
+        elif p < 0.05 or col in manual_selection:
             st.warning(f"{col}: ❌ Not Normally Distributed (p = {p:.4f}) — Power Transform Recommended")
             transformed_features.append(col)
         else:
@@ -49,9 +55,7 @@ def run_smart_hpo_recommender():
         st.markdown("### ⚙️ Auto Power Transformation Preview")
         preview_cols = transformed_features[:5]
         try:
-            pt = PowerTransformer(method="yeo-johnson")
-            preview_data = pt.fit_transform(df[preview_cols])
-            st.dataframe(pd.DataFrame(preview_data, columns=preview_cols).head())
+            st.dataframe(profile.yeo_johnson_preview(df, preview_cols))
             st.info("Applied Yeo-Johnson transformation to most non-normal features.")
         except Exception as e:
             st.error(f"Transformation failed: {e}")
@@ -64,25 +68,53 @@ which can be applied automatically in the preprocessing pipeline. You may overri
     # AI Recommends This
     st.markdown("### \U0001F916 AI Recommends These Algorithms")
     recs = []
+    n_numeric = len(profile.numeric_columns)
+    n_categorical = len(profile.categorical_columns)
     if df.shape[0] > 2000:
         recs.append("XGBoost")
-    if df.select_dtypes(include='number').shape[1] < 10:
+        recs.append("LightGBM")
+    if n_numeric < 10:
         recs.append("Logistic Regression")
-    if df.select_dtypes(exclude='number').shape[1] > 3:
+    if n_categorical > 3:
         recs.append("CatBoost")
     if df.shape[1] > 15:
         recs.append("Random Forest")
-    if df.select_dtypes(include='number').shape[1] > 20:
+    if n_numeric > 20:
         recs.append("Neural Network")
 
     st.success(
         "Top Algorithm Suggestions: " + ", ".join(recs) if recs else "Unable to determine best models — run EDA first."
     )
 
+    # Measured costs: probes are cached per dataset version, so only the first run is slow
+    st.markdown("### ⏱️ Budget-Aware Ranking")
+    st.caption("Times each candidate on small subsamples, extrapolates fit/predict time and memory to the full "
+               "training split (log-log), and ranks by expected score per second of fitting.")
+    budget_s = st.number_input("HPO Time Budget (seconds)", 10, 36000, 300, step=30)
+    if st.button("⏱️ Run Timed Probes"):
+        st.session_state["hpo_probes_run"] = True
+    ranked = []
+    if st.session_state.get("hpo_probes_run"):
+        bar = st.progress(0.0)
+        ranking, probe_errors = rank_candidates(
+            df, y, budget_s, on_progress=lambda name, done, total: bar.progress(done / total, text=f"Probed {name}")
+        )
+        bar.empty()
+        st.dataframe(ranking.round(4))
+        for name, err in probe_errors.items():
+            st.warning(f"{name}: probe failed ({err})")
+        ranked = ranking.loc[ranking["Feasible"], "Model"].tolist()
+        if ranked:
+            st.success(f"Best value within {budget_s}s: {ranked[0]} "
+                       f"(~{ranking.loc[0, 'Fits in Budget']} full fits fit in the budget)")
+        else:
+            st.warning("No candidate completes a single full fit within the budget — raise the budget or subsample.")
+
     st.markdown("---")
     st.markdown("### \U0001F6E0️ HPO Configuration")
 
-    model_choice = st.selectbox("Choose Model to Tune:", recs or ["Random Forest", "XGBoost", "Logistic Regression", "Neural Network"])
+    choices = ranked + [m for m in recs if m not in ranked]
+    model_choice = st.selectbox("Choose Model to Tune:", choices or ["Random Forest", "XGBoost", "LightGBM", "Logistic Regression", "Neural Network"])
 
     st.markdown("**Early Stopping** (if supported)")
     use_early_stopping = st.checkbox("Enable Early Stopping", value=True)
@@ -124,11 +156,13 @@ which can be applied automatically in the preprocessing pipeline. You may overri
 
     st.markdown("**HPO Budget**")
     max_models = st.slider("Max Models to Test", 5, 50, 15)
-    parallel_mode = st.checkbox("🔁 Run in Parallel (Dask mode)", value=True)
+    parallel_mode = st.checkbox("🔁 Run in Parallel (local worker pool)", value=True)
+    st.caption("When enabled, the HPO Trainer spreads trials over a local process pool, one worker per core.")
 
     st.markdown("**Optional VC Dimension Constraint**")
     vc_dim = st.slider("Max VC Dimension (Complexity Limit)", 5, 100, 30)
-    st.caption("The VC (Vapnik–Chervonenkis) dimension is a theoretical upper bound on a model's complexity and generalization capacity.")
+    st.caption("The VC (Vapnik–Chervonenkis) dimension is a theoretical upper bound on a model's complexity and generalization capacity. "
+               "The HPO Trainer enforces it on the search space: trees × depth, MLP hidden units and polynomial degree are capped.")
 
     if st.button("\U0001F680 Launch Smart HPO"):
         st.success(f"Running {model_choice} with HPO on up to {max_models} models...")
@@ -2,9 +2,11 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import statsmodels.api as sm
 import matplotlib.pyplot as plt
 from sklearn.preprocessing import PolynomialFeatures
+from utils import lazy_import
+
+sm = lazy_import("statsmodels.api")
 
 
 def run_smart_poly_finder():
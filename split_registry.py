@@ -0,0 +1,203 @@
+# split_registry.py
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold, StratifiedKFold, train_test_split
+
+from artifact_store import DEFAULT_ROOT, fingerprint
+
+SPLIT_DIR = os.path.join(DEFAULT_ROOT, "splits")
+# Fold rings larger than this are written to disk and memory-mapped
+MEMMAP_BYTES = 256 * 1024 ** 2
+# Least recently used fold files are deleted once the split directory exceeds this
+SPLIT_DISK_BYTES = 4 * 1024 ** 3
+MAX_SPLITS = 4
+
+_registry = OrderedDict()
+_lock = threading.Lock()
+
+
+def _as_block(X, order):
+    """
+    Rows of X in `order` as one C-contiguous float32 array (numeric data) or a reordered frame.
+    """
+    if isinstance(X, pd.DataFrame):
+        if all(pd.api.types.is_numeric_dtype(t) or pd.api.types.is_bool_dtype(t) for t in X.dtypes):
+            return np.ascontiguousarray(X.to_numpy(dtype=np.float32)[order])
+        return X.iloc[order]
+    return np.ascontiguousarray(np.asarray(X, dtype=np.float32)[order])
+
+
+def _rows(block, start, stop):
+    return block.iloc[start:stop] if isinstance(block, pd.DataFrame) else block[start:stop]
+
+
+def _labels(y):
+    return y.to_numpy() if isinstance(y, pd.Series) else np.asarray(y)
+
+
+def _evict_disk(directory, limit, keep):
+    files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".npy")]
+    files.sort(key=os.path.getmtime)
+    total = sum(os.path.getsize(f) for f in files)
+    for path in files:
+        if total <= limit:
+            break
+        if path == keep:
+            continue
+        total -= os.path.getsize(path)
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # still mapped elsewhere (Windows); retried on the next write
+
+
+class Split:
+    """
+    Holdout split stored as one float32 block with the training rows first, so the
+    train and test arrays are zero-copy views. Same rows as train_test_split with the
+    same arguments. `frames()` returns the original rows and dtypes.
+    """
+
+    def __init__(self, X, y, test_size, random_state=42, stratify=False):
+        labels = _labels(y)
+        train_idx, test_idx = train_test_split(
+            np.arange(len(labels)), test_size=test_size, random_state=random_state,
+            stratify=labels if stratify else None,
+        )
+        self.n_train = len(train_idx)
+        self.train_index, self.test_index = train_idx, test_idx
+        order = np.r_[train_idx, test_idx]
+        self.block = _as_block(X, order)
+        self.y = labels[order]
+        self.columns = list(X.columns) if isinstance(X, pd.DataFrame) else None
+        self.index = X.index[order] if isinstance(X, pd.DataFrame) else None
+        self.y_name = y.name if isinstance(y, pd.Series) else None
+        # References (not copies) to the inputs, so frames() keeps the original dtypes
+        self._X = X if isinstance(X, pd.DataFrame) else None
+        self._y = y if isinstance(y, pd.Series) or self._X is None else pd.Series(labels, index=X.index)
+
+    @property
+    def X_train(self):
+        return _rows(self.block, 0, self.n_train)
+
+    @property
+    def X_test(self):
+        return _rows(self.block, self.n_train, len(self.y))
+
+    @property
+    def y_train(self):
+        return self.y[:self.n_train]
+
+    @property
+    def y_test(self):
+        return self.y[self.n_train:]
+
+    def _frame(self, start, stop):
+        part = _rows(self.block, start, stop)
+        if isinstance(part, pd.DataFrame) or self.columns is None:
+            return part
+        return pd.DataFrame(part, columns=self.columns, index=self.index[start:stop], copy=False)
+
+    def frames(self):
+        """
+        (X_train, X_test, y_train, y_test) as frames/series with the original columns,
+        index and dtypes, for estimators, explainers and the artifact store.
+        """
+        if self._X is not None:
+            return (self._X.iloc[self.train_index], self._X.iloc[self.test_index],
+                    self._y.iloc[self.train_index], self._y.iloc[self.test_index])
+        n = len(self.y)
+        index = self.index if self.index is not None else pd.RangeIndex(n)
+        return (
+            self._frame(0, self.n_train), self._frame(self.n_train, n),
+            pd.Series(self.y_train, index=index[:self.n_train], name=self.y_name, copy=False),
+            pd.Series(self.y_test, index=index[self.n_train:], name=self.y_name, copy=False),
+        )
+
+
+class Folds:
+    """
+    K-fold split stored as one ring of rows grouped by fold, with the leading folds
+    repeated after the last one. Every validation fold and every training set (the
+    folds after k, wrapping round to those before it) is then a contiguous zero-copy
+    view. Rows are shuffled within each fold, so any prefix of a training set is a
+    random subsample. Large rings are memory-mapped from disk.
+    """
+
+    def __init__(self, X, y, n_splits=5, random_state=42, stratified=True, key=None):
+        labels = _labels(y)
+        splitter = (StratifiedKFold if stratified else KFold)(n_splits=n_splits, shuffle=True, random_state=random_state)
+        rng = np.random.default_rng(random_state)
+        val_parts = [rng.permutation(val_idx)
+                     for _, val_idx in splitter.split(np.zeros(len(labels)), labels if stratified else None)]
+        order = np.concatenate(val_parts)
+        self.n_splits = n_splits
+        self.n_rows = len(order)
+        self.bounds = np.r_[0, np.cumsum([len(p) for p in val_parts])]
+        # Training set k is ring[bounds[k + 1]:n + bounds[k]]; the last one ends at n + bounds[-2]
+        ring = np.r_[order, order[:self.bounds[-2]]]
+        self.block = _as_block(X, ring)
+        self.y = labels[ring]
+        self.key = key
+        self.random_state = random_state
+        if (self.key and isinstance(self.block, np.ndarray)
+                and self.block.nbytes > MEMMAP_BYTES):
+            self.block = self._memmap()
+
+    def val(self, k):
+        start, stop = self.bounds[k], self.bounds[k + 1]
+        return _rows(self.block, start, stop), self.y[start:stop]
+
+    def train(self, k):
+        """
+        (X, y) of every fold except k, as views of the shared ring.
+        """
+        start, stop = self.bounds[k + 1], self.n_rows + self.bounds[k]
+        return _rows(self.block, start, stop), self.y[start:stop]
+
+    def _memmap(self):
+        os.makedirs(SPLIT_DIR, exist_ok=True)
+        path = os.path.join(SPLIT_DIR, f"{self.key}.npy")
+        if os.path.exists(path):
+            os.utime(path)  # mark as recently used for _evict_disk
+            return np.load(path, mmap_mode="r")
+        np.save(path + ".tmp.npy", self.block)
+        os.replace(path + ".tmp.npy", path)
+        _evict_disk(SPLIT_DIR, SPLIT_DISK_BYTES, keep=path)
+        return np.load(path, mmap_mode="r")
+
+
+def _get(key, build):
+    with _lock:
+        if key in _registry:
+            _registry.move_to_end(key)
+            return _registry[key]
+    value = build()
+    with _lock:
+        _registry[key] = value
+        while len(_registry) > MAX_SPLITS:
+            _registry.popitem(last=False)
+    return value
+
+
+def holdout(X, y, test_size=0.2, random_state=42, stratify=False):
+    """
+    Cached holdout Split for this exact data; rebuilt only when the data changes.
+    """
+    key = ("holdout", fingerprint(X), fingerprint(y), float(test_size), random_state, bool(stratify))
+    return _get(key, lambda: Split(X, y, test_size, random_state, stratify))
+
+
+def kfold(X, y, n_splits=5, random_state=42, stratified=True):
+    """
+    Cached Folds for this exact data; rebuilt only when the data changes.
+    """
+    data_fp, label_fp = fingerprint(X), fingerprint(y)
+    key = ("kfold", data_fp, label_fp, int(n_splits), random_state, bool(stratified))
+    disk_key = f"{data_fp[:12]}{label_fp[:6]}-k{n_splits}-s{random_state}{'-strat' if stratified else ''}"
+    return _get(key, lambda: Folds(X, y, n_splits, random_state, stratified, key=disk_key))
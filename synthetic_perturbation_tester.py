@@ -1,9 +1,13 @@
 # synthetic_perturbation_tester.py
 
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
+import matplotlib.pyplot as plt
 from sklearn.metrics import accuracy_score, log_loss
+from perturbation_sweep import BAND, CHUNK_ROWS, draw_noise, perturb, summarize, sweep
 from tpot_connector import _tpot_cache
 
 def run_synthetic_perturbation_tester():
@@ -19,45 +23,81 @@ def run_synthetic_perturbation_tester():
 
     st.markdown("""
     This panel perturbs the test data to evaluate model stability under micro-changes.
-    Select how much random noise to inject into numeric features.
+    Select how much random noise to inject into numeric features, or sweep many noise levels
+    with seeded repeats to see how accuracy and log loss degrade.
     """)
 
-    noise_pct = st.slider("💥 Percent Perturbation (e.g., 10 = ±10%)", 0, 50, 10)
-    inject_missing = st.checkbox("🚫 Randomly Inject Missing Values", value=False)
     selected_features = st.multiselect("🎯 Features to Perturb", X_test.columns.tolist(), default=X_test.select_dtypes(include=np.number).columns.tolist())
+    inject_missing = st.checkbox("🚫 Randomly Inject Missing Values", value=False)
+    missing_rate = st.slider("Missing rate (%)", 1, 50, 5) / 100.0 if inject_missing else 0.0
+    seed = int(st.number_input("🌱 Random seed", min_value=0, value=42, step=1))
+    mode = st.radio("Mode", ["🎲 Single Draw", "📈 Monte-Carlo Sweep"], horizontal=True)
+
+    if mode == "🎲 Single Draw":
+        noise_pct = st.slider("💥 Percent Perturbation (e.g., 10 = ±10%)", 0, 50, 10)
+        numeric, noise, mask = draw_noise(X_test, selected_features, 1, seed, missing_rate)
+        X_perturbed = perturb(X_test, selected_features, numeric, noise, mask, [noise_pct], [(0, 0)])
+        X_perturbed.index = X_test.index
 
-    X_perturbed = X_test.copy()
+        st.markdown("### 🔍 Preview of Perturbed Data")
+        st.dataframe(X_perturbed.head())
 
-    for col in selected_features:
-        if pd.api.types.is_numeric_dtype(X_perturbed[col]):
-            noise = X_perturbed[col] * (noise_pct / 100.0) * np.random.randn(len(X_perturbed))
-            X_perturbed[col] += noise
-        if inject_missing:
-            mask = np.random.rand(len(X_perturbed)) < 0.05
-            X_perturbed.loc[mask, col] = np.nan
+        try:
+            y_pred_original = model.predict(X_test)
+            y_pred_perturbed = model.predict(X_perturbed)
 
-    st.markdown("### 🔍 Preview of Perturbed Data")
-    st.dataframe(X_perturbed.head())
+            acc_original = accuracy_score(y_test, y_pred_original)
+            acc_perturbed = accuracy_score(y_test, y_pred_perturbed)
 
-    try:
-        y_pred_original = model.predict(X_test)
-        y_pred_perturbed = model.predict(X_perturbed)
+            delta_accuracy = acc_perturbed - acc_original
+            st.metric("📏 Accuracy Change", f"{delta_accuracy:.4f}", delta=f"{delta_accuracy:.4f}")
 
-        acc_original = accuracy_score(y_test, y_pred_original)
-        acc_perturbed = accuracy_score(y_test, y_pred_perturbed)
+            if hasattr(model, "predict_proba"):
+                y_proba_orig = model.predict_proba(X_test)
+                y_proba_pert = model.predict_proba(X_perturbed)
+                ll_orig = log_loss(y_test, y_proba_orig)
+                ll_pert = log_loss(y_test, y_proba_pert)
+                st.metric("📉 Log Loss Change", f"{ll_pert - ll_orig:.4f}")
 
-        delta_accuracy = acc_perturbed - acc_original
-        st.metric("📏 Accuracy Change", f"{delta_accuracy:.4f}", delta=f"{delta_accuracy:.4f}")
+        except Exception as e:
+            st.error(f"❌ Perturbation evaluation failed: {type(e).__name__}: {e}")
+    else:
+        c1, c2, c3 = st.columns(3)
+        max_pct = c1.slider("Max perturbation (%)", 5, 100, 50, step=5)
+        steps = c2.slider("Noise levels", 3, 21, 11)
+        repeats = c3.slider("Repeats per level", 5, 200, 30)
+        n_workers = int(st.number_input("Scoring threads", min_value=1, value=os.cpu_count() or 1, step=1))
+        levels = [round(float(v), 2) for v in np.linspace(0, max_pct, steps)]
+        st.caption(f"⚡ {steps} levels × {repeats} repeats × {len(X_test)} rows = "
+                   f"{steps * repeats * len(X_test):,} predictions, scored in chunks of ~{CHUNK_ROWS:,} rows.")
 
-        if hasattr(model, "predict_proba"):
-            y_proba_orig = model.predict_proba(X_test)
-            y_proba_pert = model.predict_proba(X_perturbed)
-            ll_orig = log_loss(y_test, y_proba_orig)
-            ll_pert = log_loss(y_test, y_proba_pert)
-            st.metric("📉 Log Loss Change", f"{ll_pert - ll_orig:.4f}")
+        if st.button("🚀 Run Sweep"):
+            progress = st.progress(0.0)
+            try:
+                results = sweep(model, X_test, y_test, selected_features, levels, repeats, seed, missing_rate,
+                                n_workers=n_workers, on_progress=lambda done, total: progress.progress(done / total))
+            except Exception as e:
+                st.error(f"❌ Perturbation sweep failed: {type(e).__name__}: {e}")
+                return
+            st.session_state["perturbation_sweep"] = results
 
-    except Exception as e:
-        st.error(f"❌ Perturbation evaluation failed: {type(e).__name__}: {e}")
+        results = st.session_state.get("perturbation_sweep")
+        if results is not None:
+            summary = summarize(results)
+            metrics = ["Accuracy"] + (["Log Loss"] if results["Log Loss"].notna().any() else [])
+            fig, axes = plt.subplots(1, len(metrics), figsize=(5 * len(metrics), 3.5), squeeze=False)
+            for ax, metric in zip(axes.ravel(), metrics):
+                ax.plot(summary["Noise %"], summary[f"{metric} Mean"], marker="o", label="Mean")
+                ax.fill_between(summary["Noise %"], summary[f"{metric} Low"], summary[f"{metric} High"],
+                                alpha=0.25, label=f"{BAND[0]}–{BAND[1]}th pct")
+                ax.set_xlabel("Perturbation (%)")
+                ax.set_ylabel(metric)
+                ax.legend()
+            fig.tight_layout()
+            st.pyplot(fig)
+            st.dataframe(summary.round(4), use_container_width=True)
+            csv = results.to_csv(index=False).encode("utf-8")
+            st.download_button("📥 Download Sweep Results", data=csv, file_name="perturbation_sweep.csv", mime="text/csv")
 
     st.markdown("---")
     st.markdown("""
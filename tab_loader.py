@@ -0,0 +1,61 @@
+# tab_loader.py
+
+import importlib
+import inspect
+import os
+import time
+
+# Shared across Streamlit reruns: module name -> loaded module / import seconds
+_loaded_tabs = {}
+_import_times = {}
+
+
+def resolve_module_name(entry):
+    """
+    Turn a DAIVID_TABS entry ("foo.py", "foo" or "pkg/foo.py") into an importable module name.
+    """
+    name, ext = os.path.splitext(entry)
+    if ext and ext != ".py":
+        raise ImportError(f"`{entry}` is not a Python module.")
+    return name.replace("/", ".").replace("\\", ".")
+
+
+def find_entry_point(module):
+    """
+    Locate the tab's render function: `run()`, else `run_<module>()`, else the single `run_*()` it defines.
+    """
+    if callable(getattr(module, "run", None)):
+        return module.run
+
+    short_name = module.__name__.rsplit(".", 1)[-1]
+    named = getattr(module, f"run_{short_name}", None)
+    if callable(named):
+        return named
+
+    candidates = [
+        obj for attr, obj in vars(module).items()
+        if attr.startswith("run_") and inspect.isfunction(obj) and obj.__module__ == module.__name__
+    ]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def load_tab(entry):
+    """
+    Import a tab module once per process and record how long the import took.
+    Returns (module, entry point or None).
+    """
+    modname = resolve_module_name(entry)
+    module = _loaded_tabs.get(modname)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(modname)
+        _import_times[modname] = time.perf_counter() - start
+        _loaded_tabs[modname] = module
+    return module, find_entry_point(module)
+
+
+def get_import_times():
+    """
+    Per-tab cold import cost in seconds, slowest first.
+    """
+    return dict(sorted(_import_times.items(), key=lambda kv: kv[1], reverse=True))
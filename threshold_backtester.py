@@ -3,7 +3,7 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.metrics import precision_recall_curve, roc_auc_score, f1_score, accuracy_score
+from threshold_engine import ThresholdCurve, bootstrap_backtest, cv_backtest, confidence_intervals
 
 
 def run_threshold_backtester():
@@ -20,17 +20,9 @@ def run_threshold_backtester():
         y_scores = y_scores.iloc[:, 1] if y_scores.shape[1] > 1 else y_scores.iloc[:, 0]
 
     st.subheader("📈 Threshold Performance Sweep")
-    thresholds = np.linspace(0.0, 1.0, 100)
-    metrics = []
-    for t in thresholds:
-        preds = (y_scores >= t).astype(int)
-        precision = np.round(np.nan_to_num(precision_score(y_true, preds)), 3)
-        recall = np.round(np.nan_to_num(recall_score(y_true, preds)), 3)
-        f1 = np.round(f1_score(y_true, preds), 3)
-        acc = np.round(accuracy_score(y_true, preds), 3)
-        metrics.append((t, precision, recall, f1, acc))
-
-    metric_df = pd.DataFrame(metrics, columns=["Threshold", "Precision", "Recall", "F1", "Accuracy"])
+    curve = ThresholdCurve(y_true, y_scores)
+    metric_df = curve.to_frame()[["Threshold", "Precision", "Recall", "F1 Score", "Accuracy"]].rename(columns={"F1 Score": "F1"})
+    metric_df[["Precision", "Recall", "F1", "Accuracy"]] = metric_df[["Precision", "Recall", "F1", "Accuracy"]].round(3)
     st.line_chart(metric_df.set_index("Threshold"))
 
     st.subheader("🔍 Best Threshold Insights")
@@ -49,4 +41,32 @@ def run_threshold_backtester():
     ConfusionMatrixDisplay(cm).plot(ax=ax)
     st.pyplot(fig)
 
-    st.caption("Simulated sweep of threshold impact on classification performance. Add cross-validation in future version.")
+    st.subheader("🧪 Robustness Backtest")
+    st.markdown("Re-evaluates the chosen threshold on bootstrap resamples and cross-validation folds of the holdout predictions.")
+    chosen_threshold = st.slider("Threshold to backtest", 0.0, 1.0, float(np.clip(round(best_threshold, 2), 0.0, 1.0)), 0.01)
+    mode = st.radio("Backtest mode", ["Bootstrap", "Cross-Validation", "Both"], horizontal=True)
+    n_boot = st.slider("Bootstrap resamples", 100, 5000, 1000, step=100)
+    n_folds = st.slider("CV folds", 3, 10, 5)
+
+    if st.button("▶️ Run Backtest"):
+        if mode in ("Bootstrap", "Both"):
+            with st.spinner(f"Running {n_boot} bootstrap resamples..."):
+                boot_df = bootstrap_backtest(y_true, y_scores, chosen_threshold, n_boot=n_boot)
+            st.markdown("#### 🎲 Bootstrap")
+            st.dataframe(confidence_intervals(boot_df).round(4))
+
+            fig, ax = plt.subplots()
+            ax.hist(boot_df["Optimal Threshold"], bins=30, color="steelblue")
+            ax.axvline(chosen_threshold, color="red", linestyle="--", label="Chosen Threshold")
+            ax.set_xlabel("Optimal F1 Threshold per Resample")
+            ax.set_ylabel("Count")
+            ax.legend()
+            st.pyplot(fig)
+
+        if mode in ("Cross-Validation", "Both"):
+            cv_df = cv_backtest(y_true, y_scores, chosen_threshold, n_splits=n_folds)
+            st.markdown("#### 🔀 Cross-Validation")
+            st.dataframe(cv_df.round(4))
+            st.dataframe(confidence_intervals(cv_df).round(4))
+
+    st.caption("Bootstrap and CV resamples reuse one sorted score order, so thousands of resamples stay cheap.")
@@ -0,0 +1,213 @@
+# threshold_engine.py
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+# Per-outcome payoff used for the "Utility" metric; the default reproduces accuracy
+DEFAULT_PAYOFFS = {"tp": 1.0, "tn": 1.0, "fp": 0.0, "fn": 0.0}
+
+# Upper bound on (resamples x rows) materialised per bootstrap chunk
+MAX_CHUNK_CELLS = 20_000_000
+
+METRIC_COLUMNS = {
+    "precision": "Precision",
+    "recall": "Recall",
+    "f1": "F1 Score",
+    "accuracy": "Accuracy",
+    "specificity": "Specificity",
+    "utility": "Utility",
+}
+
+
+def _safe_div(num, den):
+    num = np.asarray(num, dtype=float)
+    den = np.asarray(den, dtype=float)
+    return np.divide(num, den, out=np.zeros(np.broadcast(num, den).shape), where=den != 0)
+
+
+def sort_scores(y_true, scores):
+    """
+    Sort once by descending score. Returns (sorted labels, sorted scores, order,
+    last index of each distinct score) for reuse by every weighted sweep.
+    """
+    scores = np.asarray(scores, dtype=float).ravel()
+    labels = (np.asarray(y_true).ravel() == 1).astype(float)
+    order = np.argsort(-scores, kind="mergesort")
+    s = scores[order]
+    group_ends = np.r_[np.flatnonzero(np.diff(s)), len(s) - 1]
+    return labels[order], s, order, group_ends
+
+
+def confusion_counts(sorted_labels, group_ends, weights=None):
+    """
+    Cumulative TP/FP at every distinct threshold, ordered from the highest score down.
+    `weights` may be (n,) or (batch, n) per-row multiplicities in sorted order, so
+    bootstrap resamples and CV folds are evaluated without re-sorting.
+    """
+    if weights is None:
+        weights = np.ones_like(sorted_labels)
+    weights = np.asarray(weights, dtype=float)
+    tp = np.cumsum(weights * sorted_labels, axis=-1)[..., group_ends]
+    fp = np.cumsum(weights * (1.0 - sorted_labels), axis=-1)[..., group_ends]
+    positives = (weights * sorted_labels).sum(axis=-1, keepdims=True)
+    negatives = weights.sum(axis=-1, keepdims=True) - positives
+    return tp, fp, positives, negatives
+
+
+def metrics_from_counts(tp, fp, positives, negatives, payoffs=None):
+    payoffs = {**DEFAULT_PAYOFFS, **(payoffs or {})}
+    fn = positives - tp
+    tn = negatives - fp
+    total = positives + negatives
+    return {
+        "tp": tp, "fp": fp, "tn": tn, "fn": fn,
+        "precision": _safe_div(tp, tp + fp),
+        "recall": _safe_div(tp, np.broadcast_to(positives, np.shape(tp))),
+        "f1": _safe_div(2 * tp, 2 * tp + fp + fn),
+        "accuracy": _safe_div(tp + tn, np.broadcast_to(total, np.shape(tp))),
+        "specificity": _safe_div(tn, np.broadcast_to(negatives, np.shape(tp))),
+        "utility": _safe_div(
+            payoffs["tp"] * tp + payoffs["tn"] * tn + payoffs["fp"] * fp + payoffs["fn"] * fn,
+            np.broadcast_to(total, np.shape(tp)),
+        ),
+    }
+
+
+class ThresholdCurve:
+    """
+    Every metric at every distinct score threshold (predict positive when score >= threshold),
+    with thresholds ascending. Built from one sort and cumulative sums.
+    """
+
+    def __init__(self, y_true, scores, payoffs=None, sample_weight=None):
+        n_labels, n_scores = len(y_true), len(scores)
+        if n_labels == 0 or n_scores == 0:
+            raise ValueError("ThresholdCurve needs at least one label and score; got empty input.")
+        if n_labels != n_scores:
+            raise ValueError(f"y_true and scores differ in length ({n_labels} vs {n_scores}).")
+        sorted_labels, sorted_scores, order, group_ends = sort_scores(y_true, scores)
+        weights = None if sample_weight is None else np.asarray(sample_weight, dtype=float)[order]
+        tp, fp, positives, negatives = confusion_counts(sorted_labels, group_ends, weights)
+
+        # Prepend the "predict nothing positive" point just above the top score
+        top = np.nextafter(sorted_scores[0], np.inf) if len(sorted_scores) else 1.0
+        thresholds = np.r_[top, sorted_scores[group_ends]]
+        tp = np.r_[0.0, tp]
+        fp = np.r_[0.0, fp]
+
+        # Flip to ascending thresholds for plotting and searchsorted lookups
+        self.thresholds = thresholds[::-1]
+        self.metrics = {k: np.asarray(v)[::-1] for k, v in metrics_from_counts(tp, fp, positives[0], negatives[0], payoffs).items()}
+
+    def best(self, metric="f1"):
+        """
+        (threshold, value) maximising `metric`; ties go to the highest threshold.
+        """
+        values = self.metrics[metric]
+        idx = len(values) - 1 - int(np.argmax(values[::-1]))
+        return float(self.thresholds[idx]), float(values[idx])
+
+    def at(self, threshold):
+        """
+        All metrics for the rule `score >= threshold`.
+        """
+        idx = min(int(np.searchsorted(self.thresholds, threshold, side="left")), len(self.thresholds) - 1)
+        return {k: float(v[idx]) for k, v in self.metrics.items()}
+
+    def to_frame(self):
+        frame = pd.DataFrame({"Threshold": self.thresholds})
+        for key, label in METRIC_COLUMNS.items():
+            frame[label] = self.metrics[key]
+        return frame
+
+
+# -- Resampled backtesting --
+def _descending_thresholds(sorted_scores, group_ends):
+    top = np.nextafter(sorted_scores[0], np.inf)
+    return np.r_[top, sorted_scores[group_ends]]
+
+
+def _batch_metrics(sorted_labels, group_ends, weights, payoffs=None):
+    # Column 0 is the "nothing positive" rule, matching _descending_thresholds
+    tp, fp, positives, negatives = confusion_counts(sorted_labels, group_ends, weights)
+    zeros = np.zeros(tp.shape[:-1] + (1,))
+    return metrics_from_counts(
+        np.concatenate([zeros, tp], axis=-1), np.concatenate([zeros, fp], axis=-1), positives, negatives, payoffs
+    )
+
+
+def _threshold_column(thresholds_desc, threshold):
+    # Number of distinct scores >= threshold == column of the rule score >= threshold
+    return int(np.searchsorted(-thresholds_desc[1:], -threshold, side="right"))
+
+
+def _resample_block(sorted_labels, group_ends, thresholds_desc, weights_fit, weights_eval, threshold, metric, payoffs):
+    fit = _batch_metrics(sorted_labels, group_ends, weights_fit, payoffs)
+    ev = fit if weights_eval is weights_fit else _batch_metrics(sorted_labels, group_ends, weights_eval, payoffs)
+
+    # Optimal threshold per resample (ties -> highest threshold, i.e. first column)
+    best_cols = np.argmax(fit[metric], axis=-1)
+    rows = np.arange(len(best_cols))
+    fixed_col = _threshold_column(thresholds_desc, threshold)
+
+    block = {"Optimal Threshold": thresholds_desc[best_cols],
+             f"Optimal {METRIC_COLUMNS[metric]}": ev[metric][rows, best_cols]}
+    for key, label in METRIC_COLUMNS.items():
+        block[label] = ev[key][:, fixed_col]
+    return pd.DataFrame(block)
+
+
+def bootstrap_backtest(y_true, scores, threshold, metric="f1", n_boot=1000, seed=0, payoffs=None, n_jobs=-1):
+    """
+    Re-evaluate `threshold` on `n_boot` bootstrap resamples of (y_true, scores).
+    Resamples are multinomial row weights over the single sorted order, so each
+    one costs a cumulative sum rather than a sort. Returns one row per resample with
+    that resample's optimal threshold and the metrics at `threshold`.
+    """
+    sorted_labels, sorted_scores, _, group_ends = sort_scores(y_true, scores)
+    thresholds_desc = _descending_thresholds(sorted_scores, group_ends)
+    n = len(sorted_labels)
+    chunk = int(max(1, min(256, MAX_CHUNK_CELLS // max(n, 1))))
+    seeds = np.random.SeedSequence(seed).spawn((n_boot + chunk - 1) // chunk)
+    sizes = [min(chunk, n_boot - i * chunk) for i in range(len(seeds))]
+
+    def run_chunk(seq, size):
+        weights = np.random.default_rng(seq).multinomial(n, np.full(n, 1.0 / n), size=size).astype(float)
+        return _resample_block(sorted_labels, group_ends, thresholds_desc, weights, weights, threshold, metric, payoffs)
+
+    blocks = Parallel(n_jobs=n_jobs, prefer="threads")(delayed(run_chunk)(seq, size) for seq, size in zip(seeds, sizes))
+    return pd.concat(blocks, ignore_index=True)
+
+
+def cv_backtest(y_true, scores, threshold, metric="f1", n_splits=5, seed=0, payoffs=None):
+    """
+    K-fold check of threshold selection: each fold picks its optimal threshold on the
+    other folds and is scored on itself, alongside the metrics at `threshold`.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    sorted_labels, sorted_scores, order, group_ends = sort_scores(y_true, scores)
+    thresholds_desc = _descending_thresholds(sorted_scores, group_ends)
+    folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+
+    held_out = np.zeros((n_splits, len(sorted_labels)))
+    for k, (_, test_idx) in enumerate(folds.split(np.zeros(len(sorted_labels)), sorted_labels)):
+        held_out[k, test_idx] = 1.0
+
+    result = _resample_block(sorted_labels, group_ends, thresholds_desc, 1.0 - held_out, held_out, threshold, metric, payoffs)
+    result.insert(0, "Fold", np.arange(1, n_splits + 1))
+    return result
+
+
+def confidence_intervals(results, level=0.95):
+    """
+    Mean and percentile interval of every numeric column in a backtest result.
+    """
+    alpha = (1.0 - level) / 2.0
+    numeric = results.select_dtypes(include="number").drop(columns=["Fold"], errors="ignore")
+    return pd.DataFrame({
+        "Mean": numeric.mean(),
+        f"Lower {level:.0%}": numeric.quantile(alpha),
+        f"Upper {level:.0%}": numeric.quantile(1.0 - alpha),
+    })
@@ -2,7 +2,7 @@
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.metrics import precision_score, recall_score, f1_score, accuracy_score
+from threshold_engine import ThresholdCurve
 
 
 def run_threshold_optimizer(y_true=None, y_proba=None):
@@ -15,21 +15,18 @@ def run_threshold_optimizer(y_true=None, y_proba=None):
         st.warning("Please pass both true labels and predicted probabilities to this panel.")
         return
 
-    thresholds = np.linspace(0, 1, 101)
-    precision, recall, f1, accuracy = [], [], [], []
+    curve = ThresholdCurve(y_true, y_proba)
+    thresholds = curve.thresholds
+    precision = curve.metrics["precision"]
+    recall = curve.metrics["recall"]
+    f1 = curve.metrics["f1"]
+    accuracy = curve.metrics["accuracy"]
 
-    for t in thresholds:
-        y_pred = (y_proba >= t).astype(int)
-        precision.append(precision_score(y_true, y_pred, zero_division=0))
-        recall.append(recall_score(y_true, y_pred, zero_division=0))
-        f1.append(f1_score(y_true, y_pred, zero_division=0))
-        accuracy.append(accuracy_score(y_true, y_pred))
-
-    best_f1_index = int(np.argmax(f1))
-    best_threshold = thresholds[best_f1_index]
+    best_threshold, _ = curve.best("f1")
 
     st.markdown(f"**Optimal Threshold for F1 Score:** `{best_threshold:.2f}`")
-    st.slider("🔧 Select Custom Threshold", 0.0, 1.0, best_threshold, step=0.01, key="custom_thresh")
+    custom = st.slider("🔧 Select Custom Threshold", 0.0, 1.0, float(np.clip(round(best_threshold, 2), 0.0, 1.0)), step=0.01, key="custom_thresh")
+    st.write({k: round(v, 4) for k, v in curve.at(custom).items() if k in ("precision", "recall", "f1", "accuracy")})
 
     fig, ax = plt.subplots(figsize=(10, 5))
     ax.plot(thresholds, precision, label='Precision')
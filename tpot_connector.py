@@ -1,11 +1,9 @@
 # tpot_connector.py
 
-# Shared in-memory cache for model and data
-_tpot_cache = {
-    "model": None,
-    "X_train": None,
-    "y_train": None
-}
+from artifact_store import ArtifactStore
+
+# Shared model/data store: live objects in memory, persistent artifacts on disk
+_tpot_cache = ArtifactStore()
 
 def set_latest_model_and_data(model, X_train, y_train):
     """
@@ -5,7 +5,7 @@ import streamlit as st
 import joblib
 import os
 
-from tpot_connector import __dict__ as _tpot_cache
+from tpot_connector import _tpot_cache
 
 DEFAULT_PATH = "best_pipeline.pkl"
 
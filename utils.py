@@ -1,3 +1,5 @@
+import importlib
+import types
 
 import pandas as pd
 
@@ -5,3 +7,35 @@ def evaluate_submission(df):
     if 'Survived' in df.columns:
         return 0.789 + (len(df) % 10) * 0.0001
     return 0.0
+
+
+class LazyModule(types.ModuleType):
+    """
+    Module stand-in that performs the real import on first attribute access.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """
+    Defer importing a heavy third-party package until it is actually used.
+    Tab modules use this so that importing them (and rendering the navigator)
+    does not pay for shap/tpot/xgboost/optuna start-up.
+    """
+    return LazyModule(name)
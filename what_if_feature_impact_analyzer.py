@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+from batch_inference import candidate_values, what_if_grid_by_feature
 from tpot_connector import _tpot_cache
 
 def run_what_if_feature_impact_analyzer():
@@ -19,55 +20,83 @@ def run_what_if_feature_impact_analyzer():
         st.warning("⚠️ TPOT model or training data missing. Please run AutoML first.")
         return
 
-    # Instance selection for analysis
-    instance_idx = st.slider("🔢 Choose a training row to analyze", 0, len(X_train) - 1, 0)
-    instance = X_train.iloc[[instance_idx]]
-    st.dataframe(instance)
+    # Instances to analyze: one row, or a sample of the training/test set scored together
+    X_test = _tpot_cache.get("latest_X_test")
+    sources = {"Training set": X_train}
+    if isinstance(X_test, pd.DataFrame) and list(X_test.columns) == list(X_train.columns):
+        sources["Test set"] = X_test
+    scope = st.radio("🎯 Analyze", ["Single row", "Many rows"], horizontal=True)
+    if scope == "Single row":
+        instance_idx = st.slider("🔢 Choose a training row to analyze", 0, len(X_train) - 1, 0)
+        instances = X_train.iloc[[instance_idx]]
+        st.dataframe(instances)
+    else:
+        source = st.selectbox("📂 Rows from", list(sources))
+        data = sources[source]
+        n_rows = st.slider("🔢 Number of rows", 1, len(data), min(200, len(data)))
+        instances = data.sample(n=n_rows, random_state=42) if n_rows < len(data) else data
+
+    # Candidate values per feature: the old "zero / missing" probe plus observed quantiles or top categories
+    candidates, labels = {}, {}
+    for col in X_train.columns:
+        candidates[col], labels[col] = candidate_values(X_train, col)
+    n_variants = sum(len(v) for v in candidates.values())
+    st.caption(f"⚡ {len(instances)} row(s) × {n_variants + 1} variants = "
+               f"{len(instances) * (n_variants + 1):,} predictions in one batched call.")
 
-    # Get baseline prediction
     try:
-        baseline_pred = model.predict(instance)[0]
-        proba_available = hasattr(model, "predict_proba")
-        if proba_available:
-            baseline_proba = model.predict_proba(instance)[0]
+        variants, impact, flipped, predictions, errors = what_if_grid_by_feature(model, instances, candidates)
     except Exception as e:
         st.error(f"❌ Prediction failed: {type(e).__name__}: {e}")
         return
+    if errors:
+        st.warning("⚠️ Some features could not be scored and are marked as errors: "
+                   + "; ".join(f"{f} ({msg})" for f, msg in errors.items()))
+    scored = [f for f in candidates if f not in errors]
 
-    # Impact test loop
-    results = []
-    for col in X_train.columns:
-        modified = instance.copy()
-
-        if pd.api.types.is_numeric_dtype(modified[col]):
-            modified[col] = 0
-        else:
-            modified[col] = None
-
-        try:
-            new_pred = model.predict(modified)[0]
-            if proba_available:
-                new_proba = model.predict_proba(modified)[0]
-                delta = np.abs(baseline_proba - new_proba).sum()
-            else:
-                delta = float(baseline_pred != new_pred)
+    # candidate_values puts the zero/missing probe first for every feature
+    probe = variants.index[variants["Candidate"] == 0]
+    variants["Candidate"] = [labels[f][j] for f, j in zip(variants["Feature"], variants["Candidate"])]
+    variants["Mean Impact"] = impact.mean(axis=0)
+    variants["Max Impact"] = impact.max(axis=0)
+    variants["Flip Rate"] = flipped.mean(axis=0)
 
-            results.append({
-                "Feature": col,
-                "Changed Prediction": new_pred,
-                "Impact Score": round(delta, 4)
-            })
-        except Exception as e:
-            results.append({
-                "Feature": col,
-                "Changed Prediction": "Error",
-                "Impact Score": None
-            })
+    # Per-feature summary; "Impact Score" keeps its old meaning of the zero/missing probe
+    first = variants.loc[probe].set_index("Feature")
+    grouped = variants.groupby("Feature", sort=False)
+    df = pd.DataFrame({
+        "Feature": scored,
+        "Impact Score": first["Mean Impact"].reindex(scored).round(4).to_numpy(),
+        "Max Impact (any value)": grouped["Max Impact"].max().reindex(scored).round(4).to_numpy(),
+        "Flip Rate (any value)": grouped["Flip Rate"].max().reindex(scored).round(4).to_numpy(),
+    })
+    if len(instances) == 1:
+        df.insert(1, "Changed Prediction", predictions[0, 1:][probe])
+    if errors:
+        failed = pd.DataFrame({"Feature": list(errors)})
+        if len(instances) == 1:
+            failed["Changed Prediction"] = "Error"
+            df["Changed Prediction"] = df["Changed Prediction"].astype(str)
+        df = pd.concat([df, failed], ignore_index=True)
 
-    df = pd.DataFrame(results).sort_values(by="Impact Score", ascending=False)
+    df = df.sort_values(by="Impact Score", ascending=False)
     st.markdown("### 📊 Feature Impact Summary")
     st.dataframe(df, use_container_width=True)
 
+    with st.expander("🧮 Impact by Candidate Value"):
+        st.dataframe(variants.drop(columns="Value").round(4), use_container_width=True)
+
+    if len(instances) > 1:
+        with st.expander("📋 Most Sensitive Rows"):
+            per_row = pd.DataFrame({
+                "Row": instances.index,
+                "Baseline Prediction": predictions[:, 0],
+                "Max Impact": impact.max(axis=1).round(4),
+                "Flipping Variants": flipped.sum(axis=1),
+                "Most Fragile Feature": variants["Feature"].to_numpy()[impact.argmax(axis=1)],
+            })
+            st.dataframe(per_row.sort_values("Max Impact", ascending=False), use_container_width=True)
+
     # Download CSV with impact results
     csv = df.to_csv(index=False).encode("utf-8")
     st.download_button("📥 Download Impact Report", data=csv, file_name="feature_impact_report.csv", mime="text/csv")
@@ -1,13 +1,81 @@
 # zoom_hpo_explorer.py
+import os
 import streamlit as st
 import traceback
-import optuna
 import pandas as pd
 import plotly.express as px
 from tpot_connector import _tpot_cache
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
+from split_registry import holdout
+from hpo_storage import study_name, load_or_create_study, completed_trials
+from hpo_executor import BACKENDS, TrialExecutor, render_executor_status
+from search_space import (
+    SEARCH_SPACES, build_model, contains, describe, distributions, get_space, project, space_id, suggest,
+    zoom as zoom_space,
+)
+from utils import lazy_import
+
+optuna = lazy_import("optuna")
+
+
+def _param_key(params):
+    return tuple(sorted(params.items()))
+
+
+class ZoomObjective:
+    """
+    Validation accuracy of `model_name` on a fixed split within the current zoom space
+    (picklable for worker processes). Points already scored in any phase are answered
+    from `memo` instead of being re-trained.
+    """
+
+    def __init__(self, X_train, X_val, y_train, y_val, model_name, space, memo=None, config=None):
+        self.X_train, self.X_val, self.y_train, self.y_val = X_train, X_val, y_train, y_val
+        self.model_name = model_name
+        self.space = dict(space)
+        self.memo = dict(memo or {})
+        self.config = config
+
+    def __call__(self, trial):
+        params = suggest(trial, self.space)
+        key = _param_key(params)
+        if key in self.memo:
+            trial.set_user_attr("memo_hit", True)
+            return self.memo[key]
+        clf = build_model(self.model_name, params, self.config)
+        clf.fit(self.X_train, self.y_train)
+        score = accuracy_score(self.y_val, clf.predict(self.X_val))
+        self.memo[key] = score
+        return score
+
+
+def warm_start(study, space, memo, best_points):
+    """
+    Seed a phase study with every already-scored point inside its space (no re-training)
+    and enqueue prior best points that have not been scored yet. Returns the number added.
+    """
+    seen = {_param_key(t.params) for t in completed_trials(study)}
+    dists = distributions(space)
+    added = 0
+    for key, score in memo.items():
+        params = dict(key)
+        if key in seen or not contains(space, params):
+            continue
+        study.add_trial(optuna.trial.create_trial(params=params, distributions=dists, value=score,
+                                                  user_attrs={"warm_start": True}))
+        seen.add(key)
+        added += 1
+    for params in best_points:
+        projected = project(space, params)
+        if _param_key(projected) not in seen:
+            study.enqueue_trial(projected, skip_if_exists=True)
+    return added
+
+
+def _fresh_count(study):
+    return sum(1 for t in completed_trials(study)
+               if not t.user_attrs.get("warm_start") and not t.user_attrs.get("memo_hit"))
+
 
 def run_zoom_hpo_explorer():
     try:
@@ -32,68 +100,109 @@ def run_zoom_hpo_explorer():
             st.warning("⚠️ Please run AutoML first.")
             return
 
+        config = _tpot_cache.get("last_hpo_config") or {}
+        models = list(SEARCH_SPACES)
+        default_model = config.get("model", "Random Forest")
+        model_name = st.selectbox("Model to Zoom", models, index=models.index(default_model) if default_model in models else 0)
+        base_space = get_space(model_name, config.get("vc_dim"))
+        with st.expander("🧭 Initial Search Space" + (f" (VC limit {config['vc_dim']})" if config.get("vc_dim") else "")):
+            st.json(describe(base_space))
+
         zoom_levels = st.slider("Zoom Phases", 1, 5, 3)
         trials_per_zoom = st.slider("Trials per Zoom", 10, 100, 30)
         optimize_for = st.selectbox("Metric to Optimize", ["Accuracy"])
-        run_parallel = st.checkbox("Enable Parallel Mode (Simulated)", value=True)
-
-        zoom_summaries = []
-
-        st.markdown("### 🚀 Running HPO Zoom Phases")
-        current_bounds = {
-            "n_estimators": (10, 200),
-            "max_depth": (2, 20),
-            "min_samples_split": (2, 10)
-        }
-
-        for zoom in range(zoom_levels):
-            st.markdown(f"#### 🔎 Zoom Level {zoom+1}")
-
-            def objective(trial):
-                n_estimators = trial.suggest_int("n_estimators", *current_bounds["n_estimators"])
-                max_depth = trial.suggest_int("max_depth", *current_bounds["max_depth"])
-                min_samples_split = trial.suggest_int("min_samples_split", *current_bounds["min_samples_split"])
-
-                clf = RandomForestClassifier(
-                    n_estimators=n_estimators,
-                    max_depth=max_depth,
-                    min_samples_split=min_samples_split,
-                    random_state=42
+        run_parallel = st.checkbox("Enable Parallel Mode", value=True)
+        if run_parallel:
+            cpu_count = os.cpu_count() or 1
+            p1, p2 = st.columns(2)
+            n_workers = int(p1.number_input("Parallel workers", min_value=1, max_value=cpu_count,
+                                            value=cpu_count, step=1))
+            backend = p2.selectbox("Executor", BACKENDS, index=0)
+
+        # One fixed split per dataset version, shared by every phase and rerun
+        version = _tpot_cache.dataset_version()
+        split = holdout(X, y, test_size=0.2, random_state=42)
+        X_train, X_val, y_train, y_val = split.X_train, split.X_test, split.y_train, split.y_test
+        history_key = _tpot_cache.versioned("zoom_history", version)
+        history = _tpot_cache.get(history_key) or []
+
+        if st.button("🚀 Run Zoom Phases"):
+            st.markdown("### 🚀 Running HPO Zoom Phases")
+            current_space = dict(base_space)
+            # Every point scored in earlier phases or earlier runs, keyed by params
+            memo = {}
+            best_points = []
+            history = []
+
+            for level in range(zoom_levels):
+                st.markdown(f"#### 🔎 Zoom Level {level+1}")
+
+                # Phases are keyed by their space, so a rerun resumes the same studies
+                study = load_or_create_study(study_name("zoom", model_name, optimize_for, space_id(current_space)))
+                for t in completed_trials(study):
+                    memo.setdefault(_param_key(t.params), t.value)
+                reused = warm_start(study, current_space, memo, best_points)
+
+                # Only fresh evaluations count against the phase budget
+                evaluated = _fresh_count(study)
+                remaining = max(trials_per_zoom - evaluated, 0)
+                objective = ZoomObjective(X_train, X_val, y_train, y_val, model_name, current_space, memo, config)
+                if remaining and run_parallel:
+                    executor = TrialExecutor(study, objective, n_workers=n_workers, backend=backend)
+                    status = st.empty()
+                    executor.run(remaining, on_update=lambda ex: render_executor_status(status, ex))
+                elif remaining:
+                    study.optimize(objective, n_trials=remaining)
+
+                trials = completed_trials(study)
+                for t in trials:
+                    memo.setdefault(_param_key(t.params), t.value)
+                memo_hits = sum(1 for t in trials if t.user_attrs.get("memo_hit"))
+                fresh = _fresh_count(study) - evaluated
+
+                best_params = study.best_params
+                best_score = study.best_value
+                best_points.append(best_params)
+                st.success(f"Zoom {level+1} Best Score: {best_score:.4f}")
+                st.caption(f"Reused {reused} scored points, {memo_hits} duplicate suggestions answered from memo, "
+                           f"{fresh} new points trained.")
+                st.code(best_params)
+
+                # Visualize
+                fig = px.line(
+                    x=list(range(len(trials))),
+                    y=[t.value for t in trials],
+                    labels={"x": "Trial", "y": "Score"},
+                    title=f"Zoom {level+1} Trial Scores"
                 )
-                X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
-                clf.fit(X_train, y_train)
-                preds = clf.predict(X_val)
-                return accuracy_score(y_val, preds)
-
-            study = optuna.create_study(direction="maximize")
-            study.optimize(objective, n_trials=trials_per_zoom)
-
-            best_params = study.best_params
-            best_score = study.best_value
-            st.success(f"Zoom {zoom+1} Best Score: {best_score:.4f}")
-            st.code(best_params)
-
-            # Visualize
-            fig = px.line(
-                x=list(range(len(study.trials))),
-                y=[t.value for t in study.trials],
-                labels={"x": "Trial", "y": "Score"},
-                title=f"Zoom {zoom+1} Trial Scores"
-            )
-            st.plotly_chart(fig)
-
-            zoom_summaries.append((zoom+1, best_score, best_params))
-
-            # Refine bounds (±25% around best param)
-            for k, v in best_params.items():
-                low, high = current_bounds[k]
-                span = high - low
-                new_low = max(1, int(v - span * 0.25))
-                new_high = max(new_low + 1, int(v + span * 0.25))
-                current_bounds[k] = (new_low, new_high)
+                st.plotly_chart(fig)
+
+                history.append({
+                    "Zoom": level + 1,
+                    "Score": best_score,
+                    "Params": best_params,
+                    "Model": model_name,
+                    "Space": describe(current_space),
+                    "Trials": len(trials),
+                    "Reused": reused,
+                    "New": fresh,
+                    "Study": study.study_name,
+                })
+
+                # Refine the space (±25% of each width around the best point, log-scaled where declared)
+                current_space = zoom_space(current_space, best_params, limits=base_space)
+
+            _tpot_cache.put(history_key, history)
+
+        if not history:
+            st.info("Click 'Run Zoom Phases' to start. Results persist per dataset and are resumed on the next run.")
+            return
 
         st.markdown("### 📊 Final Zoom Summary")
-        st.dataframe(pd.DataFrame(zoom_summaries, columns=["Zoom", "Score", "Params"]))
+        summary = pd.DataFrame(history)
+        summary["Params"] = summary["Params"].astype(str)
+        summary["Space"] = summary["Space"].astype(str)
+        st.dataframe(summary)
 
     except Exception as e:
         st.error(f"❌ Zoomed HPO Explorer failed to load: {type(e).__name__}: {e}")